@@ -1,10 +1,12 @@
 import asyncio
 import time
 import json
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from typing import Dict, Any
 
 from fastapi import Request
+from fastapi.responses import JSONResponse, Response
 
 from ErisPulse import sdk
 from ErisPulse.Core.Bases import BaseModule
@@ -12,10 +14,34 @@ from ErisPulse.Core.Event import command
 
 from .utils import (
     generate_uuid_short,
-    verify_signature,
     format_timestamp,
     get_event_key,
+    get_delivery_key,
+    repo_endpoint_key,
+    classify_event,
 )
+from .pipeline import IngressQueue
+from .registry import ConfigRegistry
+from .dedup import DedupCache
+from .history import HistoryStore, SQLiteHistoryStore, SUMMARY_FIELDS, PAGE_SIZE, parse_history_args
+from .payload import (
+    decode_payload,
+    merge_fields,
+    read_body,
+    content_length_exceeds,
+    PayloadTooLarge,
+    PARSER_NAME,
+)
+from .signature import SignatureVerifier, parse_signature_headers
+from .coalescer import MessageCoalescer
+from .delivery import OutboundDispatcher
+from .templates import TemplateRegistry
+from .filters import FilterRegistry, FILTER_FIELDS
+from .metrics import WebhookMetrics, InstrumentedStorage, StageTimer
+from .maintenance import StorageMaintenance, RATELIMIT_PREFIX
+from .storage import StorageAccess
+from .replay import HistoryReplayer, parse_replay_args, PREVIEW_COUNT
+from .shared_state import create_shared_state
 from .handlers import (
     PushHandler,
     IssuesHandler,
@@ -24,6 +50,7 @@ from .handlers import (
     StarHandler,
     ForkHandler,
     WorkflowHandler,
+    WorkflowSummaryHandler,
 )
 
 
@@ -33,9 +60,72 @@ class Main(BaseModule):
     def __init__(self):
         self.sdk = sdk
         self.logger = sdk.logger.get_child("GitHubWebhook")
-        self.storage = sdk.storage
+        self.metrics = WebhookMetrics()
         self.config = self._load_config()
+        self.storage = StorageAccess(
+            InstrumentedStorage(sdk.storage, self.metrics.storage_seconds),
+            self.logger,
+            write_delay=self.config['storage_write_delay_ms'] / 1000,
+            max_pending=self.config['storage_write_max_pending'],
+            journal=self.config['storage_journal'] or None,
+            journal_fsync=self.config['storage_journal_fsync'],
+        )
         self.webhook_routes = {}
+        self.repo_routes = {}
+        self._verifiers = {}
+        self.shared_state = create_shared_state(self.config, self.logger)
+        self.registry = ConfigRegistry(self.storage, self.logger, shared=self.shared_state)
+        self.dedup = DedupCache(self.config['dedup_ttl'], self.config['dedup_max_size'], shared=self.shared_state)
+        if self.config['history_backend'] == 'sqlite':
+            self.history = SQLiteHistoryStore(
+                self.config['history_path'],
+                self.storage,
+                self.logger,
+                max_records=self.config['max_history_records'],
+                store_payload=self.config['history_store_payload'],
+                batch_size=self.config['history_batch_size'],
+                flush_interval=self.config['history_flush_ms'] / 1000,
+            )
+        else:
+            self.history = HistoryStore(
+                self.storage,
+                self.logger,
+                max_records=self.config['max_history_records'],
+                store_payload=self.config['history_store_payload'],
+            )
+        self.dispatcher = OutboundDispatcher(
+            self.sdk.adapter.get, self.storage, self.logger, self.config, metrics=self.metrics
+        )
+        self.filters = FilterRegistry(self.config.get('subscriptions'), self.logger)
+        self.replayer = HistoryReplayer(
+            self.history,
+            self._format_message,
+            self._send_message,
+            self.logger,
+            rate=self.config['replay_rate'],
+            batch_size=self.config['replay_batch_size'],
+            max_records=self.config['replay_max_records'],
+        )
+        self.ingress_queue = None
+        self.metrics.queue_depth.set_function(lambda: self.ingress_queue.depth if self.ingress_queue else 0)
+        self.coalescer = None
+        if self.config.get('coalesce_window'):
+            self.coalescer = MessageCoalescer(
+                self._send_message,
+                self.logger,
+                window=self.config['coalesce_window'],
+                max_events=self.config['coalesce_max_events'],
+            )
+        self._dedup_task = None
+        self.maintenance = StorageMaintenance(
+            self.storage, self.logger, self.dedup, self.history, self.registry, self.config, self.metrics,
+            shared_state=self.shared_state,
+        )
+        self._maintenance_task = None
+        self._state_sync_task = None
+        self._metrics_route = False
+        self._dispatch_route = False
+        self._send_tasks = set()  # 同步处理模式下的后台发送任务
         
         # 事件处理器映射
         self.event_handlers = {
@@ -47,6 +137,24 @@ class Main(BaseModule):
             'fork': ForkHandler,
             'workflow_run': WorkflowHandler,
         }
+        self.templates = TemplateRegistry(
+            self.config.get('templates'),
+            self.logger,
+            {**self.event_handlers, 'workflow_run_summary': WorkflowSummaryHandler},
+        )
+        
+        # 选择性解码：只保留处理器、去重键和历史摘要用到的字段
+        self.payload_fields = {}
+        if self.config.get('payload_selective'):
+            self.payload_fields = {
+                event_type: merge_fields(
+                    handler.FIELDS,
+                    handler.KEY_FIELDS,
+                    SUMMARY_FIELDS,
+                    FILTER_FIELDS,
+                )
+                for event_type, handler in self.event_handlers.items()
+            }
     
     @staticmethod
     def get_load_strategy():
@@ -59,7 +167,7 @@ class Main(BaseModule):
     
     async def on_load(self, event):
         """模块加载时调用"""
-        self.logger.info("模块加载中...")
+        self.logger.info(f"模块加载中... (JSON 解析器: {PARSER_NAME})")
         
         # 检查必要配置
         if not self.config.get('base_url'):
@@ -69,17 +177,99 @@ class Main(BaseModule):
         # 注册命令
         self._register_commands()
         
+        # 重放上次未落盘的写入
+        self.storage.recover()
+        
+        # 加载配置注册表
+        await self.registry.load()
+        
+        # 迁移旧版历史记录
+        for target_id in {c.get('target_id') for c in self.registry.all()}:
+            await self.history.migrate_legacy(target_id)
+        
+        # 恢复死信列表
+        self.dispatcher.load()
+        
+        # 恢复去重缓存
+        self.dedup.restore(self.storage.get(DedupCache.STORAGE_KEY, []))
+        self._dedup_task = asyncio.create_task(self._dedup_snapshot_loop())
+        
         # 恢复所有路由
         await self._restore_routes()
         
-        # 清理过期数据
-        await self._cleanup_expired_data()
+        # 多进程部署：跟随其他进程的配置修改增删路由
+        if self.shared_state:
+            self._state_sync_task = asyncio.create_task(self._state_sync_loop())
+        
+        # 注册指标路由
+        if self.config.get('metrics_enabled'):
+            self.sdk.router.register_http_route(
+                module_name="GitHubWebhook",
+                path="/metrics",
+                handler=self._metrics_request_handler,
+                methods=["GET"]
+            )
+            self._metrics_route = True
+            self.logger.info("注册指标路由: /metrics")
+        
+        # 定期维护存储（启动后立即执行一轮）
+        self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+        
+        # 启动异步接收队列
+        if self.config.get('async_pipeline'):
+            self.ingress_queue = IngressQueue(
+                self._process_queued_delivery,
+                self.logger,
+                max_size=self.config['queue_max_size'],
+                workers=self.config['queue_workers'],
+            )
+            self.ingress_queue.start()
         
         self.logger.info("模块加载完成")
     
     async def on_unload(self, event):
         """模块卸载时调用"""
         self.logger.info("模块卸载中...")
+        
+        # 先注销路由，不再接收新的投递
+        self._unregister_all_routes()
+        
+        # 排空接收队列
+        if self.ingress_queue:
+            await self.ingress_queue.stop(self.config['queue_drain_timeout'])
+            self.ingress_queue = None
+        
+        # 发送合并窗口中剩余的通知
+        if self.coalescer:
+            await self.coalescer.flush_all()
+        
+        # 等待后台发送完成
+        if self._send_tasks:
+            await asyncio.wait(set(self._send_tasks), timeout=self.config['queue_drain_timeout'])
+        
+        # 停止存储维护
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        
+        # 停止共享配置同步
+        if self._state_sync_task:
+            self._state_sync_task.cancel()
+            self._state_sync_task = None
+        
+        # 保存去重缓存快照
+        if self._dedup_task:
+            self._dedup_task.cancel()
+            self._dedup_task = None
+        self._save_dedup_snapshot()
+        self.logger.info(f"去重缓存统计: {self.dedup.stats()}")
+        
+        # 写入尚未落盘的数据
+        await self.history.close()
+        self.storage.close()
+        if self.shared_state:
+            await self.shared_state.close()
+        
         self.logger.info("模块卸载完成")
     
     def _load_config(self):
@@ -89,14 +279,58 @@ class Main(BaseModule):
         # 设置默认值
         defaults = {
             'base_url': '',
-            'history_ttl': 7,  # 天
+            'history_ttl': 7,  # 天，0 表示不按时间清理
+            'maintenance_interval': 3600,  # 秒
+            'maintenance_slice_ms': 10,  # 每个时间片最长占用事件循环的时间
+            'storage_write_delay_ms': 1000,  # 写后缓冲的持久化窗口，0 表示直接写入
+            'storage_write_max_pending': 500,  # 待写入键数达到该值时立即落盘
+            'storage_journal': '',  # 崩溃保护日志路径，留空不启用
+            'storage_journal_fsync': False,
             'dedup_ttl': 3600,  # 秒（1小时）
+            'dedup_max_size': 10000,
+            'dedup_snapshot_interval': 60,  # 秒
+            'dedup_snapshot_max_changes': 200,  # 新增标记达到该数量时提前保存快照
             'error_ratelimit': 300,  # 秒（5分钟）
             'max_history_records': 100,
+            'history_store_payload': False,  # 是否保存原始事件数据
+            'history_backend': 'storage',  # storage | sqlite
+            'history_path': 'data/github_webhook_history.db',
+            'history_batch_size': 100,
+            'history_flush_ms': 500,
+            'replay_rate': 1,  # 每秒消息数
+            'replay_batch_size': 10,
+            'replay_max_records': 500,
+            'async_pipeline': False,  # 先确认后处理
+            'queue_max_size': 1000,
+            'queue_workers': 4,
+            'queue_drain_timeout': 10,  # 秒
+            'route_mode': 'per_config',  # per_config | dispatch
+            'payload_selective': False,  # 只保留需要的字段
+            'signature_offload_threshold': 262144,  # 字节，超过后在线程池中验证签名
+            'max_body_size': 26214400,  # 字节（25MB，GitHub 的上限），0 表示不限制
+            'coalesce_window': 0,  # 秒，0 表示不合并
+            'coalesce_max_events': 20,
+            'send_rate_platform': 0,  # 每秒消息数，0 表示不限流
+            'send_burst_platform': 20,
+            'send_rate_target': 0,  # 每秒消息数，0 表示不限流
+            'send_burst_target': 5,
+            'send_max_retries': 2,
+            'send_retry_base': 1,  # 秒
+            'send_retry_max': 30,  # 秒
+            'send_timeout': 10,  # 秒
+            'dead_letter_max': 100,
+            'background_send_limit': 200,  # 同步处理模式下同时进行的后台发送数
+            'shared_endpoints': False,  # 每个仓库一个共享入口
+            'fanout_concurrency': 8,
+            'metrics_enabled': False,  # 提供 /GitHubWebhook/metrics（无鉴权，默认关闭）
+            'slow_delivery_threshold': 2,  # 秒，0 表示不记录
+            'state_backend': 'local',  # local | sqlite（多进程共享去重、配置和限流）
+            'state_path': 'data/github_webhook_state.db',
+            'state_sync_interval': 2,  # 秒，检查其他进程配置修改的间隔
         }
         
         for key, value in defaults.items():
-            if key not in config or not config[key]:
+            if key not in config or config[key] is None:
                 config[key] = value
         
         return config
@@ -119,6 +353,10 @@ class Main(BaseModule):
         @command("ghw_history", help="查看 Webhook 接收历史")
         async def history_command(event):
             await self._handle_history_command(event)
+        
+        @command("ghw_replay", help="从历史记录重放事件通知")
+        async def replay_command(event):
+            await self._handle_replay_command(event)
     
     # ========== 命令处理器 ==========
     
@@ -193,10 +431,7 @@ class Main(BaseModule):
             
             # 检查 UUID 冲突
             for _ in range(3):  # 最多重试3次
-                configs = self.storage.get("github_webhook:configs", [])
-                uuid_exists = any(c.get('uuid') == uuid_short for c in configs)
-                
-                if uuid_exists:
+                if self.registry.exists(uuid_short):
                     uuid_short = generate_uuid_short(4)
                     webhook_path = f"/{target_id}_{uuid_short}"
                 else:
@@ -216,9 +451,7 @@ class Main(BaseModule):
             }
             
             # 保存配置
-            configs = self.storage.get("github_webhook:configs", [])
-            configs.append(config_data)
-            self.storage.set("github_webhook:configs", configs)
+            await self.registry.add(config_data)
             
             # 注册路由
             await self._register_route(config_data)
@@ -231,12 +464,17 @@ class Main(BaseModule):
             # 返回配置信息
             msg = "配置成功！\n\n"
             msg += f"Webhook URL: {webhook_url}\n\n"
+            if self._uses_repo_route(config_data):
+                msg += f"仓库共享 URL: {base_url}/GitHubWebhook/repo_{repo_endpoint_key(repo)}\n"
+                msg += "（同一仓库设置了 Secret 的监听可共用此 URL，只需在 GitHub 配置一次）\n\n"
+            elif self.config.get('shared_endpoints'):
+                msg += "未设置 Secret，不能使用仓库共享 URL\n\n"
             msg += "请在 GitHub 仓库设置中配置：\n"
             msg += "- Payload URL: 上面的 URL\n"
             msg += "- Content type: application/json\n"
             msg += f"- Secret: {'已设置' if webhook_secret else '（可选）'}\n"
             msg += f"- Events: {', '.join(events)}\n\n"
-            msg += "提示：使用 /ghw_list 查看所有配置"
+            msg += "提示：GitHub 创建 Webhook 后会发送 ping，使用 /ghw_list 可查看配置及是否已收到"
             
             await event.reply(msg)
             self.logger.info(f"添加 Webhook 配置: {repo} -> {target_id}")
@@ -254,11 +492,8 @@ class Main(BaseModule):
             else:
                 target_id = event.get_user_id()
             
-            # 获取所有配置
-            configs = self.storage.get("github_webhook:configs", [])
-            
-            # 筛选当前目标的配置
-            target_configs = [c for c in configs if c.get('target_id') == target_id]
+            # 获取当前目标的配置
+            target_configs = self.registry.by_target(target_id)
             
             if not target_configs:
                 await event.reply("当前还没有配置任何 Webhook 监听")
@@ -271,12 +506,17 @@ class Main(BaseModule):
                 repo = config.get('repo', 'unknown')
                 events = ', '.join(config.get('events', []))
                 enabled = '启用' if config.get('enabled') else '禁用'
+                verified = '已确认（收到 GitHub ping）' if config.get('verified') else '未确认（尚未收到 GitHub ping）'
                 webhook_path = f"/GitHubWebhook/{config['target_id']}_{config['uuid']}"
                 
                 msg += f"{i}. {repo}\n"
                 msg += f"   监听事件: {events}\n"
                 msg += f"   状态: {enabled}\n"
-                msg += f"   Webhook URL: {webhook_path}\n\n"
+                msg += f"   连通性: {verified}\n"
+                msg += f"   Webhook URL: {webhook_path}\n"
+                if self._uses_repo_route(config):
+                    msg += f"   仓库共享 URL: /GitHubWebhook/repo_{repo_endpoint_key(repo)}\n"
+                msg += "\n"
             
             await event.reply(msg)
             
@@ -293,11 +533,8 @@ class Main(BaseModule):
             else:
                 target_id = event.get_user_id()
             
-            # 获取所有配置
-            configs = self.storage.get("github_webhook:configs", [])
-            
-            # 筛选当前目标的配置
-            target_configs = [c for c in configs if c.get('target_id') == target_id]
+            # 获取当前目标的配置
+            target_configs = self.registry.by_target(target_id)
             
             if not target_configs:
                 await event.reply("当前还没有配置任何 Webhook 监听")
@@ -348,13 +585,12 @@ class Main(BaseModule):
                 return
             
             # 从配置列表中删除
-            configs = [c for c in configs if c != config_to_remove]
-            self.storage.set("github_webhook:configs", configs)
+            await self.registry.remove(config_to_remove['uuid'])
             
             # 注销路由
-            webhook_path = f"/GitHubWebhook/{config_to_remove['target_id']}_{config_to_remove['uuid']}"
-            if webhook_path in self.webhook_routes:
-                del self.webhook_routes[webhook_path]
+            await self._unregister_route(config_to_remove)
+            self._verifiers.pop(config_to_remove['uuid'], None)
+            self.storage.delete(f"{RATELIMIT_PREFIX}{config_to_remove['target_id']}_{config_to_remove['uuid']}")
             
             await event.reply("删除成功！")
             self.logger.info(f"删除 Webhook 配置: {repo}")
@@ -364,19 +600,28 @@ class Main(BaseModule):
             await event.reply("删除失败，请稍后重试")
     
     async def _handle_history_command(self, event):
-        """处理历史命令"""
+        """
+        处理历史命令
+        
+        用法: /ghw_history [事件类型] [actor=用户] [since=7d] [until=2026-01-31] [page=2]
+        """
         try:
+            # 解析筛选参数
+            try:
+                filters = parse_history_args(event.get_command_args())
+            except ValueError as e:
+                await event.reply(f"{e}\n\n用法: /ghw_history [事件类型] [actor=用户] [since=7d] [until=2026-01-31] [page=2]")
+                return
+            page = filters.pop('page')
+            
             # 获取目标信息
             if event.is_group_message():
                 target_id = event.get_group_id()
             else:
                 target_id = event.get_user_id()
             
-            # 获取所有配置
-            configs = self.storage.get("github_webhook:configs", [])
-            
-            # 筛选当前目标的配置
-            target_configs = [c for c in configs if c.get('target_id') == target_id]
+            # 获取当前目标的配置
+            target_configs = self.registry.by_target(target_id)
             
             if not target_configs:
                 await event.reply("当前还没有配置任何 Webhook 监听")
@@ -413,26 +658,28 @@ class Main(BaseModule):
             config = target_configs[index - 1]
             repo = config.get('repo', 'unknown')
             
-            # 获取历史记录
-            history_key = f"github_webhook:history:{target_id}"
-            all_history = self.storage.get(history_key, {})
-            repo_history = all_history.get(repo, [])
+            # 只读取当前页（多取一条判断是否还有下一页，最新的在前）
+            records = await self.history.query(
+                target_id, repo, **filters, limit=PAGE_SIZE + 1, offset=(page - 1) * PAGE_SIZE
+            )
+            has_more = len(records) > PAGE_SIZE
+            records = records[:PAGE_SIZE]
             
-            if not repo_history:
-                await event.reply(f"{repo} 暂无历史记录")
+            if not records:
+                await event.reply(f"{repo} 暂无{'符合条件的' if any(filters.values()) or page > 1 else ''}历史记录")
                 return
             
-            # 显示最近10条记录
-            recent_history = repo_history[-10:]
-            recent_history.reverse()  # 最新的在前
-            
-            msg = f"{repo} 的最近 {len(recent_history)} 条历史记录：\n\n"
+            msg = f"{repo} 的历史记录（第 {page} 页，{len(records)} 条）：\n\n"
             
-            for record in recent_history:
+            for record in records:
                 event_type = record.get('event_type', 'unknown')
                 timestamp = record.get('timestamp', 0)
                 time_str = format_timestamp(timestamp)
-                msg += f"{time_str} | {event_type}\n"
+                actor = record.get('summary', {}).get('actor')
+                msg += f"{time_str} | {event_type}{f' | {actor}' if actor else ''}\n"
+            
+            if has_more:
+                msg += f"\n还有更多记录，发送命令时加上 page={page + 1} 查看下一页"
             
             await event.reply(msg)
             
@@ -440,22 +687,207 @@ class Main(BaseModule):
             self.logger.error(f"历史命令失败: {e}", exc_info=True)
             await event.reply("获取历史失败，请稍后重试")
     
+    async def _handle_replay_command(self, event):
+        """
+        处理重放命令
+        
+        用法: /ghw_replay since=2h [until=...] [事件类型] [actor=用户] [delivery=ID,ID] [dry]
+        """
+        usage = "用法: /ghw_replay since=2h [until=2026-01-31T08:00] [事件类型] [actor=用户] [delivery=投递ID,投递ID] [dry]"
+        try:
+            if not self.config.get('history_store_payload'):
+                await event.reply("未开启 history_store_payload，历史记录中没有原始事件数据，无法重放")
+                return
+            
+            # 解析参数
+            try:
+                filters = parse_replay_args(event.get_command_args())
+            except ValueError as e:
+                await event.reply(f"{e}\n\n{usage}")
+                return
+            dry_run = filters.pop('dry_run')
+            
+            # 获取目标信息
+            if event.is_group_message():
+                target_id = event.get_group_id()
+            else:
+                target_id = event.get_user_id()
+            
+            target_configs = self.registry.by_target(target_id)
+            if not target_configs:
+                await event.reply("当前还没有配置任何 Webhook 监听")
+                return
+            
+            msg = f"当前共有 {len(target_configs)} 个监听配置：\n\n"
+            for i, config in enumerate(target_configs, 1):
+                msg += f"{i}. {config.get('repo', 'unknown')}\n"
+            msg += "\n请选择要重放的仓库（输入 0 取消）"
+            await event.reply(msg)
+            
+            reply = await event.wait_reply(timeout=60)
+            if not reply:
+                await event.reply("操作超时")
+                return
+            
+            try:
+                index = int(reply.get_text().strip())
+                if index == 0:
+                    await event.reply("已取消操作")
+                    return
+                
+                if index < 1 or index > len(target_configs):
+                    await event.reply("无效的序号")
+                    return
+            except ValueError:
+                await event.reply("请输入有效的序号")
+                return
+            
+            config = target_configs[index - 1]
+            repo = config.get('repo', 'unknown')
+            
+            # 选出记录
+            try:
+                records = await self.replayer.select(target_id, repo, **filters)
+            except ValueError as e:
+                await event.reply(str(e))
+                return
+            
+            if not records:
+                await event.reply(f"{repo} 没有符合条件的历史记录")
+                return
+            
+            # dry run：只渲染，回复预览
+            if dry_run:
+                result = await self.replay(config, records=records, dry_run=True)
+                msg = f"dry run：{repo} 共 {len(records)} 条记录，可重放 {len(result['messages'])} 条，跳过 {result['skipped']} 条\n"
+                for message in result['messages'][:PREVIEW_COUNT]:
+                    msg += f"\n{message}\n"
+                await event.reply(msg)
+                return
+            
+            # 确认
+            await event.reply(
+                f"将重放 {repo} 的 {len(records)} 条记录到当前会话（每秒约 {self.config['replay_rate']} 条），"
+                f"确认请回复 y"
+            )
+            confirm_reply = await event.wait_reply(timeout=60)
+            if not confirm_reply or confirm_reply.get_text().strip().lower() not in ('y', 'yes', '是'):
+                await event.reply("已取消操作")
+                return
+            
+            result = await self.replay(config, records=records)
+            await event.reply(
+                f"重放完成：发送 {result['sent']} 条，失败 {result['failed']} 条，"
+                f"跳过 {result['skipped']} 条（缺少原始数据或无法渲染）"
+            )
+            
+        except Exception as e:
+            self.logger.error(f"重放命令失败: {e}", exc_info=True)
+            await event.reply("重放失败，请稍后重试")
+    
+    async def replay(self, config, since=None, until=None, delivery_ids=None, event_type=None, dry_run=False, records=None):
+        """
+        从历史记录重放事件（内部 API）
+        
+        重新渲染并按 replay_rate 分批发送给订阅的目标，跳过去重，不再写入历史
+        
+        Args:
+            config: 订阅配置
+            since: 起始时间戳
+            until: 截止时间戳
+            delivery_ids: 投递 ID 列表（与时间范围至少指定一个）
+            event_type: 事件类型
+            dry_run: 只渲染不发送
+            records: 已选出的记录，指定时忽略筛选条件
+        
+        Returns:
+            dict: sent、failed、skipped、messages（dry run 时的渲染结果）
+        
+        Raises:
+            ValueError: 未指定筛选条件，或匹配的记录超过 replay_max_records
+        """
+        if records is None:
+            if since is None and delivery_ids is None:
+                raise ValueError("请指定时间范围或投递 ID")
+            records = await self.replayer.select(
+                config['target_id'],
+                config.get('repo', 'unknown'),
+                event_type=event_type,
+                since=since,
+                until=until,
+                delivery_ids=delivery_ids,
+            )
+        
+        return await self.replayer.replay(config, records, dry_run=dry_run)
+    
     # ========== 路由管理 ==========
     
     async def _restore_routes(self):
         """从存储恢复所有路由"""
-        configs = self.storage.get("github_webhook:configs", [])
+        # 分发模式下只注册一个总路由
+        if self.config['route_mode'] == 'dispatch':
+            self.sdk.router.register_http_route(
+                module_name="GitHubWebhook",
+                path="/{key}",
+                handler=self._dispatch_request_handler,
+                methods=["POST"]
+            )
+            self._dispatch_route = True
+            self.logger.info("注册分发路由: /{key}")
         
-        for config in configs:
+        for config in self.registry.all():
             if config.get('enabled'):
                 await self._register_route(config)
         
         self.logger.info(f"已恢复 {len(self.webhook_routes)} 个路由")
     
+    def _unregister_all_routes(self):
+        """注销本模块注册的全部路由（重新加载模块时才能再次注册）"""
+        if self.config['route_mode'] == 'dispatch':
+            if self._dispatch_route:
+                self.sdk.router.unregister_http_route("GitHubWebhook", "/{key}")
+                self._dispatch_route = False
+        else:
+            for path in list(self.webhook_routes) + list(self.repo_routes):
+                self.sdk.router.unregister_http_route("GitHubWebhook", path)
+        
+        if self._metrics_route:
+            self.sdk.router.unregister_http_route("GitHubWebhook", "/metrics")
+            self._metrics_route = False
+        
+        self.logger.info(f"已注销 {len(self.webhook_routes)} 个路由和 {len(self.repo_routes)} 个仓库共享入口")
+        self.webhook_routes = {}
+        self.repo_routes = {}
+    
+    async def _sync_routes(self):
+        """按注册表增删路由（配置被删除、停用或修改的路由重新注册）"""
+        wanted = {
+            f"/{config['target_id']}_{config['uuid']}": config
+            for config in self.registry.all()
+            if config.get('enabled')
+        }
+        
+        for path, config in list(self.webhook_routes.items()):
+            if wanted.get(path) != config:
+                await self._unregister_route(config)
+        
+        for path, config in wanted.items():
+            if path not in self.webhook_routes:
+                await self._register_route(config)
+    
     async def _register_route(self, config):
         """注册单个路由"""
         webhook_path = f"/{config['target_id']}_{config['uuid']}"
         
+        if self._uses_repo_route(config):
+            await self._register_repo_route(config['repo'])
+        
+        # 分发模式只需登记到路由表
+        if self.config['route_mode'] == 'dispatch':
+            self.webhook_routes[webhook_path] = config
+            self.logger.debug(f"登记路由: {webhook_path}")
+            return
+        
         # 创建处理器
         async def webhook_handler(request: Request) -> Dict[str, Any]:
             return await self._webhook_request_handler(request, config)
@@ -471,100 +903,567 @@ class Main(BaseModule):
         self.webhook_routes[webhook_path] = config
         self.logger.info(f"注册路由: {webhook_path}")
     
+    def _uses_repo_route(self, config):
+        """
+        订阅是否接收仓库共享入口的投递
+        
+        共享入口的路径由仓库名推算，任何人都能构造；只有设置了 Secret 的订阅使用，
+        未设置 Secret 的订阅只能使用带随机配置 ID 的独立 URL
+        """
+        return bool(self.config.get('shared_endpoints') and config.get('enabled') and config.get('webhook_secret'))
+    
+    async def _register_repo_route(self, repo):
+        """注册仓库共享入口"""
+        repo_path = f"/repo_{repo_endpoint_key(repo)}"
+        if repo_path in self.repo_routes:
+            return
+        
+        if self.config['route_mode'] != 'dispatch':
+            async def repo_handler(request: Request) -> Dict[str, Any]:
+                return await self._repo_request_handler(request, repo)
+            
+            self.sdk.router.register_http_route(
+                module_name="GitHubWebhook",
+                path=repo_path,
+                handler=repo_handler,
+                methods=["POST"]
+            )
+        
+        self.repo_routes[repo_path] = repo
+        self.logger.info(f"注册仓库共享入口: {repo_path} ({repo})")
+    
+    async def _unregister_route(self, config):
+        """注销单个路由"""
+        webhook_path = f"/{config['target_id']}_{config['uuid']}"
+        if self.webhook_routes.pop(webhook_path, None) is None:
+            return
+        
+        if self.config['route_mode'] != 'dispatch':
+            self.sdk.router.unregister_http_route("GitHubWebhook", webhook_path)
+        
+        self.logger.info(f"注销路由: {webhook_path}")
+        
+        # 仓库已无使用共享入口的订阅时注销
+        repo = config['repo']
+        if any(self._uses_repo_route(c) for c in self.registry.by_repo(repo)):
+            return
+        
+        repo_path = f"/repo_{repo_endpoint_key(repo)}"
+        if self.repo_routes.pop(repo_path, None) is None:
+            return
+        
+        if self.config['route_mode'] != 'dispatch':
+            self.sdk.router.unregister_http_route("GitHubWebhook", repo_path)
+        
+        self.logger.info(f"注销仓库共享入口: {repo_path} ({repo})")
+    
+    async def _dispatch_request_handler(self, request: Request):
+        """分发模式总路由：按路径查找配置"""
+        path = f"/{request.path_params.get('key', '')}"
+        
+        config = self.webhook_routes.get(path)
+        if config:
+            return await self._webhook_request_handler(request, config)
+        
+        repo = self.repo_routes.get(path)
+        if repo:
+            return await self._repo_request_handler(request, repo)
+        
+        return JSONResponse(
+            status_code=404,
+            content={'status': 'error', 'message': 'Unknown webhook'}
+        )
+    
+    def _event_label(self, event_type):
+        """指标中的事件类型标签（未知类型归为 other，避免请求头取值无限增长）"""
+        return event_type if event_type in self.event_handlers or event_type == 'ping' else 'other'
+    
+    async def _metrics_request_handler(self, request: Request):
+        """导出指标（文本格式）"""
+        return Response(content=self.metrics.expose(), media_type=self.metrics.CONTENT_TYPE)
+    
     async def _webhook_request_handler(self, request, config):
         """处理 Webhook 请求"""
+        # 获取事件类型和投递 ID
+        event_type = request.headers.get('X-GitHub-Event', '')
+        delivery_id = request.headers.get('X-GitHub-Delivery', '')
+        timer = StageTimer(delivery_id, self.metrics.stage_seconds)
+        queued = False
+        
         try:
-            # 获取请求体
-            body = await request.body()
+            self.metrics.deliveries.inc(repo=config['repo'], event=self._event_label(event_type))
             
-            # 获取事件类型
-            event_type = request.headers.get('X-GitHub-Event', '')
+            # 读取请求体前先按请求头分类：ping 确认订阅，未订阅的事件直接返回 204
+            kind = classify_event(event_type, config.get('events', []))
+            if kind == 'ping':
+                return await self._handle_ping(request, config['repo'], [config])
+            if kind == 'unsubscribed':
+                return self._ignore_unsubscribed(config['repo'], event_type)
             
-            # 验证签名
+            if content_length_exceeds(request.headers, self.config['max_body_size']):
+                return self._reject_too_large(config['repo'])
+            
+            # 读取请求体前先检查签名头
+            signature = None
             if config.get('webhook_secret'):
-                signature = request.headers.get('X-Hub-Signature-256', '')
-                if not verify_signature(body, signature, config['webhook_secret']):
+                signature = parse_signature_headers(request.headers)
+                if signature is None:
+                    self.logger.warning(f"缺少签名或格式错误: {config['repo']}")
+                    self.metrics.signature_failures.inc(repo=config['repo'])
+                    return {'status': 'error', 'message': 'Invalid signature'}
+            
+            # 按投递 ID 识别重新投递，无需读取请求体
+            with timer.stage('dedup'):
+                duplicate = delivery_id and await self.dedup.contains(f"{config['uuid']}:{get_delivery_key(delivery_id)}")
+            if duplicate:
+                self.logger.debug(f"重复投递（去重）: {delivery_id}")
+                self.metrics.dedup_hits.inc(stage='delivery')
+                return {'status': 'ok'}
+            
+            # 获取请求体（超过上限时立即停止读取）
+            with timer.stage('body_read'):
+                body = await read_body(request, self.config['max_body_size'])
+            
+            # 验证签名
+            if signature:
+                with timer.stage('signature'):
+                    valid = await self._verify_signature(config, body, *signature)
+                if not valid:
                     self.logger.warning(f"签名验证失败: {config['repo']}")
+                    self.metrics.signature_failures.inc(repo=config['repo'])
                     return {'status': 'error', 'message': 'Invalid signature'}
             
+            # 异步模式：入队后立即确认
+            if self.ingress_queue:
+                if not self.ingress_queue.submit(([config], event_type, body, delivery_id, timer, time.perf_counter())):
+                    self.logger.warning(f"接收队列已满，拒绝投递: {config['repo']}（投递 ID: {delivery_id}，需手动重新投递）")
+                    return JSONResponse(
+                        status_code=503,
+                        content={'status': 'error', 'message': 'Queue full'}
+                    )
+                queued = True
+                return JSONResponse(status_code=202, content={'status': 'accepted'})
+            
             # 解析 JSON
-            event_data = json.loads(body.decode('utf-8'))
+            with timer.stage('decode'):
+                event_data = decode_payload(body, self.payload_fields.get(event_type))
             
             # 处理事件
-            await self._process_webhook_event(config, event_type, event_data)
+            await self._process_webhook_event(config, event_type, event_data, delivery_id, timer)
             
             return {'status': 'ok'}
             
+        except PayloadTooLarge:
+            return self._reject_too_large(config['repo'])
         except json.JSONDecodeError as e:
             self.logger.error(f"JSON 解析失败: {e}")
+            self.metrics.json_failures.inc()
             return {'status': 'error', 'message': 'Invalid JSON'}
         except Exception as e:
             self.logger.error(f"处理 Webhook 请求失败: {e}", exc_info=True)
             await self._send_error_notification(config, str(e))
             return {'status': 'error', 'message': 'Internal error'}
+        finally:
+            # 入队的投递由工作协程处理完后再记录
+            if not queued:
+                self._log_slow_delivery(timer, config['repo'], event_type)
+    
+    async def _repo_request_handler(self, request, repo):
+        """
+        处理仓库共享入口的 Webhook 请求（一次解析，分发给所有订阅）
+        
+        共享入口的路径可由仓库名推算，只分发给设置了 Secret 的订阅，投递必须带有效签名
+        """
+        event_type = request.headers.get('X-GitHub-Event', '')
+        delivery_id = request.headers.get('X-GitHub-Delivery', '')
+        timer = StageTimer(delivery_id, self.metrics.stage_seconds)
+        queued = False
+        
+        try:
+            self.metrics.deliveries.inc(repo=repo, event=self._event_label(event_type))
+            
+            # 读取请求体前先按请求头分类（任一订阅监听该事件即处理）
+            enabled = [c for c in self.registry.by_repo(repo) if self._uses_repo_route(c)]
+            kind = classify_event(event_type, {e for c in enabled for e in c.get('events', [])})
+            if kind == 'ping':
+                return await self._handle_ping(request, repo, enabled)
+            if kind == 'unsubscribed':
+                return self._ignore_unsubscribed(repo, event_type)
+            
+            # 订阅了该事件且未处理过本次投递的配置
+            delivery_key = get_delivery_key(delivery_id) if delivery_id else None
+            configs = [c for c in enabled if event_type in c.get('events', [])]
+            
+            if content_length_exceeds(request.headers, self.config['max_body_size']):
+                return self._reject_too_large(repo)
+            
+            # 读取请求体前先检查签名头
+            signature = parse_signature_headers(request.headers)
+            if signature is None:
+                self.logger.warning(f"缺少签名或格式错误: {repo}")
+                self.metrics.signature_failures.inc(repo=repo)
+                return {'status': 'error', 'message': 'Invalid signature'}
+            
+            if delivery_key:
+                with timer.stage('dedup'):
+                    pending = [c for c in configs if not await self.dedup.contains(f"{c['uuid']}:{delivery_key}")]
+                if len(pending) < len(configs):
+                    self.metrics.dedup_hits.inc(len(configs) - len(pending), stage='delivery')
+                configs = pending
+            if not configs:
+                return {'status': 'ok'}
+            
+            with timer.stage('body_read'):
+                body = await read_body(request, self.config['max_body_size'])
+            
+            # 按密钥验证签名，相同密钥只计算一次
+            verified = {}
+            accepted = []
+            for config in configs:
+                secret = config['webhook_secret']
+                if secret not in verified:
+                    with timer.stage('signature'):
+                        verified[secret] = await self._verify_signature(config, body, *signature)
+                if verified[secret]:
+                    accepted.append(config)
+            
+            if not accepted:
+                self.logger.warning(f"签名验证失败: {repo}")
+                self.metrics.signature_failures.inc(repo=repo)
+                return {'status': 'error', 'message': 'Invalid signature'}
+            
+            # 异步模式：入队后立即确认
+            if self.ingress_queue:
+                if not self.ingress_queue.submit((accepted, event_type, body, delivery_id, timer, time.perf_counter())):
+                    self.logger.warning(f"接收队列已满，拒绝投递: {repo}（投递 ID: {delivery_id}，需手动重新投递）")
+                    return JSONResponse(
+                        status_code=503,
+                        content={'status': 'error', 'message': 'Queue full'}
+                    )
+                queued = True
+                return JSONResponse(status_code=202, content={'status': 'accepted'})
+            
+            with timer.stage('decode'):
+                event_data = decode_payload(body, self.payload_fields.get(event_type))
+            await self._fan_out(accepted, event_type, event_data, delivery_id, timer)
+            
+            return {'status': 'ok'}
+            
+        except PayloadTooLarge:
+            return self._reject_too_large(repo)
+        except json.JSONDecodeError as e:
+            self.logger.error(f"JSON 解析失败: {e}")
+            self.metrics.json_failures.inc()
+            return {'status': 'error', 'message': 'Invalid JSON'}
+        except Exception as e:
+            self.logger.error(f"处理仓库共享入口请求失败: {e}", exc_info=True)
+            return {'status': 'error', 'message': 'Internal error'}
+        finally:
+            if not queued:
+                self._log_slow_delivery(timer, repo, event_type)
+    
+    async def _handle_ping(self, request, repo, configs):
+        """
+        处理 ping：验证签名后将订阅标记为已确认
+        
+        Args:
+            request: 请求对象
+            repo: 仓库名称
+            configs: 该入口对应的订阅配置
+        
+        Returns:
+            dict: 确认信息（仓库、订阅和监听的事件）
+        """
+        body = await read_body(request, self.config['max_body_size'])
+        signature = parse_signature_headers(request.headers)
+        
+        verified = []
+        for config in configs:
+            if config.get('webhook_secret'):
+                if signature is None or not await self._verify_signature(config, body, *signature):
+                    continue
+            verified.append(config)
+        
+        if not verified:
+            self.logger.warning(f"ping 签名验证失败: {repo}")
+            self.metrics.signature_failures.inc(repo=repo)
+            return {'status': 'error', 'message': 'Invalid signature'}
+        
+        ping = decode_payload(body)
+        hook_id = ping.get('hook_id') if isinstance(ping, dict) else None
+        for config in verified:
+            if not config.get('verified') or config.get('hook_id') != hook_id:
+                await self.registry.update(config['uuid'], verified=True, verified_at=int(time.time()), hook_id=hook_id)
+                self.logger.info(f"收到 ping，订阅已确认: {repo} ({config['target_id']}_{config['uuid']})")
+        
+        return {
+            'status': 'ok',
+            'message': 'pong',
+            'repo': repo,
+            'subscriptions': [f"{c['target_id']}_{c['uuid']}" for c in verified],
+            'events': sorted({e for c in verified for e in c.get('events', [])}),
+        }
+    
+    def _ignore_unsubscribed(self, repo, event_type):
+        """忽略未订阅的事件（不读取请求体）"""
+        self.logger.debug(f"未订阅的事件（忽略）: {repo} {event_type}")
+        self.metrics.rejected.inc(reason='unsubscribed')
+        return Response(status_code=204)
+    
+    def _reject_too_large(self, repo):
+        """拒绝超过大小上限的请求体"""
+        self.logger.warning(f"请求体超过上限 {self.config['max_body_size']} 字节，拒绝投递: {repo}")
+        self.metrics.rejected.inc(reason='too_large')
+        return JSONResponse(
+            status_code=413,
+            content={'status': 'error', 'message': 'Payload too large'}
+        )
+    
+    async def _fan_out(self, configs, event_type, event_data, delivery_id=None, timer=None):
+        """将同一次投递并发分发给多个订阅（使用相同模板的订阅只渲染一次）"""
+        semaphore = asyncio.Semaphore(self.config['fanout_concurrency'])
+        rendered = {}  # 模板名 -> 消息
+        
+        async def deliver(config):
+            async with semaphore:
+                try:
+                    await self._process_webhook_event(config, event_type, event_data, delivery_id, timer, rendered)
+                except Exception as e:
+                    await self._send_error_notification(config, str(e))
+        
+        await asyncio.gather(*(deliver(config) for config in configs))
+    
+    async def _verify_signature(self, config, body, algorithm, digest):
+        """验证请求签名，大请求体在线程池中计算"""
+        cached = self._verifiers.get(config['uuid'])
+        if cached is None or cached.secret != config['webhook_secret']:
+            cached = SignatureVerifier(config['webhook_secret'])
+            self._verifiers[config['uuid']] = cached
+        
+        if len(body) >= self.config['signature_offload_threshold']:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, cached.verify, body, algorithm, digest)
+        
+        return cached.verify(body, algorithm, digest)
+    
+    async def _process_queued_delivery(self, job):
+        """处理接收队列中的投递"""
+        configs, event_type, body, delivery_id, timer, enqueued_at = job
+        timer.add('queue_wait', time.perf_counter() - enqueued_at)
+        
+        try:
+            with timer.stage('decode'):
+                event_data = decode_payload(body, self.payload_fields.get(event_type))
+            
+            await self._fan_out(configs, event_type, event_data, delivery_id, timer)
+            
+        except json.JSONDecodeError as e:
+            self.logger.error(f"JSON 解析失败: {e}")
+            self.metrics.json_failures.inc()
+        finally:
+            self._log_slow_delivery(timer, configs[0]['repo'], event_type)
     
-    async def _process_webhook_event(self, config, event_type, event_data):
-        """处理 Webhook 事件"""
+    async def _process_webhook_event(self, config, event_type, event_data, delivery_id=None, timer=None, rendered=None):
+        """
+        处理 Webhook 事件
+        
+        Args:
+            config: 订阅配置
+            event_type: 事件类型
+            event_data: 事件数据
+            delivery_id: GitHub 投递 ID
+            timer: 本次投递的分阶段计时
+            rendered: 本次投递已渲染的消息 {模板名: 消息}，分发给多个订阅时共用
+        """
+        if timer is None:
+            timer = StageTimer(delivery_id)
+        
         try:
             # 检查事件类型是否在监听列表中
             events = config.get('events', [])
             if event_type not in events:
                 return
             
+            # 过滤规则（在去重、历史和格式化之前丢弃不需要的事件）
+            event_filter = self.filters.get(self._subscription_key(config))
+            if event_filter and not event_filter.allows(event_type, event_data):
+                self.logger.debug(f"事件被过滤规则丢弃: {config.get('repo')} {event_type}")
+                self.metrics.filtered.inc(event=self._event_label(event_type))
+                return
+            
             # 检查是否去重
             repo = config.get('repo', 'unknown')
-            event_key = get_event_key(repo, event_type, event_data)
-            
-            if event_key:
-                dedup_key = f"github_webhook:dedup:{event_key}"
-                if self.storage.get(dedup_key):
-                    self.logger.debug(f"事件已处理（去重）: {event_key}")
-                    return
-                
-                # 标记已处理
-                self.storage.set(dedup_key, True)
+            handler = self.event_handlers.get(event_type)
+            event_key = get_event_key(
+                repo,
+                event_type,
+                event_data,
+                delivery_id,
+                handler.event_key if handler else None,
+            )
+            
+            # 去重键按订阅区分，同一事件分发给多个订阅时互不影响
+            with timer.stage('dedup'):
+                duplicate = event_key and await self.dedup.check_and_add(f"{config['uuid']}:{event_key}")
+            if self.dedup.changes >= self.config['dedup_snapshot_max_changes']:
+                self._save_dedup_snapshot()
+            if duplicate:
+                self.logger.debug(f"事件已处理（去重）: {event_key}")
+                self.metrics.dedup_hits.inc(stage='event')
+                return
             
             # 保存历史
-            await self._save_history(config, event_type, event_data)
+            with timer.stage('history'):
+                await self._save_history(config, event_type, event_data, delivery_id)
             
             # 格式化消息
-            handler = self.event_handlers.get(event_type)
             if not handler:
                 self.logger.warning(f"未知事件类型: {event_type}")
                 return
             
-            message = handler.format_message(event_data)
+            # 同一次投递按相同模板只渲染一次（分发给多个订阅时复用）
+            style = self._template_name(config)
+            
+            with timer.stage('format'):
+                message = rendered.get(style) if rendered is not None else None
+                if message is None:
+                    with self.metrics.render_seconds.time(event=event_type):
+                        message = self._format_message(config, event_type, event_data)
+                    if rendered is not None:
+                        rendered[style] = message
             
-            # 直接发送消息
             platform = config.get('platform')
             target_id = config.get('target_id')
             target_type = config.get('target_type')
             
-            adapter = self.sdk.adapter.get(platform)
-            if adapter:
-                await adapter.Send.To(target_type, target_id).Text(message)
-            else:
-                self.logger.error(f"未找到适配器: {platform}")
+            # 合并窗口内的通知稍后一起发送
+            if self.coalescer:
+                self.coalescer.add(
+                    (platform, target_type, target_id), event_type, event_data, message,
+                    self.templates.get(style, 'workflow_run_summary'),
+                )
+                self.logger.info(f"加入 {event_type} 事件合并窗口: {repo}")
+                return
             
-            self.logger.info(f"发送 {event_type} 事件通知: {repo}")
+            # 直接发送消息（发送失败由发送器重试并记入死信，不视为处理失败）
+            await self._notify(platform, target_type, target_id, message, f"发送 {event_type} 事件通知: {repo}", timer)
             
         except Exception as e:
             self.logger.error(f"处理事件失败: {e}", exc_info=True)
             raise
     
+    def _log_slow_delivery(self, timer, repo, event_type):
+        """
+        投递总耗时超过阈值时记录各阶段耗时
+        
+        Args:
+            timer: 本次投递的分阶段计时
+            repo: 仓库名称
+            event_type: 事件类型
+        """
+        threshold = self.config['slow_delivery_threshold']
+        if not threshold or timer.elapsed < threshold:
+            return
+        
+        record = timer.record(repo=repo, event_type=event_type)
+        self.logger.warning(f"慢投递: {json.dumps(record, ensure_ascii=False)}")
+    
+    def _format_message(self, config, event_type, event_data):
+        """
+        按订阅绑定的模板渲染消息
+        
+        Args:
+            config: 订阅配置
+            event_type: 事件类型
+            event_data: 事件数据
+        
+        Returns:
+            str: 消息文本，未知事件类型返回 None
+        """
+        handler = self.event_handlers.get(event_type)
+        if not handler:
+            return None
+        return handler.format_message(event_data, self.templates.get(self._template_name(config), event_type))
+    
+    def _subscription_key(self, config):
+        """订阅在 [GitHubWebhook.subscriptions] 中的键：<群组/用户ID>_<配置ID>"""
+        return f"{config.get('target_id')}_{config.get('uuid')}"
+    
+    def _template_name(self, config):
+        """
+        获取订阅绑定的模板名
+        
+        Args:
+            config: Webhook 配置
+        
+        Returns:
+            str: 模板名，未绑定时为 default
+        """
+        subscription = self.config.get('subscriptions', {}).get(self._subscription_key(config), {})
+        return subscription.get('template') or config.get('template') or 'default'
+    
+    async def _send_message(self, platform, target_type, target_id, message):
+        """通过发送器发送消息，返回是否成功"""
+        return await self.dispatcher.send(platform, target_type, target_id, message)
+    
+    async def _notify(self, platform, target_type, target_id, message, success_log=None, timer=None):
+        """
+        发送事件或错误通知
+        
+        同步处理模式（未开启 async_pipeline）下在后台任务中发送，不在 GitHub 的请求中等待：
+        发送器的超时、重试和退避加起来可能超过 GitHub 的 10 秒投递超时。
+        后台发送数达到 background_send_limit 时不再发送，消息直接放入死信列表；
+        后台发送的耗时只计入 ghw_send_seconds，不计入投递的 send 阶段
+        
+        Args:
+            platform: 平台名称
+            target_type: 目标类型
+            target_id: 目标 ID
+            message: 消息内容
+            success_log: 发送成功时记录的日志
+            timer: 本次投递的分阶段计时（在请求中等待发送时记录 send 阶段）
+        """
+        if self.ingress_queue is not None:
+            with timer.stage('send') if timer else nullcontext():
+                await self._send_and_log(platform, target_type, target_id, message, success_log)
+            return
+        
+        if len(self._send_tasks) >= self.config['background_send_limit']:
+            self.metrics.send_errors.inc(platform=platform, reason='overflow')
+            self.dispatcher.dead_letter(platform, target_type, target_id, message, "background send limit reached")
+            return
+        
+        task = asyncio.create_task(self._send_and_log(platform, target_type, target_id, message, success_log))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+    
+    async def _send_and_log(self, platform, target_type, target_id, message, success_log):
+        """发送消息，成功时记录日志"""
+        try:
+            if await self._send_message(platform, target_type, target_id, message) and success_log:
+                self.logger.info(success_log)
+        except Exception as e:
+            self.logger.error(f"发送通知失败: {e}", exc_info=True)
+    
     async def _send_error_notification(self, config, error):
         """发送错误通知"""
         try:
-            # 检查限流
-            ratelimit_key = f"github_webhook:error_ratelimit:{config['target_id']}_{config['uuid']}"
-            last_error_time = self.storage.get(ratelimit_key, 0)
-            
-            current_time = int(time.time())
-            if current_time - last_error_time < self.config['error_ratelimit']:
-                return  # 在限流时间内，不发送
-            
-            # 更新限流时间
-            self.storage.set(ratelimit_key, current_time)
+            # 检查限流（加锁保证并发的错误只有一个通过）
+            ratelimit_key = f"{RATELIMIT_PREFIX}{config['target_id']}_{config['uuid']}"
+            if self.shared_state:
+                # 多进程共享限流：同一限流期内只有一个进程标记成功
+                if not await self.shared_state.mark(ratelimit_key, self.config['error_ratelimit']):
+                    return
+            else:
+                async with self.storage.lock(ratelimit_key):
+                    last_error_time = self.storage.get(ratelimit_key, 0)
+                    
+                    current_time = int(time.time())
+                    if current_time - last_error_time < self.config['error_ratelimit']:
+                        return  # 在限流时间内，不发送
+                    
+                    # 更新限流时间
+                    self.storage.set(ratelimit_key, current_time)
             
             # 构建错误消息
             error_message = f"警告：GitHub Webhook 处理失败\n\n"
@@ -572,61 +1471,67 @@ class Main(BaseModule):
             error_message += f"错误: {error}\n\n"
             error_message += "请检查配置或联系管理员"
             
-            # 直接发送错误通知
-            platform = config.get('platform')
-            target_id = config.get('target_id')
-            target_type = config.get('target_type')
-            
-            adapter = self.sdk.adapter.get(platform)
-            if adapter:
-                await adapter.Send.To(target_type, target_id).Text(error_message)
-            else:
-                self.logger.error(f"未找到适配器: {platform}")
+            # 发送错误通知
+            await self._notify(
+                config.get('platform'),
+                config.get('target_type'),
+                config.get('target_id'),
+                error_message,
+            )
             
         except Exception as e:
             self.logger.error(f"发送错误通知失败: {e}")
     
-    async def _save_history(self, config, event_type, event_data):
+    async def _save_history(self, config, event_type, event_data, delivery_id=None):
         """保存历史记录"""
         try:
-            history_key = f"github_webhook:history:{config['target_id']}"
-            all_history = self.storage.get(history_key, {})
-            repo = config.get('repo', 'unknown')
-            repo_history = all_history.get(repo, [])
-            
-            # 添加新记录
-            record = {
-                'event_type': event_type,
-                'timestamp': int(time.time()),
-                'data': event_data,
-            }
-            repo_history.append(record)
-            
-            # 限制记录数量
-            max_records = self.config.get('max_history_records', 100)
-            if len(repo_history) > max_records:
-                repo_history = repo_history[-max_records:]
-            
-            # 保存
-            all_history[repo] = repo_history
-            self.storage.set(history_key, all_history)
+            self.history.append(
+                config['target_id'],
+                config.get('repo', 'unknown'),
+                event_type,
+                event_data,
+                delivery_id,
+            )
             
         except Exception as e:
             self.logger.error(f"保存历史失败: {e}")
     
-    async def _cleanup_expired_data(self):
-        """清理过期数据"""
-        try:
-            current_time = int(time.time())
-            dedup_ttl = self.config.get('dedup_ttl', 3600)
-            
-            # 清理去重集合中的过期数据
-            dedup_key = f"github_webhook:dedup"
-            dedup_set = self.storage.get(dedup_key, [])
-            dedup_set = [item for item in dedup_set if current_time - item['timestamp'] <= dedup_ttl]
-            self.storage.set(dedup_key, dedup_set)
-            
-            self.logger.info("过期数据清理完成")
+    async def _maintenance_loop(self):
+        """定期执行存储维护"""
+        while True:
+            try:
+                await self.maintenance.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"存储维护失败: {e}", exc_info=True)
             
+            await asyncio.sleep(self.config['maintenance_interval'])
+    
+    async def _state_sync_loop(self):
+        """定期检查共享配置版本，其他进程修改配置后重新加载并同步路由"""
+        while True:
+            await asyncio.sleep(self.config['state_sync_interval'])
+            try:
+                if await self.registry.stale():
+                    await self.registry.load()
+                    await self._sync_routes()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"同步共享配置失败: {e}", exc_info=True)
+    
+    def _save_dedup_snapshot(self):
+        """将去重缓存写入存储"""
+        try:
+            self.storage.set(DedupCache.STORAGE_KEY, self.dedup.snapshot())
         except Exception as e:
-            self.logger.error(f"清理过期数据失败: {e}")
+            self.logger.error(f"保存去重缓存失败: {e}")
+    
+    async def _dedup_snapshot_loop(self):
+        """定期保存去重缓存快照"""
+        while True:
+            await asyncio.sleep(self.config['dedup_snapshot_interval'])
+            if self.dedup.dirty:
+                self._save_dedup_snapshot()
+                self.logger.debug(f"去重缓存统计: {self.dedup.stats()}")
@@ -0,0 +1,105 @@
+import asyncio
+
+from .handlers.workflow_handler import WorkflowSummaryHandler
+
+
+def merge_messages(items):
+    """
+    合并同一窗口内的待发送条目
+    
+    Args:
+        items: 待发送条目列表（包含 event_type、message，workflow_run 另有 summary、template）
+    
+    Returns:
+        str: 合并后的消息
+    """
+    if len(items) == 1:
+        return items[0]['message']
+    
+    # 按出现顺序分组：workflow_run 按提交和汇总模板合并，其余事件各自成段
+    sections = {}
+    for index, item in enumerate(items):
+        if item['event_type'] == 'workflow_run':
+            sections.setdefault(('workflow_run', item['summary']['head_sha'], item['template']), []).append(item)
+        else:
+            sections[('message', index, None)] = [item]
+    
+    parts = []
+    for (kind, _, template), section in sections.items():
+        if kind == 'workflow_run' and len(section) > 1:
+            parts.append(WorkflowSummaryHandler.format_message([item['summary'] for item in section], template))
+        else:
+            parts.extend(item['message'] for item in section)
+    
+    return '\n\n'.join(parts)
+
+
+class MessageCoalescer:
+    """按目标合并窗口期内的多条通知"""
+    
+    def __init__(self, sender, logger, window=5, max_events=20):
+        """
+        初始化合并器
+        
+        Args:
+            sender: 发送协程，签名为 sender(platform, target_type, target_id, message)
+            logger: 日志记录器
+            window: 合并窗口（秒），从窗口内第一条事件开始计时
+            max_events: 单条合并消息最多包含的事件数
+        """
+        self.sender = sender
+        self.logger = logger
+        self.window = window
+        self.max_events = max(1, int(max_events))
+        self._pending = {}  # (platform, target_type, target_id) -> [条目]
+        self._timers = {}
+    
+    def add(self, target, event_type, event_data, message, summary_template=None):
+        """
+        加入待发送条目（不保留完整事件数据，workflow_run 只保存汇总用到的字段）
+        
+        Args:
+            target: (platform, target_type, target_id)
+            event_type: 事件类型
+            event_data: 事件数据
+            message: 单独发送时的消息
+            summary_template: 订阅绑定的 workflow_run_summary 模板，为 None 时使用默认格式
+        """
+        item = {'event_type': event_type, 'message': message}
+        if event_type == 'workflow_run':
+            item['summary'] = WorkflowSummaryHandler.summarize(event_data)
+            item['template'] = summary_template
+        self._pending.setdefault(target, []).append(item)
+        
+        if target not in self._timers:
+            self._timers[target] = asyncio.create_task(self._flush_later(target))
+    
+    async def _flush_later(self, target):
+        """窗口结束后发送"""
+        await asyncio.sleep(self.window)
+        self._timers.pop(target, None)
+        await self.flush(target)
+    
+    async def flush(self, target):
+        """
+        立即发送某个目标的待发送条目
+        
+        Args:
+            target: (platform, target_type, target_id)
+        """
+        items = self._pending.pop(target, [])
+        for start in range(0, len(items), self.max_events):
+            batch = items[start:start + self.max_events]
+            try:
+                await self.sender(*target, merge_messages(batch))
+            except Exception as e:
+                self.logger.error(f"发送合并通知失败: {target[2]} ({len(batch)} 条): {e}", exc_info=True)
+    
+    async def flush_all(self):
+        """取消计时并发送全部待发送条目"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers = {}
+        
+        for target in list(self._pending):
+            await self.flush(target)
@@ -0,0 +1,147 @@
+import time
+from collections import OrderedDict
+
+
+class DedupCache:
+    """
+    事件去重缓存（带过期时间的 LRU）
+    
+    配置了共享状态后端时，本地缓存只作为已处理标记的快速路径，
+    未命中时由共享状态原子地判定，多个进程收到同一事件时只有一个处理
+    """
+    
+    STORAGE_KEY = "github_webhook:dedup"
+    SHARED_PREFIX = "dedup:"
+    
+    def __init__(self, ttl=3600, max_size=10000, shared=None):
+        """
+        初始化去重缓存
+        
+        Args:
+            ttl: 去重标记有效期（秒）
+            max_size: 最多保留的标记数量，超出后淘汰最久未使用的标记
+            shared: 共享状态后端，为 None 时只在本进程内去重
+        """
+        self.ttl = ttl
+        self.max_size = max(1, int(max_size))
+        self.shared = shared
+        self._entries = OrderedDict()  # key -> 标记时间
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dirty = False
+        self.changes = 0  # 上次快照后新增的标记数
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        marked_at = self._entries.get(key)
+        return marked_at is not None and time.time() - marked_at <= self.ttl
+    
+    async def contains(self, key):
+        """
+        只读检查事件是否已处理（命中时计入统计，不标记）
+        
+        Args:
+            key: 事件唯一键
+        
+        Returns:
+            bool: 已处理返回 True
+        """
+        if key in self or (self.shared is not None and await self.shared.seen(self.SHARED_PREFIX + key)):
+            self.hits += 1
+            return True
+        return False
+    
+    async def check_and_add(self, key):
+        """
+        检查事件是否已处理，未处理则标记
+        
+        Args:
+            key: 事件唯一键
+        
+        Returns:
+            bool: 已处理（命中去重）返回 True
+        """
+        now = time.time()
+        marked_at = self._entries.get(key)
+        
+        if marked_at is not None and now - marked_at <= self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+        
+        # 本地未命中时由共享状态判定；其他进程已处理的也记入本地缓存，之后不再查询共享状态
+        duplicate = self.shared is not None and not await self.shared.mark(self.SHARED_PREFIX + key, self.ttl)
+        if duplicate:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._entries[key] = now
+        self._entries.move_to_end(key)
+        self.dirty = True
+        self.changes += 1
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return duplicate
+    
+    def purge_expired_batches(self, batch_size=1000):
+        """
+        分批清理过期标记（生成器，每处理一批让出一次，便于调用方分时执行）
+        
+        Args:
+            batch_size: 每批检查的标记数量
+        
+        Yields:
+            int: 本批清理的数量
+        """
+        deadline = time.time() - self.ttl
+        keys = list(self._entries)
+        
+        for start in range(0, len(keys), batch_size):
+            removed = 0
+            for key in keys[start:start + batch_size]:
+                marked_at = self._entries.get(key)
+                if marked_at is not None and marked_at < deadline:
+                    del self._entries[key]
+                    removed += 1
+            
+            if removed:
+                self.dirty = True
+            yield removed
+    
+    def snapshot(self):
+        """导出为可持久化的列表"""
+        self.dirty = False
+        self.changes = 0
+        return [{'key': key, 'timestamp': marked_at} for key, marked_at in self._entries.items()]
+    
+    def restore(self, items):
+        """
+        从持久化列表恢复，跳过已过期的标记
+        
+        Args:
+            items: snapshot() 导出的列表
+        """
+        deadline = time.time() - self.ttl
+        for item in sorted(items, key=lambda i: i.get('timestamp', 0)):
+            if item.get('timestamp', 0) >= deadline:
+                self._entries[item['key']] = item['timestamp']
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def stats(self):
+        """返回命中率与容量统计"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
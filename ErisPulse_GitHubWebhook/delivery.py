@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """令牌桶限流器"""
+    
+    def __init__(self, rate, capacity):
+        """
+        初始化令牌桶
+        
+        Args:
+            rate: 每秒补充的令牌数，0 表示不限流
+            capacity: 桶容量（允许的突发数量）
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self):
+        """取出一个令牌，不足时等待"""
+        if not self.rate:
+            return
+        
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class OutboundDispatcher:
+    """出站消息发送（限流 + 超时 + 重试 + 死信）"""
+    
+    STORAGE_KEY = "github_webhook:dead_letters"
+    
+    def __init__(self, get_adapter, storage, logger, config, metrics=None):
+        """
+        初始化发送器
+        
+        Args:
+            get_adapter: 按平台名获取适配器的函数
+            storage: 存储对象（保存死信）
+            logger: 日志记录器
+            config: 模块配置
+            metrics: 指标集合（WebhookMetrics），为 None 时不统计
+        """
+        self.get_adapter = get_adapter
+        self.storage = storage
+        self.logger = logger
+        self.metrics = metrics
+        self.platform_rate = config['send_rate_platform']
+        self.platform_burst = config['send_burst_platform']
+        self.target_rate = config['send_rate_target']
+        self.target_burst = config['send_burst_target']
+        self.max_retries = config['send_max_retries']
+        self.retry_base = config['send_retry_base']
+        self.retry_max = config['send_retry_max']
+        self.timeout = config['send_timeout']
+        self.dead_letters = deque(maxlen=config['dead_letter_max'])
+        self._platform_buckets = {}
+        self._target_buckets = {}
+    
+    def load(self):
+        """从存储恢复死信列表"""
+        self.dead_letters.extend(self.storage.get(self.STORAGE_KEY, []))
+    
+    def _bucket(self, buckets, key, rate, burst):
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+    
+    async def send(self, platform, target_type, target_id, message):
+        """
+        发送消息，失败时按指数退避重试
+        
+        Args:
+            platform: 平台名称
+            target_type: 目标类型（group / user）
+            target_id: 目标 ID
+            message: 消息内容
+        
+        Returns:
+            bool: 是否发送成功；重试耗尽后消息进入死信列表
+        """
+        adapter = self.get_adapter(platform)
+        if not adapter:
+            self.logger.error(f"未找到适配器: {platform}")
+            if self.metrics:
+                self.metrics.send_errors.inc(platform=platform, reason='no_adapter')
+            self.dead_letter(platform, target_type, target_id, message, "adapter not found")
+            return False
+        
+        platform_bucket = self._bucket(self._platform_buckets, platform, self.platform_rate, self.platform_burst)
+        target_bucket = self._bucket(
+            self._target_buckets, (platform, target_type, target_id), self.target_rate, self.target_burst
+        )
+        
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = min(self.retry_max, self.retry_base * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(1, 1.1))
+            
+            await platform_bucket.acquire()
+            await target_bucket.acquire()
+            
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    adapter.Send.To(target_type, target_id).Text(message),
+                    timeout=self.timeout,
+                )
+                self._observe(platform, start)
+                return True
+            except asyncio.TimeoutError:
+                error = f"timeout after {self.timeout}s"
+                reason = 'timeout'
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                reason = 'error'
+            
+            self._observe(platform, start, reason)
+            self.logger.warning(f"发送消息失败 ({attempt + 1}/{self.max_retries + 1}): {platform}/{target_id}: {error}")
+        
+        self.dead_letter(platform, target_type, target_id, message, error)
+        return False
+    
+    def _observe(self, platform, start, reason=None):
+        """记录单次发送耗时与失败原因"""
+        if not self.metrics:
+            return
+        
+        self.metrics.send_seconds.observe(time.perf_counter() - start, platform=platform)
+        if reason:
+            self.metrics.send_errors.inc(platform=platform, reason=reason)
+    
+    def dead_letter(self, platform, target_type, target_id, message, error):
+        """
+        记录发送失败（或未能发送）的消息
+        
+        Args:
+            platform: 平台名称
+            target_type: 目标类型
+            target_id: 目标 ID
+            message: 消息内容
+            error: 失败原因
+        """
+        self.dead_letters.append({
+            'platform': platform,
+            'target_type': target_type,
+            'target_id': target_id,
+            'message': message,
+            'error': error,
+            'timestamp': int(time.time()),
+        })
+        self.logger.error(f"消息发送失败，已放入死信列表: {platform}/{target_id}: {error}")
+        
+        try:
+            self.storage.set(self.STORAGE_KEY, list(self.dead_letters))
+        except Exception as e:
+            self.logger.error(f"保存死信列表失败: {e}")
@@ -0,0 +1,197 @@
+import fnmatch
+import re
+
+
+# 支持的规则名
+RULES = ('branches', 'actions', 'conclusions', 'ignore_authors')
+
+# 过滤规则用到的顶层字段（选择性解码时需要保留）
+FILTER_FIELDS = ('ref', 'action', 'sender', 'pull_request', 'workflow_run')
+
+
+def _branch_of_push(event_data):
+    ref = event_data.get('ref') or ''
+    return ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else None
+
+
+# 分支：push 取推送的分支（标签推送没有分支），pull_request 取目标分支，workflow_run 取触发分支
+BRANCH_EXTRACTORS = {
+    'push': _branch_of_push,
+    'pull_request': lambda event_data: ((event_data.get('pull_request') or {}).get('base') or {}).get('ref'),
+    'workflow_run': lambda event_data: (event_data.get('workflow_run') or {}).get('head_branch'),
+}
+
+# 带 action 字段的事件
+ACTION_EVENTS = ('issues', 'pull_request', 'release', 'star', 'workflow_run')
+
+# 结论：只有 workflow_run 有
+CONCLUSION_EXTRACTORS = {
+    'workflow_run': lambda event_data: (event_data.get('workflow_run') or {}).get('conclusion'),
+}
+
+
+def _as_list(value, rule):
+    """规则值统一为字符串列表"""
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{rule} 必须是字符串或字符串列表")
+    return value
+
+
+def compile_patterns(patterns):
+    """
+    编译分支匹配规则（支持 * ? [] 通配符）
+    
+    Args:
+        patterns: 分支名或通配符列表
+    
+    Returns:
+        callable: match(branch) -> bool
+    """
+    exact = set()
+    globs = []
+    for pattern in patterns:
+        if any(char in pattern for char in '*?['):
+            globs.append(fnmatch.translate(pattern))
+        else:
+            exact.add(pattern)
+    
+    regex = re.compile('|'.join(globs)).match if globs else None
+    
+    def match(value):
+        if value is None:
+            return False
+        return value in exact or (regex is not None and regex(value) is not None)
+    
+    return match
+
+
+class EventFilter:
+    """单个订阅的过滤规则（按事件类型组合为谓词并缓存）"""
+    
+    def __init__(self, spec):
+        """
+        编译过滤规则
+        
+        Args:
+            spec: {规则名: 值, 事件类型: {规则名: 值}}，事件类型下的规则覆盖通用规则
+        
+        Raises:
+            ValueError: 规则名或取值无效
+        """
+        self.common = self._compile_rules(spec, allow_events=True)
+        self.per_event = {
+            event_type: self._compile_rules(rules, allow_events=False)
+            for event_type, rules in spec.items()
+            if event_type not in RULES
+        }
+        self._checks = {}  # 事件类型 -> 谓词元组
+    
+    @staticmethod
+    def _compile_rules(spec, allow_events):
+        """把规则值编译为匹配函数/集合"""
+        if not isinstance(spec, dict):
+            raise ValueError("过滤规则必须是表")
+        
+        compiled = {}
+        for rule, value in spec.items():
+            if rule not in RULES:
+                if allow_events and isinstance(value, dict):
+                    continue  # 事件类型专属规则
+                raise ValueError(f"未知的过滤规则: {rule}")
+            
+            values = _as_list(value, rule)
+            if rule == 'branches':
+                compiled[rule] = compile_patterns(values)
+            elif rule == 'ignore_authors':
+                compiled[rule] = frozenset(item.lower() for item in values)
+            else:
+                compiled[rule] = frozenset(values)
+        return compiled
+    
+    def _build(self, event_type):
+        """组合某个事件类型适用的谓词（规则对该事件没有对应字段时不生效）"""
+        rules = {**self.common, **self.per_event.get(event_type, {})}
+        checks = []
+        
+        match_branch = rules.get('branches')
+        extract_branch = BRANCH_EXTRACTORS.get(event_type)
+        if match_branch is not None and extract_branch:
+            checks.append(lambda event_data: match_branch(extract_branch(event_data)))
+        
+        actions = rules.get('actions')
+        if actions is not None and event_type in ACTION_EVENTS:
+            checks.append(lambda event_data: event_data.get('action') in actions)
+        
+        conclusions = rules.get('conclusions')
+        extract_conclusion = CONCLUSION_EXTRACTORS.get(event_type)
+        if conclusions is not None and extract_conclusion:
+            checks.append(lambda event_data: extract_conclusion(event_data) in conclusions)
+        
+        ignored = rules.get('ignore_authors')
+        if ignored:
+            checks.append(
+                lambda event_data: ((event_data.get('sender') or {}).get('login') or '').lower() not in ignored
+            )
+        
+        return tuple(checks)
+    
+    def allows(self, event_type, event_data):
+        """
+        判断事件是否通过过滤
+        
+        Args:
+            event_type: 事件类型
+            event_data: 事件数据
+        
+        Returns:
+            bool: 通过时为 True
+        """
+        checks = self._checks.get(event_type)
+        if checks is None:
+            checks = self._checks[event_type] = self._build(event_type)
+        
+        for check in checks:
+            if not check(event_data):
+                return False
+        return True
+
+
+class FilterRegistry:
+    """各订阅的过滤规则（加载时一次性编译）"""
+    
+    def __init__(self, subscriptions, logger):
+        """
+        编译配置中的全部过滤规则
+        
+        Args:
+            subscriptions: {"<群组/用户ID>_<配置ID>": {'filters': {...}}}
+            logger: 日志记录器
+        """
+        self.logger = logger
+        self._filters = {}
+        
+        for key, subscription in (subscriptions or {}).items():
+            spec = subscription.get('filters') if isinstance(subscription, dict) else None
+            if not spec:
+                continue
+            try:
+                self._filters[key] = EventFilter(spec)
+            except ValueError as e:
+                self.logger.error(f"过滤规则无效 {key}: {e}")
+        
+        if self._filters:
+            self.logger.info(f"已编译 {len(self._filters)} 个订阅的过滤规则")
+    
+    def get(self, key):
+        """
+        获取订阅的过滤规则
+        
+        Args:
+            key: "<群组/用户ID>_<配置ID>"
+        
+        Returns:
+            EventFilter: 未配置时返回 None（不过滤）
+        """
+        return self._filters.get(key)
@@ -3,7 +3,7 @@ from .issues_handler import IssuesHandler
 from .pr_handler import PRHandler
 from .release_handler import ReleaseHandler
 from .star_handler import StarHandler, ForkHandler
-from .workflow_handler import WorkflowHandler
+from .workflow_handler import WorkflowHandler, WorkflowSummaryHandler
 
 __all__ = [
     'PushHandler',
@@ -13,4 +13,5 @@ __all__ = [
     'StarHandler',
     'ForkHandler',
     'WorkflowHandler',
+    'WorkflowSummaryHandler',
 ]
@@ -1,46 +1,94 @@
-from ..utils import truncate_text
+# action 中文名称
+ACTION_MAP = {
+    'opened': '创建',
+    'closed': '关闭',
+    'reopened': '重新打开',
+    'edited': '编辑',
+    'deleted': '删除',
+    'pinned': '置顶',
+    'unpinned': '取消置顶',
+    'transferred': '转移',
+}
 
 
 class IssuesHandler:
     """Issues 事件处理器"""
     
+    # format_message 用到的顶层字段
+    FIELDS = ('action', 'repository', 'issue', 'sender')
+    # event_key 用到的顶层字段
+    KEY_FIELDS = ('action', 'issue', 'label', 'changes')
+    # 自定义模板中的可选字段（为 None 时所在行不显示）
+    OPTIONAL_FIELDS = ()
+    
+    @staticmethod
+    def event_key(event_data):
+        """去重用的规范字段：区分每次编辑和标签变更"""
+        issue = event_data.get('issue', {})
+        return (
+            event_data.get('action', ''),
+            issue.get('number', 0),
+            issue.get('updated_at', ''),
+            (event_data.get('label') or {}).get('name', ''),
+            sorted(event_data.get('changes', {})),
+        )
+    
     @staticmethod
-    def format_message(event_data):
+    def build_context(event_data):
         """
-        格式化 Issues 事件消息
+        提取自定义模板字段
         
         Args:
             event_data: GitHub Webhook 事件数据
         
         Returns:
-            str: 格式化后的消息
+            dict: 模板字段
         """
         action = event_data.get('action', 'unknown')
-        repo = event_data.get('repository', {})
-        repo_name = repo.get('full_name', 'unknown/repo')
         issue = event_data.get('issue', {})
-        title = issue.get('title', 'unknown')
-        number = issue.get('number', 0)
-        url = issue.get('html_url', '')
-        sender = event_data.get('sender', {}).get('login', 'unknown')
         
-        # 转换 action 为中文
-        action_map = {
-            'opened': '创建',
-            'closed': '关闭',
-            'reopened': '重新打开',
-            'edited': '编辑',
-            'deleted': '删除',
-            'pinned': '置顶',
-            'unpinned': '取消置顶',
-            'transferred': '转移',
+        return {
+            'action': action,
+            'action_cn': ACTION_MAP.get(action, action),
+            'repo_name': event_data.get('repository', {}).get('full_name', 'unknown/repo'),
+            'title': issue.get('title', 'unknown'),
+            'number': issue.get('number', 0),
+            'url': issue.get('html_url', ''),
+            'sender': event_data.get('sender', {}).get('login', 'unknown'),
         }
-        action_cn = action_map.get(action, action)
+    
+    @staticmethod
+    def format_message(event_data, template=None):
+        """
+        格式化 Issues 事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+            template: 自定义模板，为 None 时使用默认格式
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        context = IssuesHandler.build_context(event_data)
+        if template is not None:
+            return template.render(context)
+        return IssuesHandler.default_message(context)
+    
+    @staticmethod
+    def default_message(context):
+        """
+        默认格式（与自定义模板使用同一份字段）
         
-        msg = f"[GitHub] Issue {action_cn}\n"
-        msg += f"仓库: {repo_name}\n"
-        msg += f"标题: {title}\n"
-        msg += f"操作者: {sender}\n"
-        msg += f"Issue #{number}: {url}"
+        Args:
+            context: build_context() 提取的字段
         
-        return msg
\ No newline at end of file
+        Returns:
+            str: 格式化后的消息
+        """
+        return (
+            f"[GitHub] Issue {context['action_cn']}\n"
+            f"仓库: {context['repo_name']}\n"
+            f"标题: {context['title']}\n"
+            f"操作者: {context['sender']}\n"
+            f"Issue #{context['number']}: {context['url']}"
+        )
\ No newline at end of file
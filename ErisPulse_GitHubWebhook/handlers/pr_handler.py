@@ -1,62 +1,106 @@
-from ..utils import truncate_text
+# action 中文名称
+ACTION_MAP = {
+    'opened': '打开',
+    'closed': '关闭',
+    'reopened': '重新打开',
+    'edited': '编辑',
+    'review_requested': '请求审查',
+    'review_request_removed': '取消审查请求',
+    'ready_for_review': '准备好审查',
+    'converted_to_draft': '转为草稿',
+    'locked': '锁定',
+    'unlocked': '解锁',
+}
 
 
 class PRHandler:
     """Pull Request 事件处理器"""
     
+    # format_message 用到的顶层字段
+    FIELDS = ('action', 'repository', 'pull_request', 'sender')
+    # event_key 用到的顶层字段
+    KEY_FIELDS = ('action', 'pull_request', 'label')
+    # 自定义模板中的可选字段（为 None 时所在行不显示）
+    OPTIONAL_FIELDS = ()
+    
+    @staticmethod
+    def event_key(event_data):
+        """去重用的规范字段：区分每次更新、新提交和标签变更"""
+        pr = event_data.get('pull_request', {})
+        return (
+            event_data.get('action', ''),
+            pr.get('number', 0),
+            pr.get('updated_at', ''),
+            pr.get('head', {}).get('sha', ''),
+            (event_data.get('label') or {}).get('name', ''),
+        )
+    
     @staticmethod
-    def format_message(event_data):
+    def build_context(event_data):
         """
-        格式化 Pull Request 事件消息
+        提取自定义模板字段
         
         Args:
             event_data: GitHub Webhook 事件数据
         
         Returns:
-            str: 格式化后的消息
+            dict: 模板字段
         """
         action = event_data.get('action', 'unknown')
-        repo = event_data.get('repository', {})
-        repo_name = repo.get('full_name', 'unknown/repo')
+        repo_name = event_data.get('repository', {}).get('full_name', 'unknown/repo')
         pr = event_data.get('pull_request', {})
-        title = pr.get('title', 'unknown')
-        number = pr.get('number', 0)
-        url = pr.get('html_url', '')
-        sender = event_data.get('sender', {}).get('login', 'unknown')
         
-        # 获取分支信息
+        # 获取分支信息（来自其他仓库时显示仓库名）
         head = pr.get('head', {})
-        base = pr.get('base', {})
         head_ref = head.get('ref', 'unknown')
-        base_ref = base.get('ref', 'unknown')
-        head_repo = head.get('repo', {}).get('full_name', '')
-        
-        # 转换 action 为中文
-        action_map = {
-            'opened': '打开',
-            'closed': '关闭',
-            'reopened': '重新打开',
-            'edited': '编辑',
-            'review_requested': '请求审查',
-            'review_request_removed': '取消审查请求',
-            'ready_for_review': '准备好审查',
-            'converted_to_draft': '转为草稿',
-            'locked': '锁定',
-            'unlocked': '解锁',
+        head_repo = (head.get('repo') or {}).get('full_name', '')
+        
+        return {
+            'action': action,
+            'action_cn': ACTION_MAP.get(action, action),
+            'repo_name': repo_name,
+            'title': pr.get('title', 'unknown'),
+            'number': pr.get('number', 0),
+            'url': pr.get('html_url', ''),
+            'sender': event_data.get('sender', {}).get('login', 'unknown'),
+            'head_ref': head_ref,
+            'head_label': f"{head_repo}:{head_ref}" if head_repo and head_repo != repo_name else head_ref,
+            'base_ref': pr.get('base', {}).get('ref', 'unknown'),
         }
-        action_cn = action_map.get(action, action)
+    
+    @staticmethod
+    def format_message(event_data, template=None):
+        """
+        格式化 Pull Request 事件消息
         
-        msg = f"[GitHub] Pull request {action_cn}\n"
-        msg += f"仓库: {repo_name}\n"
-        msg += f"标题: {title}\n"
-        msg += f"发起者: {sender}\n"
+        Args:
+            event_data: GitHub Webhook 事件数据
+            template: 自定义模板，为 None 时使用默认格式
         
-        # 显示分支信息
-        if head_repo and head_repo != repo_name:
-            msg += f"分支: {head_repo}:{head_ref} -> {base_ref}\n"
-        else:
-            msg += f"分支: {head_ref} -> {base_ref}\n"
+        Returns:
+            str: 格式化后的消息
+        """
+        context = PRHandler.build_context(event_data)
+        if template is not None:
+            return template.render(context)
+        return PRHandler.default_message(context)
+    
+    @staticmethod
+    def default_message(context):
+        """
+        默认格式（与自定义模板使用同一份字段）
         
-        msg += f"PR #{number}: {url}"
+        Args:
+            context: build_context() 提取的字段
         
-        return msg
\ No newline at end of file
+        Returns:
+            str: 格式化后的消息
+        """
+        return (
+            f"[GitHub] Pull request {context['action_cn']}\n"
+            f"仓库: {context['repo_name']}\n"
+            f"标题: {context['title']}\n"
+            f"发起者: {context['sender']}\n"
+            f"分支: {context['head_label']} -> {context['base_ref']}\n"
+            f"PR #{context['number']}: {context['url']}"
+        )
\ No newline at end of file
@@ -1,44 +1,98 @@
 from ..utils import truncate_text
 
 
+# 最多显示的提交数
+MAX_COMMITS = 5
+
+
 class PushHandler:
     """Push 事件处理器"""
     
+    # format_message 用到的顶层字段
+    FIELDS = ('repository', 'ref', 'pusher', 'commits', 'compare')
+    # event_key 用到的顶层字段
+    KEY_FIELDS = ('ref', 'after')
+    # 自定义模板中的可选字段（为 None 时所在行不显示）
+    OPTIONAL_FIELDS = ('commit_lines', 'more_commits', 'compare_url')
+    
+    @staticmethod
+    def event_key(event_data):
+        """去重用的规范字段：同一分支的同一次推送"""
+        return (event_data.get('ref', ''), event_data.get('after', ''))
+    
+    @staticmethod
+    def build_context(event_data):
+        """
+        提取自定义模板字段
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            dict: 模板字段
+        """
+        commits = event_data.get('commits') or []
+        
+        commit_lines = '\n'.join([
+            f"- {truncate_text(commit.get('message', ''))} ({commit.get('id', '')[:7]})"
+            for commit in commits[:MAX_COMMITS]
+        ])
+        
+        return {
+            'repo_name': event_data.get('repository', {}).get('full_name', 'unknown/repo'),
+            'ref': event_data.get('ref', '').replace('refs/heads/', ''),
+            'pusher': event_data.get('pusher', {}).get('name', 'unknown'),
+            'commit_count': len(commits),
+            'commit_lines': commit_lines or None,
+            'more_commits': len(commits) - MAX_COMMITS if len(commits) > MAX_COMMITS else None,
+            'compare_url': event_data.get('compare') or None,
+        }
+    
     @staticmethod
-    def format_message(event_data):
+    def format_message(event_data, template=None):
         """
         格式化 Push 事件消息
         
         Args:
             event_data: GitHub Webhook 事件数据
+            template: 自定义模板，为 None 时使用默认格式
         
         Returns:
             str: 格式化后的消息
         """
-        repo = event_data.get('repository', {})
-        repo_name = repo.get('full_name', 'unknown/repo')
-        ref = event_data.get('ref', '').replace('refs/heads/', '')
-        pusher = event_data.get('pusher', {}).get('name', 'unknown')
-        commits = event_data.get('commits', [])
+        context = PushHandler.build_context(event_data)
+        if template is not None:
+            return template.render(context)
+        return PushHandler.default_message(context)
+    
+    @staticmethod
+    def default_message(context):
+        """
+        默认格式（与自定义模板使用同一份字段）
+        
+        Args:
+            context: build_context() 提取的字段
         
-        msg = f"[GitHub] Push 到 {repo_name}\n"
-        msg += f"分支: {ref}\n"
-        msg += f"推送者: {pusher}\n"
-        msg += f"提交数: {len(commits)}\n\n"
+        Returns:
+            str: 格式化后的消息
+        """
+        msg = (
+            f"[GitHub] Push 到 {context['repo_name']}\n"
+            f"分支: {context['ref']}\n"
+            f"推送者: {context['pusher']}\n"
+            f"提交数: {context['commit_count']}\n\n"
+        )
         
         # 显示提交信息（最多5条）
-        for commit in commits[:5]:
-            commit_msg = commit.get('message', '')
-            commit_id = commit.get('id', '')[:7]
-            msg += f"- {truncate_text(commit_msg)} ({commit_id})\n"
+        if context['commit_lines']:
+            msg += f"{context['commit_lines']}\n"
         
         # 如果有更多提交
-        if len(commits) > 5:
-            msg += f"\n还有 {len(commits) - 5} 条提交未显示...\n"
+        if context['more_commits']:
+            msg += f"\n还有 {context['more_commits']} 条提交未显示...\n"
         
         # 添加对比链接
-        compare_url = event_data.get('compare', '')
-        if compare_url:
-            msg += f"\n查看对比: {compare_url}"
+        if context['compare_url']:
+            msg += f"\n查看对比: {context['compare_url']}"
         
         return msg
\ No newline at end of file
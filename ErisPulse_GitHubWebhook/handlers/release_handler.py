@@ -1,57 +1,109 @@
 from ..utils import truncate_text
 
 
+# 最多显示的下载文件数
+MAX_ASSETS = 3
+
+
+def format_assets(assets):
+    """下载文件列表（最多 MAX_ASSETS 个），每行一个"""
+    lines = [
+        f"- {asset.get('name', 'unknown')} ({asset.get('size', 0) / (1024 * 1024):.2f} MB)\n"
+        for asset in assets[:MAX_ASSETS]
+    ]
+    if len(assets) > MAX_ASSETS:
+        lines.append(f"- 还有 {len(assets) - MAX_ASSETS} 个文件...\n")
+    return ''.join(lines)
+
+
 class ReleaseHandler:
     """Release 事件处理器"""
     
+    # format_message 用到的顶层字段
+    FIELDS = ('action', 'repository', 'release', 'sender')
+    # event_key 用到的顶层字段
+    KEY_FIELDS = ('action', 'release')
+    # 自定义模板中的可选字段（为 None 时所在行不显示）
+    OPTIONAL_FIELDS = ('name', 'body', 'asset_count', 'asset_lines')
+    
+    @staticmethod
+    def event_key(event_data):
+        """去重用的规范字段：tag 位于 release 对象内"""
+        release = event_data.get('release', {})
+        return (event_data.get('action', ''), release.get('id', 0), release.get('tag_name', ''))
+    
     @staticmethod
-    def format_message(event_data):
+    def build_context(event_data):
         """
-        格式化 Release 事件消息
+        提取自定义模板字段
         
         Args:
             event_data: GitHub Webhook 事件数据
         
         Returns:
-            str: 格式化后的消息
+            dict: 模板字段
         """
-        action = event_data.get('action', 'published')
-        repo = event_data.get('repository', {})
-        repo_name = repo.get('full_name', 'unknown/repo')
         release = event_data.get('release', {})
         tag_name = release.get('tag_name', 'unknown')
         name = release.get('name', '')
-        url = release.get('html_url', '')
-        sender = event_data.get('sender', {}).get('login', 'unknown')
         body = release.get('body', '')
-        assets = release.get('assets', [])
+        assets = release.get('assets') or []
         
-        msg = f"[GitHub] Release 发布\n"
-        msg += f"仓库: {repo_name}\n"
-        msg += f"版本: {tag_name}\n"
+        return {
+            'action': event_data.get('action', 'published'),
+            'repo_name': event_data.get('repository', {}).get('full_name', 'unknown/repo'),
+            'tag_name': tag_name,
+            'name': name if name and name != tag_name else None,
+            'sender': event_data.get('sender', {}).get('login', 'unknown'),
+            'body': truncate_text(body, 200) if body else None,
+            'asset_count': len(assets) if assets else None,
+            'asset_lines': format_assets(assets).rstrip('\n') if assets else None,
+            'url': release.get('html_url', ''),
+        }
+    
+    @staticmethod
+    def format_message(event_data, template=None):
+        """
+        格式化 Release 事件消息
         
-        if name and name != tag_name:
-            msg += f"名称: {name}\n"
+        Args:
+            event_data: GitHub Webhook 事件数据
+            template: 自定义模板，为 None 时使用默认格式
         
-        msg += f"发布者: {sender}\n"
+        Returns:
+            str: 格式化后的消息
+        """
+        context = ReleaseHandler.build_context(event_data)
+        if template is not None:
+            return template.render(context)
+        return ReleaseHandler.default_message(context)
+    
+    @staticmethod
+    def default_message(context):
+        """
+        默认格式（与自定义模板使用同一份字段）
+        
+        Args:
+            context: build_context() 提取的字段
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        msg = f"[GitHub] Release 发布\n仓库: {context['repo_name']}\n版本: {context['tag_name']}\n"
+        
+        if context['name']:
+            msg += f"名称: {context['name']}\n"
+        
+        msg += f"发布者: {context['sender']}\n"
         
         # 显示版本描述（最多200字符）
-        if body:
-            msg += f"\n描述: {truncate_text(body, 200)}\n"
+        if context['body']:
+            msg += f"\n描述: {context['body']}\n"
         
         # 显示下载链接
-        if assets:
-            msg += f"\n下载文件 ({len(assets)} 个):\n"
-            for asset in assets[:3]:
-                asset_name = asset.get('name', 'unknown')
-                download_url = asset.get('browser_download_url', '')
-                size = asset.get('size', 0)
-                size_mb = size / (1024 * 1024)
-                msg += f"- {asset_name} ({size_mb:.2f} MB)\n"
-            
-            if len(assets) > 3:
-                msg += f"- 还有 {len(assets) - 3} 个文件...\n"
-        
-        msg += f"\n查看详情: {url}"
+        if context['asset_count']:
+            msg += f"\n下载文件 ({context['asset_count']} 个):\n{context['asset_lines']}\n"
+        
+        msg += f"\n查看详情: {context['url']}"
         
         return msg
\ No newline at end of file
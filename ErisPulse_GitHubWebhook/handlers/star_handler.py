@@ -1,60 +1,151 @@
 class StarHandler:
     """Star 事件处理器"""
     
+    # format_message 用到的顶层字段
+    FIELDS = ('action', 'repository', 'sender')
+    # event_key 用到的顶层字段
+    KEY_FIELDS = ('action', 'sender', 'starred_at')
+    # 自定义模板中的可选字段（为 None 时所在行不显示）
+    OPTIONAL_FIELDS = ()
+    
+    @staticmethod
+    def event_key(event_data):
+        """去重用的规范字段：同一用户的同一次收藏操作"""
+        return (
+            event_data.get('action', ''),
+            event_data.get('sender', {}).get('id', 0),
+            event_data.get('starred_at', ''),
+        )
+    
+    @staticmethod
+    def build_context(event_data):
+        """
+        提取自定义模板字段
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            dict: 模板字段
+        """
+        repo = event_data.get('repository', {})
+        
+        return {
+            'action': event_data.get('action', 'created'),
+            'repo_name': repo.get('full_name', 'unknown/repo'),
+            'sender': event_data.get('sender', {}).get('login', 'unknown'),
+            'stargazers_count': repo.get('stargazers_count', 0),
+        }
+    
     @staticmethod
-    def format_message(event_data):
+    def format_message(event_data, template=None):
         """
         格式化 Star 事件消息
         
         Args:
             event_data: GitHub Webhook 事件数据
+            template: 自定义模板，为 None 时使用默认格式
         
         Returns:
             str: 格式化后的消息
         """
-        action = event_data.get('action', 'created')
-        repo = event_data.get('repository', {})
-        repo_name = repo.get('full_name', 'unknown/repo')
-        sender = event_data.get('sender', {}).get('login', 'unknown')
-        stargazers_count = repo.get('stargazers_count', 0)
+        context = StarHandler.build_context(event_data)
+        if template is not None:
+            return template.render(context)
+        return StarHandler.default_message(context)
+    
+    @staticmethod
+    def default_message(context):
+        """
+        默认格式（与自定义模板使用同一份字段）
         
-        msg = f"[GitHub] 仓库被收藏\n"
-        msg += f"仓库: {repo_name}\n"
-        msg += f"收藏者: {sender}\n"
-        msg += f"当前 Star 数: {stargazers_count}"
+        Args:
+            context: build_context() 提取的字段
         
-        return msg
+        Returns:
+            str: 格式化后的消息
+        """
+        return (
+            f"[GitHub] 仓库被收藏\n"
+            f"仓库: {context['repo_name']}\n"
+            f"收藏者: {context['sender']}\n"
+            f"当前 Star 数: {context['stargazers_count']}"
+        )
 
 
 class ForkHandler:
     """Fork 事件处理器"""
     
+    # format_message 用到的顶层字段
+    FIELDS = ('repository', 'sender', 'forkee')
+    # event_key 用到的顶层字段
+    KEY_FIELDS = ('forkee',)
+    # 自定义模板中的可选字段（为 None 时所在行不显示）
+    OPTIONAL_FIELDS = ('fork_url',)
+    
+    @staticmethod
+    def event_key(event_data):
+        """去重用的规范字段：复刻出的仓库"""
+        forkee = event_data.get('forkee', {})
+        return (forkee.get('id', 0), forkee.get('full_name', ''))
+    
+    @staticmethod
+    def build_context(event_data):
+        """
+        提取自定义模板字段
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            dict: 模板字段
+        """
+        # 获取 fork 的仓库信息
+        forkee = event_data.get('forkee', {})
+        
+        return {
+            'repo_name': event_data.get('repository', {}).get('full_name', 'unknown/repo'),
+            'sender': event_data.get('sender', {}).get('login', 'unknown'),
+            'fork_name': forkee.get('full_name', 'unknown/repo'),
+            'fork_url': forkee.get('html_url') or None,
+        }
+    
     @staticmethod
-    def format_message(event_data):
+    def format_message(event_data, template=None):
         """
         格式化 Fork 事件消息
         
         Args:
             event_data: GitHub Webhook 事件数据
+            template: 自定义模板，为 None 时使用默认格式
         
         Returns:
             str: 格式化后的消息
         """
-        repo = event_data.get('repository', {})
-        repo_name = repo.get('full_name', 'unknown/repo')
-        sender = event_data.get('sender', {}).get('login', 'unknown')
+        context = ForkHandler.build_context(event_data)
+        if template is not None:
+            return template.render(context)
+        return ForkHandler.default_message(context)
+    
+    @staticmethod
+    def default_message(context):
+        """
+        默认格式（与自定义模板使用同一份字段）
         
-        # 获取 fork 的仓库信息
-        forkee = event_data.get('forkee', {})
-        fork_name = forkee.get('full_name', 'unknown/repo')
-        fork_url = forkee.get('html_url', '')
+        Args:
+            context: build_context() 提取的字段
         
-        msg = f"[GitHub] 仓库被复刻\n"
-        msg += f"原仓库: {repo_name}\n"
-        msg += f"复刻者: {sender}\n"
-        msg += f"复刻仓库: {fork_name}"
+        Returns:
+            str: 格式化后的消息
+        """
+        msg = (
+            f"[GitHub] 仓库被复刻\n"
+            f"原仓库: {context['repo_name']}\n"
+            f"复刻者: {context['sender']}\n"
+            f"复刻仓库: {context['fork_name']}"
+        )
         
-        if fork_url:
-            msg += f"\n查看: {fork_url}"
+        if context['fork_url']:
+            msg += f"\n查看: {context['fork_url']}"
         
         return msg
\ No newline at end of file
@@ -1,149 +1,292 @@
+from datetime import datetime
+
 from ..utils import truncate_text
 
 
+# 最多显示的产物数
+MAX_ARTIFACTS = 3
+
+# action 中文名称
+ACTION_MAP = {
+    'requested': '请求',
+    'in_progress': '进行中',
+    'completed': '完成',
+    'queued': '排队中',
+}
+
+# conclusion 中文名称
+CONCLUSION_MAP = {
+    'success': '成功',
+    'failure': '失败',
+    'cancelled': '已取消',
+    'timed_out': '超时',
+    'action_required': '需要操作',
+    'neutral': '中性',
+    'skipped': '跳过',
+    'stale': '过时',
+}
+
+
+def format_duration(created_at, updated_at):
+    """计算并格式化耗时，时间无效时返回 None"""
+    if not created_at or not updated_at:
+        return None
+    
+    try:
+        start_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        end_time = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    
+    duration_seconds = (end_time - start_time).total_seconds()
+    if duration_seconds < 60:
+        return f"{int(duration_seconds)}秒"
+    if duration_seconds < 3600:
+        return f"{int(duration_seconds // 60)}分{int(duration_seconds % 60)}秒"
+    return f"{int(duration_seconds // 3600)}小时{int((duration_seconds % 3600) // 60)}分"
+
+
+def format_size(size):
+    """格式化文件大小"""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.2f} KB"
+    if size < 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024):.2f} MB"
+    return f"{size / (1024 * 1024 * 1024):.2f} GB"
+
+
+def format_artifacts(artifacts):
+    """构建产物列表（最多 MAX_ARTIFACTS 个），每行一个"""
+    lines = []
+    for artifact in artifacts[:MAX_ARTIFACTS]:
+        lines.append(f"- {artifact.get('name', 'unknown')} ({format_size(artifact.get('size_in_bytes', 0))})\n")
+        archive_url = artifact.get('archive_download_url', '')
+        if archive_url:
+            lines.append(f"  下载链接: {archive_url}\n")
+    if len(artifacts) > MAX_ARTIFACTS:
+        lines.append(f"- 还有 {len(artifacts) - MAX_ARTIFACTS} 个产物...\n")
+    return ''.join(lines)
+
+
 class WorkflowHandler:
     """GitHub Actions Workflow 事件处理器"""
     
+    # format_message 用到的顶层字段
+    FIELDS = ('action', 'repository', 'workflow_run', 'sender')
+    # event_key 用到的顶层字段
+    KEY_FIELDS = ('action', 'workflow_run')
+    # 自定义模板中的可选字段（为 None 时所在行不显示）
+    OPTIONAL_FIELDS = ('duration', 'html_url', 'logs_url', 'artifact_count', 'artifact_lines')
+    
+    @staticmethod
+    def event_key(event_data):
+        """去重用的规范字段：同一次运行（含重试）的同一状态"""
+        workflow_run = event_data.get('workflow_run', {})
+        return (
+            event_data.get('action', ''),
+            workflow_run.get('id', 0),
+            workflow_run.get('run_attempt', 1),
+        )
+    
     @staticmethod
-    def format_message(event_data):
+    def build_context(event_data):
         """
-        格式化 Workflow 构建事件消息
+        提取自定义模板字段
         
         Args:
             event_data: GitHub Webhook 事件数据
         
         Returns:
-            str: 格式化后的消息
+            dict: 模板字段
         """
         action = event_data.get('action', 'completed')
-        repo = event_data.get('repository', {})
-        repo_name = repo.get('full_name', 'unknown/repo')
         workflow_run = event_data.get('workflow_run', {})
-        sender = event_data.get('sender', {}).get('login', 'unknown')
-        
-        # 获取工作流信息
-        workflow_name = workflow_run.get('name', 'unknown')
-        workflow_id = workflow_run.get('id', 0)
         status = workflow_run.get('status', 'unknown')
         conclusion = workflow_run.get('conclusion', '')
-        run_number = workflow_run.get('run_number', 0)
-        
-        # 获取分支信息
-        head_branch = workflow_run.get('head_branch', 'unknown')
         head_sha = workflow_run.get('head_sha', '')
-        head_sha_short = head_sha[:7] if head_sha else 'unknown'
-        
-        # 获取提交信息
         head_commit = workflow_run.get('head_commit', {})
-        commit_message = head_commit.get('message', 'unknown')
-        commit_author = head_commit.get('author', {}).get('name', 'unknown')
-        
-        # 获取时间信息
-        created_at = workflow_run.get('created_at', '')
-        updated_at = workflow_run.get('updated_at', '')
-        
-        # 计算耗时
-        duration = ''
-        if created_at and updated_at:
-            try:
-                from datetime import datetime
-                start_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                end_time = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-                duration_seconds = (end_time - start_time).total_seconds()
-                
-                if duration_seconds < 60:
-                    duration = f"{int(duration_seconds)}秒"
-                elif duration_seconds < 3600:
-                    minutes = int(duration_seconds // 60)
-                    seconds = int(duration_seconds % 60)
-                    duration = f"{minutes}分{seconds}秒"
-                else:
-                    hours = int(duration_seconds // 3600)
-                    minutes = int((duration_seconds % 3600) // 60)
-                    duration = f"{hours}小时{minutes}分"
-            except:
-                pass
-        
-        # 获取构建日志和产物链接
-        html_url = workflow_run.get('html_url', '')
+        
+        # 完成时显示结论，否则显示当前状态
+        if conclusion and action == 'completed':
+            state = CONCLUSION_MAP.get(conclusion, conclusion)
+        else:
+            state = status
+        
+        # 添加日志链接（仅当构建失败或完成时）
         logs_url = workflow_run.get('logs_url', '')
+        if action not in ('completed', 'failed'):
+            logs_url = ''
         
-        # 获取构建产物
-        artifacts = workflow_run.get('artifacts', [])
+        # 显示构建产物（仅在构建成功时）
+        artifacts = workflow_run.get('artifacts') or []
+        if not (conclusion == 'success' and action == 'completed'):
+            artifacts = []
         
-        # 转换 action 为中文
-        action_map = {
-            'requested': '请求',
-            'in_progress': '进行中',
-            'completed': '完成',
-            'queued': '排队中',
+        return {
+            'action': action,
+            'action_cn': ACTION_MAP.get(action, action),
+            'repo_name': event_data.get('repository', {}).get('full_name', 'unknown/repo'),
+            'sender': event_data.get('sender', {}).get('login', 'unknown'),
+            'workflow_name': workflow_run.get('name', 'unknown'),
+            'run_number': workflow_run.get('run_number', 0),
+            'status': status,
+            'conclusion': conclusion or '',
+            'state': state,
+            'head_branch': workflow_run.get('head_branch', 'unknown'),
+            'head_sha_short': head_sha[:7] if head_sha else 'unknown',
+            'commit_message': truncate_text(head_commit.get('message', 'unknown')),
+            'commit_author': head_commit.get('author', {}).get('name', 'unknown'),
+            'duration': format_duration(workflow_run.get('created_at', ''), workflow_run.get('updated_at', '')),
+            'html_url': workflow_run.get('html_url') or None,
+            'logs_url': logs_url or None,
+            'artifact_count': len(artifacts) if artifacts else None,
+            'artifact_lines': format_artifacts(artifacts).rstrip('\n') if artifacts else None,
         }
-        action_cn = action_map.get(action, action)
-        
-        # 转换 conclusion 为中文
-        conclusion_map = {
-            'success': '成功',
-            'failure': '失败',
-            'cancelled': '已取消',
-            'timed_out': '超时',
-            'action_required': '需要操作',
-            'neutral': '中性',
-            'skipped': '跳过',
-            'stale': '过时',
-        }
-        conclusion_cn = conclusion_map.get(conclusion, conclusion) if conclusion else status
+    
+    @staticmethod
+    def format_message(event_data, template=None):
+        """
+        格式化 Workflow 构建事件消息
         
-        # 构建消息
-        msg = f"[GitHub] Workflow 构建{action_cn}\n"
-        msg += f"仓库: {repo_name}\n"
-        msg += f"工作流: {workflow_name} (#{run_number})\n"
+        Args:
+            event_data: GitHub Webhook 事件数据
+            template: 自定义模板，为 None 时使用默认格式
         
-        if conclusion and action == 'completed':
-            msg += f"状态: {conclusion_cn}\n"
-        else:
-            msg += f"状态: {status}\n"
+        Returns:
+            str: 格式化后的消息
+        """
+        context = WorkflowHandler.build_context(event_data)
+        if template is not None:
+            return template.render(context)
+        return WorkflowHandler.default_message(context)
+    
+    @staticmethod
+    def default_message(context):
+        """
+        默认格式（与自定义模板使用同一份字段）
         
-        msg += f"分支: {head_branch}\n"
-        msg += f"提交: {head_sha_short} - {truncate_text(commit_message)}\n"
-        msg += f"提交者: {commit_author}\n"
+        Args:
+            context: build_context() 提取的字段
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        msg = (
+            f"[GitHub] Workflow 构建{context['action_cn']}\n"
+            f"仓库: {context['repo_name']}\n"
+            f"工作流: {context['workflow_name']} (#{context['run_number']})\n"
+            f"状态: {context['state']}\n"
+            f"分支: {context['head_branch']}\n"
+            f"提交: {context['head_sha_short']} - {context['commit_message']}\n"
+            f"提交者: {context['commit_author']}\n"
+        )
         
-        if duration:
-            msg += f"耗时: {duration}\n"
+        if context['duration']:
+            msg += f"耗时: {context['duration']}\n"
         
         # 添加查看链接
-        if html_url:
-            msg += f"\n查看详情: {html_url}"
+        if context['html_url']:
+            msg += f"\n查看详情: {context['html_url']}"
         
         # 添加日志链接（仅当构建失败或完成时）
-        if logs_url and action in ['completed', 'failed']:
-            msg += f"\n查看日志: {logs_url}"
+        if context['logs_url']:
+            msg += f"\n查看日志: {context['logs_url']}"
         
         # 显示构建产物（仅在构建成功时）
-        if artifacts and conclusion == 'success' and action == 'completed':
-            msg += f"\n\n下载产物 ({len(artifacts)} 个):\n"
-            for artifact in artifacts[:3]:
-                artifact_name = artifact.get('name', 'unknown')
-                artifact_size = artifact.get('size_in_bytes', 0)
-                
-                # 格式化文件大小
-                if artifact_size < 1024:
-                    size_str = f"{artifact_size} B"
-                elif artifact_size < 1024 * 1024:
-                    size_str = f"{artifact_size / 1024:.2f} KB"
-                elif artifact_size < 1024 * 1024 * 1024:
-                    size_str = f"{artifact_size / (1024 * 1024):.2f} MB"
-                else:
-                    size_str = f"{artifact_size / (1024 * 1024 * 1024):.2f} GB"
-                
-                # 构建产物下载链接
-                archive_url = artifact.get('archive_download_url', '')
-                if archive_url:
-                    msg += f"- {artifact_name} ({size_str})\n"
-                    msg += f"  下载链接: {archive_url}\n"
-                else:
-                    msg += f"- {artifact_name} ({size_str})\n"
-            
-            if len(artifacts) > 3:
-                msg += f"- 还有 {len(artifacts) - 3} 个产物...\n"
-        
-        return msg
\ No newline at end of file
+        if context['artifact_count']:
+            msg += f"\n\n下载产物 ({context['artifact_count']} 个):\n{context['artifact_lines']}\n"
+        
+        return msg
+
+
+class WorkflowSummaryHandler:
+    """
+    同一提交的多个 Workflow 运行的构建汇总（通知合并窗口中使用）
+    
+    自定义模板中的事件类型为 workflow_run_summary
+    """
+    
+    # 自定义模板中的可选字段
+    OPTIONAL_FIELDS = ()
+    
+    @staticmethod
+    def summarize(event_data):
+        """
+        提取汇总用到的字段（合并窗口中只保存这些字段）
+        
+        Args:
+            event_data: workflow_run 事件数据
+        
+        Returns:
+            dict: 单次运行的摘要
+        """
+        workflow_run = event_data.get('workflow_run', {})
+        conclusion = workflow_run.get('conclusion')
+        return {
+            'id': workflow_run.get('id'),
+            'repo_name': event_data.get('repository', {}).get('full_name', 'unknown/repo'),
+            'head_branch': workflow_run.get('head_branch', 'unknown'),
+            'head_sha': workflow_run.get('head_sha', ''),
+            'name': workflow_run.get('name', 'unknown'),
+            'run_number': workflow_run.get('run_number', 0),
+            'state': CONCLUSION_MAP.get(conclusion, conclusion) if conclusion else workflow_run.get('status', 'unknown'),
+            'html_url': workflow_run.get('html_url') or '',
+        }
+    
+    @staticmethod
+    def build_context(runs):
+        """
+        提取自定义模板字段
+        
+        Args:
+            runs: 同一提交的运行摘要列表（按时间顺序），同一个运行只保留最后一次状态
+        
+        Returns:
+            dict: 模板字段
+        """
+        latest = {}
+        for run in runs:
+            latest[run['id']] = run
+        
+        first = runs[0] if runs else {}
+        head_sha = first.get('head_sha', '')
+        
+        lines = []
+        for run in latest.values():
+            lines.append(f"- {run['name']} (#{run['run_number']}): {run['state']}")
+            if run['html_url']:
+                lines.append(f"  {run['html_url']}")
+        
+        return {
+            'repo_name': first.get('repo_name', 'unknown/repo'),
+            'head_branch': first.get('head_branch', 'unknown'),
+            'head_sha_short': head_sha[:7] if head_sha else 'unknown',
+            'run_count': len(latest),
+            'run_lines': '\n'.join(lines),
+        }
+    
+    @staticmethod
+    def format_message(runs, template=None):
+        """
+        格式化构建汇总消息
+        
+        Args:
+            runs: 同一提交的运行摘要列表
+            template: 自定义模板，为 None 时使用默认格式
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        context = WorkflowSummaryHandler.build_context(runs)
+        if template is not None:
+            return template.render(context)
+        
+        return (
+            f"[GitHub] Workflow 构建汇总 ({context['run_count']} 个)\n"
+            f"仓库: {context['repo_name']}\n"
+            f"分支: {context['head_branch']}\n"
+            f"提交: {context['head_sha_short']}\n"
+            f"{context['run_lines']}"
+        )
@@ -0,0 +1,697 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+# summarize_event 用到的顶层字段
+SUMMARY_FIELDS = (
+    'action', 'sender', 'ref', 'after', 'commits',
+    'number', 'issue', 'pull_request', 'release', 'workflow_run',
+)
+
+
+def summarize_event(event_type, event_data):
+    """
+    提取事件摘要（只保留少量展示用字段）
+    
+    Args:
+        event_type: 事件类型
+        event_data: 事件数据
+    
+    Returns:
+        dict: 事件摘要
+    """
+    summary = {
+        'action': event_data.get('action', ''),
+        'actor': event_data.get('sender', {}).get('login', ''),
+    }
+    
+    if event_type == 'push':
+        summary['ref'] = event_data.get('ref', '')
+        summary['head'] = event_data.get('after', '')
+        summary['commits'] = len(event_data.get('commits', []))
+    
+    elif event_type in ['issues', 'pull_request']:
+        item = event_data.get('issue' if event_type == 'issues' else 'pull_request', {})
+        summary['number'] = item.get('number', event_data.get('number', 0))
+        summary['title'] = item.get('title', '')
+    
+    elif event_type == 'release':
+        summary['tag'] = event_data.get('release', {}).get('tag_name', '')
+    
+    elif event_type == 'workflow_run':
+        workflow_run = event_data.get('workflow_run', {})
+        summary['name'] = workflow_run.get('name', '')
+        summary['conclusion'] = workflow_run.get('conclusion', '')
+        summary['head_sha'] = workflow_run.get('head_sha', '')
+    
+    return summary
+
+
+# /ghw_history 每页显示的记录数
+PAGE_SIZE = 10
+
+# 事件类型别名（与 /ghw_add 一致）
+EVENT_ALIASES = {'pr': 'pull_request', 'workflow': 'workflow_run'}
+EVENT_TYPES = ('push', 'issues', 'pull_request', 'release', 'star', 'fork', 'workflow_run')
+
+# 相对时间单位（秒）
+TIME_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_time(value, now=None):
+    """
+    解析时间参数
+    
+    Args:
+        value: 相对时间（30m、12h、7d，表示多久之前）或日期时间（2026-01-31、2026-01-31T08:00）
+        now: 当前时间戳，默认当前时间
+    
+    Returns:
+        int: 时间戳
+    
+    Raises:
+        ValueError: 格式无效
+    """
+    match = re.fullmatch(r'(\d+)([mhd])', value)
+    if match:
+        now = time.time() if now is None else now
+        return int(now - int(match.group(1)) * TIME_UNITS[match.group(2)])
+    
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        raise ValueError(f"无效的时间: {value}（示例：7d、12h、2026-01-31）") from None
+
+
+def parse_history_args(args, now=None):
+    """
+    解析 /ghw_history 的筛选参数
+    
+    支持：事件类型（push、pr、workflow 等）、actor=用户、since=/until=时间、page=页码
+    
+    Args:
+        args: 命令参数列表
+        now: 当前时间戳，默认当前时间
+    
+    Returns:
+        dict: event_type、actor、since、until、page
+    
+    Raises:
+        ValueError: 参数无效（消息可直接回复给用户）
+    """
+    filters = {'event_type': None, 'actor': None, 'since': None, 'until': None, 'page': 1}
+    
+    for arg in args:
+        key, sep, value = arg.partition('=')
+        if not sep:
+            key, value = 'event', arg
+        key = key.strip().lower()
+        value = value.strip()
+        
+        if key == 'event':
+            event_type = EVENT_ALIASES.get(value.lower(), value.lower())
+            if event_type not in EVENT_TYPES:
+                raise ValueError(f"无效的事件类型: {value}")
+            filters['event_type'] = event_type
+        elif key == 'actor':
+            filters['actor'] = value
+        elif key in ('since', 'until'):
+            filters[key] = parse_time(value, now)
+        elif key == 'page':
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"无效的页码: {value}")
+            filters['page'] = int(value)
+        else:
+            raise ValueError(f"未知的参数: {arg}")
+    
+    return filters
+
+
+def record_matches(record, event_type=None, actor=None, since=None, until=None, delivery_ids=None):
+    """判断历史记录是否满足筛选条件"""
+    if delivery_ids is not None and record.get('delivery_id') not in delivery_ids:
+        return False
+    if event_type and record.get('event_type') != event_type:
+        return False
+    if actor and (record.get('summary', {}).get('actor') or '').lower() != actor.lower():
+        return False
+    timestamp = record.get('timestamp', 0)
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp > until:
+        return False
+    return True
+
+
+class HistoryStore:
+    """仓库事件历史（每个仓库一个环形缓冲区）"""
+    
+    KEY_PREFIX = "github_webhook:history"
+    PAYLOAD_PREFIX = "github_webhook:history_payload"
+    INDEX_KEY = "github_webhook:history_index"
+    
+    def __init__(self, storage, logger, max_records=100, store_payload=False):
+        """
+        初始化历史存储
+        
+        Args:
+            storage: 存储对象
+            logger: 日志记录器
+            max_records: 每个仓库最多保留的记录数
+            store_payload: 是否单独保存原始事件数据
+        """
+        self.storage = storage
+        self.logger = logger
+        self.max_records = max(1, int(max_records))
+        self.store_payload = store_payload
+        self._meta = {}  # (target_id, repo) -> {'next': 下一个序号, 'capacity': 容量}
+        self._index = None  # 全部缓冲区 {(target_id, repo)}，首次使用时加载
+    
+    def _load_index(self):
+        """
+        获取缓冲区索引（首次使用时从存储读取）
+        
+        旧版本没有索引，此时扫描一次全部键重建并保存，之后不再扫描
+        """
+        if self._index is None:
+            stored = self.storage.get(self.INDEX_KEY)
+            if stored is None:
+                stored = self._scan_buffers(self.storage.get_all_keys())
+                self.storage.set(self.INDEX_KEY, stored)
+            self._index = {tuple(item) for item in stored}
+        return self._index
+    
+    def _scan_buffers(self, keys):
+        """从存储键中找出全部缓冲区"""
+        prefix = f"{self.KEY_PREFIX}:"
+        buffers = []
+        for key in keys:
+            if not key.startswith(prefix) or not key.endswith(':meta'):
+                continue
+            target_id, _, repo = key[len(prefix):-len(':meta')].partition(':')
+            if repo:
+                buffers.append([target_id, repo])
+        return buffers
+    
+    def _base_key(self, target_id, repo):
+        return f"{self.KEY_PREFIX}:{target_id}:{repo}"
+    
+    def _get_meta(self, target_id, repo):
+        """获取缓冲区元信息（首次访问时从存储读取）"""
+        meta = self._meta.get((target_id, repo))
+        if meta is None:
+            meta = self.storage.get(f"{self._base_key(target_id, repo)}:meta") or {
+                'next': 0,
+                'capacity': self.max_records,
+            }
+            self._meta[(target_id, repo)] = meta
+        return meta
+    
+    def append(self, target_id, repo, event_type, event_data, delivery_id=None, timestamp=None):
+        """
+        追加一条历史记录
+        
+        Args:
+            target_id: 群组/用户 ID
+            repo: 仓库名称
+            event_type: 事件类型
+            event_data: 事件数据
+            delivery_id: GitHub 投递 ID（X-GitHub-Delivery）
+            timestamp: 记录时间，默认当前时间
+        
+        Returns:
+            dict: 写入的记录
+        """
+        meta = self._get_meta(target_id, repo)
+        seq = meta['next']
+        slot = seq % meta['capacity']
+        meta['next'] = seq + 1
+        
+        record = {
+            'seq': seq,
+            'event_type': event_type,
+            'timestamp': int(timestamp if timestamp is not None else time.time()),
+            'delivery_id': delivery_id,
+            'summary': summarize_event(event_type, event_data),
+        }
+        
+        base_key = self._base_key(target_id, repo)
+        items = {
+            f"{base_key}:{slot}": record,
+            f"{base_key}:meta": meta,
+        }
+        if self.store_payload:
+            items[f"{self.PAYLOAD_PREFIX}:{target_id}:{repo}:{slot}"] = {'seq': seq, 'data': event_data}
+        
+        index = self._load_index()
+        if (target_id, repo) not in index:
+            index.add((target_id, repo))
+            items[self.INDEX_KEY] = [list(buffer) for buffer in index]
+        
+        self.storage.set_multi(items)
+        return record
+    
+    async def recent(self, target_id, repo, limit=10):
+        """
+        读取最近的历史记录（最新的在前）
+        
+        Args:
+            target_id: 群组/用户 ID
+            repo: 仓库名称
+            limit: 最多读取的条数
+        
+        Returns:
+            list: 历史记录列表
+        """
+        meta = self._get_meta(target_id, repo)
+        end = meta['next']
+        start = max(0, end - min(limit, meta['capacity']))
+        if start >= end:
+            return []
+        
+        base_key = self._base_key(target_id, repo)
+        keys = [f"{base_key}:{seq % meta['capacity']}" for seq in range(end - 1, start - 1, -1)]
+        records = self.storage.get_multi(keys)
+        return [records[key] for key in keys if records.get(key)]
+    
+    async def query(self, target_id, repo, event_type=None, actor=None, since=None, until=None,
+                    delivery_ids=None, limit=PAGE_SIZE, offset=0):
+        """
+        按条件查询历史记录（最新的在前）
+        
+        环形缓冲区没有索引，读取整个缓冲区后筛选（最多 max_history_records 条）
+        
+        Args:
+            target_id: 群组/用户 ID
+            repo: 仓库名称
+            event_type: 事件类型
+            actor: 触发者
+            since: 起始时间戳
+            until: 截止时间戳
+            delivery_ids: 只返回这些投递 ID 的记录
+            limit: 最多返回的条数
+            offset: 跳过的条数
+        
+        Returns:
+            list: 历史记录列表
+        """
+        records = await self.recent(target_id, repo, self._get_meta(target_id, repo)['capacity'])
+        matched = [
+            record for record in records
+            if record_matches(record, event_type, actor, since, until, delivery_ids)
+        ]
+        return matched[offset:offset + limit]
+    
+    async def get_payload(self, target_id, repo, record):
+        """
+        读取记录对应的原始事件数据
+        
+        Args:
+            target_id: 群组/用户 ID
+            repo: 仓库名称
+            record: 历史记录
+        
+        Returns:
+            dict: 原始事件数据，未保存时返回 None
+        """
+        meta = self._get_meta(target_id, repo)
+        slot = record['seq'] % meta['capacity']
+        payload = self.storage.get(f"{self.PAYLOAD_PREFIX}:{target_id}:{repo}:{slot}")
+        
+        # 槽位可能已被后续记录覆盖
+        if not payload or payload.get('seq') != record['seq']:
+            return None
+        return payload['data']
+    
+    async def buffers(self):
+        """
+        返回全部历史缓冲区（读取索引，不扫描存储）
+        
+        Returns:
+            list: [(target_id, repo)]
+        """
+        return list(self._load_index())
+    
+    async def expire(self, target_id, repo, before):
+        """
+        删除早于指定时间的记录（及其原始事件数据）
+        
+        Args:
+            target_id: 群组/用户 ID
+            repo: 仓库名称
+            before: 时间戳，早于该时间的记录被删除
+        
+        Returns:
+            int: 删除的记录数
+        """
+        meta = self._get_meta(target_id, repo)
+        base_key = self._base_key(target_id, repo)
+        keys = [f"{base_key}:{slot}" for slot in range(meta['capacity'])]
+        records = self.storage.get_multi(keys)
+        
+        expired = [
+            key for key in keys
+            if records.get(key) and records[key].get('timestamp', 0) < before
+        ]
+        if not expired:
+            return 0
+        
+        payload_keys = [
+            f"{self.PAYLOAD_PREFIX}:{target_id}:{repo}:{key.rsplit(':', 1)[1]}"
+            for key in expired
+        ]
+        self.storage.delete_multi(expired + payload_keys)
+        return len(expired)
+    
+    async def drop(self, target_id, repo):
+        """
+        删除整个缓冲区（对应的监听已删除）
+        
+        Args:
+            target_id: 群组/用户 ID
+            repo: 仓库名称
+        """
+        meta = self._get_meta(target_id, repo)
+        base_key = self._base_key(target_id, repo)
+        keys = [f"{base_key}:meta"]
+        for slot in range(meta['capacity']):
+            keys.append(f"{base_key}:{slot}")
+            keys.append(f"{self.PAYLOAD_PREFIX}:{target_id}:{repo}:{slot}")
+        
+        self.storage.delete_multi(keys)
+        self._meta.pop((target_id, repo), None)
+        
+        index = self._load_index()
+        index.discard((target_id, repo))
+        self.storage.set(self.INDEX_KEY, [list(buffer) for buffer in index])
+    
+    async def migrate_legacy(self, target_id):
+        """
+        迁移旧版整块保存的历史记录
+        
+        Args:
+            target_id: 群组/用户 ID
+        
+        Returns:
+            int: 迁移的记录数
+        """
+        legacy_key = f"{self.KEY_PREFIX}:{target_id}"
+        all_history = self.storage.get(legacy_key)
+        if not all_history:
+            return 0
+        
+        count = 0
+        for repo, repo_history in all_history.items():
+            for record in repo_history[-self.max_records:]:
+                self.append(
+                    target_id,
+                    repo,
+                    record.get('event_type', 'unknown'),
+                    record.get('data', {}),
+                    timestamp=record.get('timestamp', 0),
+                )
+                count += 1
+        
+        self.storage.delete(legacy_key)
+        self.logger.info(f"已迁移 {target_id} 的 {count} 条旧版历史记录")
+        return count
+    
+    async def close(self):
+        """关闭历史存储（环形缓冲区直接写入存储，无需处理）"""
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """
+    基于 SQLite 的仓库事件历史
+    
+    - 按 (target_id, repo, event_type, timestamp) 建索引，筛选和分页只读取匹配的行
+    - WAL 模式，多个进程可同时读写同一个数据库文件
+    - 全部数据库操作在专用线程中执行，写入先在内存中攒批后批量插入，不阻塞事件循环
+    """
+    
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS history ("
+        "id INTEGER PRIMARY KEY, target_id TEXT NOT NULL, repo TEXT NOT NULL, "
+        "event_type TEXT NOT NULL, timestamp INTEGER NOT NULL, actor TEXT, "
+        "delivery_id TEXT, summary TEXT NOT NULL, payload TEXT)",
+        "CREATE INDEX IF NOT EXISTS history_event ON history (target_id, repo, event_type, timestamp)",
+        "CREATE INDEX IF NOT EXISTS history_time ON history (target_id, repo, timestamp)",
+    )
+    
+    COLUMNS = "id, event_type, timestamp, delivery_id, summary"
+    
+    def __init__(self, path, storage, logger, max_records=100, store_payload=False, batch_size=100, flush_interval=0.5):
+        """
+        初始化历史存储
+        
+        Args:
+            path: 数据库文件路径
+            storage: 存储对象（用于迁移旧数据）
+            logger: 日志记录器
+            max_records: 每个仓库最多保留的记录数
+            store_payload: 是否保存原始事件数据
+            batch_size: 待插入记录达到该数量时立即写入
+            flush_interval: 待插入记录在内存中最多停留的时间（秒）
+        """
+        super().__init__(storage, logger, max_records, store_payload)
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._flush_handle = None
+        self._db = None
+        self._ring_buffers = None  # 存储中待迁移的环形缓冲区
+        # 单线程执行全部数据库操作，写入与查询按提交顺序执行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ghw-history")
+        self._executor.submit(self._open).result()  # 只在启动时等待
+    
+    # ========== 数据库线程 ==========
+    
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self._db.execute(statement)
+        self.logger.info(f"历史记录: SQLite ({self.path})")
+    
+    def _insert(self, rows):
+        """批量插入并裁剪超出 max_records 的旧记录"""
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(
+                "INSERT INTO history (target_id, repo, event_type, timestamp, actor, delivery_id, summary, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            for target_id, repo in {(row[0], row[1]) for row in rows}:
+                self._db.execute(
+                    "DELETE FROM history WHERE id IN ("
+                    "SELECT id FROM history WHERE target_id = ? AND repo = ? "
+                    "ORDER BY timestamp DESC, id DESC LIMIT -1 OFFSET ?)",
+                    (target_id, repo, self.max_records),
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+    
+    def _select(self, target_id, repo, event_type=None, actor=None, since=None, until=None,
+                delivery_ids=None, limit=PAGE_SIZE, offset=0):
+        sql = f"SELECT {self.COLUMNS} FROM history WHERE target_id = ? AND repo = ?"
+        params = [target_id, repo]
+        if event_type:
+            sql += " AND event_type = ?"
+            params.append(event_type)
+        if actor:
+            sql += " AND actor = ? COLLATE NOCASE"
+            params.append(actor)
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND timestamp <= ?"
+            params.append(until)
+        if delivery_ids is not None:
+            sql += f" AND delivery_id IN ({', '.join('?' * len(delivery_ids))})"
+            params.extend(delivery_ids)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        
+        return [
+            {
+                'seq': row_id,
+                'event_type': row_event_type,
+                'timestamp': timestamp,
+                'delivery_id': delivery_id,
+                'summary': json.loads(summary),
+            }
+            for row_id, row_event_type, timestamp, delivery_id, summary in self._db.execute(sql, params)
+        ]
+    
+    async def _run(self, func, *args):
+        """在数据库线程中执行并等待结果（不阻塞事件循环）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    # ========== 写入 ==========
+    
+    def append(self, target_id, repo, event_type, event_data, delivery_id=None, timestamp=None):
+        record = {
+            'seq': None,  # 插入后由数据库分配
+            'event_type': event_type,
+            'timestamp': int(timestamp if timestamp is not None else time.time()),
+            'delivery_id': delivery_id,
+            'summary': summarize_event(event_type, event_data),
+        }
+        payload = json.dumps(event_data, ensure_ascii=False) if self.store_payload else None
+        self._pending.append((
+            target_id,
+            repo,
+            event_type,
+            record['timestamp'],
+            record['summary'].get('actor'),
+            delivery_id,
+            json.dumps(record['summary'], ensure_ascii=False),
+            payload,
+        ))
+        self._schedule_flush()
+        return record
+    
+    def _schedule_flush(self):
+        if len(self._pending) >= self.batch_size or not self.flush_interval:
+            self.flush()
+            return
+        
+        if self._flush_handle is not None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # 不在事件循环中（如启动迁移）时直接提交
+            self.flush()
+            return
+        
+        self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+    
+    def flush(self):
+        """把待插入的记录提交给数据库线程（不等待完成）"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        if not self._pending:
+            return
+        
+        rows, self._pending = self._pending, []
+        future = self._executor.submit(self._insert, rows)
+        future.add_done_callback(self._on_inserted)
+    
+    def _on_inserted(self, future):
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"写入历史记录失败: {error}")
+    
+    # ========== 读取 ==========
+    
+    async def recent(self, target_id, repo, limit=10):
+        self.flush()
+        return await self._run(self._select, target_id, repo, None, None, None, None, None, limit, 0)
+    
+    async def query(self, target_id, repo, event_type=None, actor=None, since=None, until=None,
+                    delivery_ids=None, limit=PAGE_SIZE, offset=0):
+        # 先提交待插入的记录，数据库线程按顺序执行，查询能读到刚收到的事件
+        self.flush()
+        return await self._run(
+            self._select, target_id, repo, event_type, actor, since, until, delivery_ids, limit, offset
+        )
+    
+    async def get_payload(self, target_id, repo, record):
+        row = await self._run(
+            lambda: self._db.execute(
+                "SELECT payload FROM history WHERE id = ? AND target_id = ? AND repo = ?",
+                (record['seq'], target_id, repo),
+            ).fetchone()
+        )
+        if not row or row[0] is None:
+            return None
+        return json.loads(row[0])
+    
+    # ========== 维护 ==========
+    
+    async def buffers(self):
+        """返回数据库中有记录的 (target_id, repo)"""
+        return await self._run(
+            lambda: self._db.execute("SELECT DISTINCT target_id, repo FROM history").fetchall()
+        )
+    
+    async def expire(self, target_id, repo, before):
+        return await self._run(
+            lambda: self._db.execute(
+                "DELETE FROM history WHERE target_id = ? AND repo = ? AND timestamp < ?",
+                (target_id, repo, before),
+            ).rowcount
+        )
+    
+    async def drop(self, target_id, repo):
+        await self._run(
+            lambda: self._db.execute(
+                "DELETE FROM history WHERE target_id = ? AND repo = ?", (target_id, repo)
+            )
+        )
+    
+    async def migrate_legacy(self, target_id):
+        """
+        迁移旧版整块保存的历史记录和存储中的环形缓冲区
+        
+        Args:
+            target_id: 群组/用户 ID
+        
+        Returns:
+            int: 迁移的记录数
+        """
+        count = await super().migrate_legacy(target_id)
+        
+        if self._ring_buffers is None:
+            self._ring_buffers = await HistoryStore.buffers(self)
+        
+        for buffer_target, repo in self._ring_buffers:
+            if buffer_target != target_id:
+                continue
+            
+            records = await HistoryStore.recent(self, target_id, repo, self.max_records)
+            for record in reversed(records):
+                payload = await HistoryStore.get_payload(self, target_id, repo, record) if self.store_payload else None
+                self._pending.append((
+                    target_id,
+                    repo,
+                    record.get('event_type', 'unknown'),
+                    record.get('timestamp', 0),
+                    record.get('summary', {}).get('actor'),
+                    record.get('delivery_id'),
+                    json.dumps(record.get('summary', {}), ensure_ascii=False),
+                    json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+                ))
+            self.flush()
+            await HistoryStore.drop(self, target_id, repo)
+            
+            self.logger.info(f"已迁移 {target_id} {repo} 的 {len(records)} 条历史记录到 SQLite")
+            count += len(records)
+        
+        return count
+    
+    async def close(self):
+        """写入剩余记录并关闭数据库"""
+        self.flush()
+        await self._run(self._db.close)
+        self._executor.shutdown(wait=True)
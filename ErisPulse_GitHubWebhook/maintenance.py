@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+from .dedup import DedupCache
+
+
+# 错误通知限流键前缀
+RATELIMIT_PREFIX = "github_webhook:error_ratelimit:"
+
+# 已完成旧版本遗留键的一次性扫描
+LEGACY_SCAN_KEY = "github_webhook:maintenance_legacy_scanned"
+
+# 每次批量读取/删除的键数量
+BATCH_SIZE = 100
+
+
+class StorageMaintenance:
+    """定期存储维护：清理过期去重标记、历史记录、限流键和孤立数据"""
+    
+    def __init__(self, storage, logger, dedup, history, registry, config, metrics=None, shared_state=None):
+        """
+        初始化维护任务
+        
+        Args:
+            storage: 存储对象
+            logger: 日志记录器
+            dedup: 去重缓存
+            history: 历史存储
+            registry: 配置注册表
+            config: 模块配置
+            metrics: 指标集合，为 None 时不统计
+            shared_state: 共享状态后端，为 None 时跳过
+        """
+        self.storage = storage
+        self.logger = logger
+        self.dedup = dedup
+        self.history = history
+        self.registry = registry
+        self.history_ttl = config['history_ttl'] * 86400
+        self.ratelimit_ttl = config['error_ratelimit']
+        self.slice = config['maintenance_slice_ms'] / 1000
+        self.metrics = metrics
+        self.shared_state = shared_state
+        self._slice_started = 0.0
+    
+    async def _yield(self):
+        """当前时间片用完时让出事件循环"""
+        if time.perf_counter() - self._slice_started >= self.slice:
+            await asyncio.sleep(0)
+            self._slice_started = time.perf_counter()
+    
+    async def _delete(self, keys):
+        """分批删除键"""
+        for start in range(0, len(keys), BATCH_SIZE):
+            self.storage.delete_multi(keys[start:start + BATCH_SIZE])
+            await self._yield()
+    
+    async def run(self):
+        """
+        执行一轮维护（按时间片分段执行，不会长时间占用事件循环）
+        
+        只读取已知的键（去重缓存、历史缓冲区索引、现有监听的限流键），不扫描整个存储；
+        旧版本遗留的键只在第一次运行时扫描一次
+        
+        Returns:
+            dict: 各类回收的数量
+        """
+        started = time.perf_counter()
+        self._slice_started = started
+        reclaimed = {
+            'dedup': 0,
+            'history': 0,
+            'orphan_history': 0,
+            'ratelimit': 0,
+            'legacy_dedup': 0,
+            'shared_marks': 0,
+        }
+        
+        # 过期的去重标记
+        for removed in self.dedup.purge_expired_batches(BATCH_SIZE * 10):
+            reclaimed['dedup'] += removed
+            await self._yield()
+        
+        # 超过保留期的历史记录；监听已删除的缓冲区整体删除
+        subscribed = {(c.get('target_id'), c.get('repo')) for c in self.registry.all()}
+        cutoff = time.time() - self.history_ttl
+        for target_id, repo in await self.history.buffers():
+            if (target_id, repo) not in subscribed:
+                await self.history.drop(target_id, repo)
+                reclaimed['orphan_history'] += 1
+            elif self.history_ttl:
+                reclaimed['history'] += await self.history.expire(target_id, repo, cutoff)
+            await self._yield()
+        
+        # 已过限流期的错误通知限流键（监听删除时限流键随之删除）
+        routes = {f"{c.get('target_id')}_{c.get('uuid')}" for c in self.registry.all()}
+        ratelimit_keys = [RATELIMIT_PREFIX + route for route in routes]
+        stale = []
+        now = time.time()
+        for start in range(0, len(ratelimit_keys), BATCH_SIZE):
+            batch = ratelimit_keys[start:start + BATCH_SIZE]
+            values = self.storage.get_multi(batch)
+            stale.extend(key for key in batch if key in values and now - (values[key] or 0) >= self.ratelimit_ttl)
+            await self._yield()
+        await self._delete(stale)
+        reclaimed['ratelimit'] = len(stale)
+        
+        # 旧版本遗留的逐事件去重键和已删除监听的限流键（只扫描一次）
+        if not self.storage.get(LEGACY_SCAN_KEY):
+            keys = self.storage.get_all_keys()
+            await self._yield()
+            
+            legacy_keys = [key for key in keys if key.startswith(f"{DedupCache.STORAGE_KEY}:")]
+            await self._delete(legacy_keys)
+            reclaimed['legacy_dedup'] = len(legacy_keys)
+            
+            orphans = [
+                key for key in keys
+                if key.startswith(RATELIMIT_PREFIX) and key[len(RATELIMIT_PREFIX):] not in routes
+            ]
+            await self._delete(orphans)
+            reclaimed['ratelimit'] += len(orphans)
+            
+            self.storage.set(LEGACY_SCAN_KEY, True)
+        
+        # 共享状态中过期的去重/限流标记
+        if self.shared_state:
+            reclaimed['shared_marks'] = await self.shared_state.purge_expired()
+        
+        if self.metrics:
+            for kind, count in reclaimed.items():
+                if count:
+                    self.metrics.maintenance_reclaimed.inc(count, kind=kind)
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(
+            f"存储维护完成 ({elapsed_ms:.0f}ms): 去重标记 {reclaimed['dedup']} 个, "
+            f"过期历史 {reclaimed['history']} 条, 孤立历史缓冲区 {reclaimed['orphan_history']} 个, "
+            f"限流键 {reclaimed['ratelimit']} 个, 旧版去重键 {reclaimed['legacy_dedup']} 个, "
+            f"共享标记 {reclaimed['shared_marks']} 个"
+        )
+        return reclaimed
@@ -0,0 +1,375 @@
+import time
+
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    """转义标签值"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    """格式化标签：{a="1",b="2"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指标基类"""
+    
+    TYPE = 'untyped'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        初始化指标
+        
+        Args:
+            name: 指标名
+            documentation: 说明
+            labelnames: 标签名
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+    
+    def _samples(self):
+        raise NotImplementedError
+    
+    def expose(self):
+        """导出为文本格式"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+        for suffix, key, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增计数器"""
+    
+    TYPE = 'counter'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+    
+    def inc(self, amount=1, **labels):
+        """
+        增加计数
+        
+        Args:
+            amount: 增加量
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+    
+    def get(self, **labels):
+        """返回当前计数"""
+        return self._values.get(self._key(labels), 0)
+    
+    def _samples(self):
+        for key, value in self._values.items():
+            yield '', key, None, value
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值，也可在导出时通过回调取值"""
+    
+    TYPE = 'gauge'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = None
+    
+    def set(self, value, **labels):
+        """设置当前值"""
+        self._values[self._key(labels)] = value
+    
+    def set_function(self, function):
+        """
+        导出时调用 function() 取值（仅用于无标签指标）
+        
+        Args:
+            function: 返回数值的函数
+        """
+        self._function = function
+    
+    def _samples(self):
+        if self._function is not None:
+            yield '', (), None, self._function()
+            return
+        for key, value in self._values.items():
+            yield '', key, None, value
+
+
+class Histogram(_Metric):
+    """分桶统计（累计桶 + 总和 + 次数）"""
+    
+    TYPE = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # 标签 -> [各桶计数..., 总和, 次数]
+    
+    def observe(self, value, **labels):
+        """
+        记录一次观测值
+        
+        Args:
+            value: 观测值（秒）
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[index] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+    
+    def time(self, **labels):
+        """返回计时上下文，退出时记录耗时"""
+        return _Timer(self, labels)
+    
+    def _samples(self):
+        for key, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield '_bucket', key, f'le="{_format_value(float(bound))}"', cumulative
+            yield '_bucket', key, 'le="+Inf"', state[-1]
+            yield '_sum', key, None, state[-2]
+            yield '_count', key, None, state[-1]
+
+
+class _Timer:
+    """Histogram.time() 使用的计时上下文"""
+    
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """指标注册表（文本格式导出，无外部依赖）"""
+    
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    
+    def __init__(self, prefix=''):
+        """
+        初始化注册表
+        
+        Args:
+            prefix: 指标名前缀
+        """
+        self.prefix = prefix
+        self._metrics = {}
+    
+    def _register(self, cls, name, *args, **kwargs):
+        name = self.prefix + name
+        if name in self._metrics:
+            raise ValueError(f"指标已存在: {name}")
+        metric = self._metrics[name] = cls(name, *args, **kwargs)
+        return metric
+    
+    def counter(self, name, documentation, labelnames=()):
+        """注册计数器"""
+        return self._register(Counter, name, documentation, labelnames)
+    
+    def gauge(self, name, documentation, labelnames=()):
+        """注册瞬时值"""
+        return self._register(Gauge, name, documentation, labelnames)
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """注册分桶统计"""
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+    
+    def expose(self):
+        """
+        导出全部指标
+        
+        Returns:
+            str: 文本格式的指标
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+class WebhookMetrics(MetricsRegistry):
+    """Webhook 处理流程的指标集合"""
+    
+    def __init__(self):
+        super().__init__(prefix='ghw_')
+        self.deliveries = self.counter(
+            'deliveries_total', '收到的 Webhook 投递数', ('repo', 'event'))
+        self.rejected = self.counter(
+            'rejected_total', '读取请求体前或读取中被拒绝的投递数（unsubscribed: 未订阅的事件，too_large: 超过大小上限）', ('reason',))
+        self.signature_failures = self.counter(
+            'signature_failures_total', '签名缺失或验证失败的投递数', ('repo',))
+        self.json_failures = self.counter(
+            'json_parse_failures_total', 'JSON 解析失败的投递数')
+        self.dedup_hits = self.counter(
+            'dedup_hits_total', '命中去重的投递/事件数（delivery: 按投递 ID，event: 按事件键）', ('stage',))
+        self.filtered = self.counter(
+            'filtered_total', '被订阅过滤规则丢弃的事件数', ('event',))
+        self.storage_seconds = self.histogram(
+            'storage_seconds', '存储读写耗时（秒）', ('op',))
+        self.render_seconds = self.histogram(
+            'render_seconds', '消息渲染耗时（秒，不含缓存命中）', ('event',))
+        self.send_seconds = self.histogram(
+            'send_seconds', '适配器单次发送耗时（秒）', ('platform',))
+        self.send_errors = self.counter(
+            'send_errors_total', '适配器发送失败次数（含重试）', ('platform', 'reason'))
+        self.queue_depth = self.gauge(
+            'queue_depth', '接收队列中等待处理的投递数')
+        self.stage_seconds = self.histogram(
+            'stage_seconds', '投递各处理阶段耗时（秒）', ('stage',))
+        self.maintenance_reclaimed = self.counter(
+            'maintenance_reclaimed_total', '存储维护回收的条目数', ('kind',))
+
+
+class StageTimer:
+    """单次投递的分阶段计时"""
+    
+    def __init__(self, delivery_id=None, histogram=None):
+        """
+        开始计时
+        
+        Args:
+            delivery_id: GitHub 投递 ID
+            histogram: 带 stage 标签的耗时统计，为 None 时只记录不上报
+        """
+        self.delivery_id = delivery_id
+        self.histogram = histogram
+        self.started = time.perf_counter()
+        self.stages = {}  # 阶段名 -> 累计耗时（秒），分发给多个订阅时累加
+    
+    def stage(self, name):
+        """返回计时上下文，退出时累加到指定阶段"""
+        return _StageContext(self, name)
+    
+    def add(self, name, seconds):
+        """
+        累加阶段耗时
+        
+        Args:
+            name: 阶段名
+            seconds: 耗时（秒）
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        if self.histogram is not None:
+            self.histogram.observe(seconds, stage=name)
+    
+    @property
+    def elapsed(self):
+        """从开始到现在的总耗时（秒）"""
+        return time.perf_counter() - self.started
+    
+    def record(self, **fields):
+        """
+        生成结构化记录
+        
+        Args:
+            **fields: 附加字段（仓库、事件类型等）
+        
+        Returns:
+            dict: 包含投递 ID、总耗时、最慢阶段及各阶段耗时（毫秒）
+        """
+        slowest = max(self.stages, key=self.stages.get) if self.stages else None
+        return {
+            'delivery_id': self.delivery_id,
+            **fields,
+            'total_ms': round(self.elapsed * 1000, 1),
+            'slowest_stage': slowest,
+            'stages_ms': {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()},
+        }
+
+
+class _StageContext:
+    """StageTimer.stage() 使用的计时上下文"""
+    
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class InstrumentedStorage:
+    """为存储读写计时的代理"""
+    
+    READ_METHODS = ('get', 'get_multi', 'get_all_keys')
+    WRITE_METHODS = ('set', 'set_multi', 'delete', 'delete_multi')
+    
+    def __init__(self, storage, histogram):
+        """
+        初始化代理
+        
+        Args:
+            storage: 原存储对象
+            histogram: 带 op 标签的耗时统计
+        """
+        self._storage = storage
+        for name in self.READ_METHODS:
+            self._wrap(name, histogram, 'read')
+        for name in self.WRITE_METHODS:
+            self._wrap(name, histogram, 'write')
+    
+    def _wrap(self, name, histogram, op):
+        method = getattr(self._storage, name, None)
+        if method is None:
+            return
+        
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, op=op)
+        
+        setattr(self, name, timed)
+    
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
@@ -0,0 +1,112 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # 未安装时回退到标准库
+    orjson = None
+
+
+PARSER_NAME = 'orjson' if orjson else 'json'
+
+
+def loads(body):
+    """
+    解析 JSON 请求体
+    
+    直接接收 bytes，不做额外的 decode 复制；已安装 orjson 时优先使用。
+    两种解析器的错误都是 json.JSONDecodeError 的子类。
+    
+    Args:
+        body: 请求体（bytes）
+    
+    Returns:
+        解析后的对象
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_payload(body, fields=None):
+    """
+    解码 Webhook 请求体
+    
+    Args:
+        body: 请求体（bytes）
+        fields: 需要保留的顶层字段，为 None 时返回完整数据
+    
+    Returns:
+        dict: 事件数据
+    """
+    data = loads(body)
+    if fields is None or not isinstance(data, dict):
+        return data
+    
+    return {key: data[key] for key in fields if key in data}
+
+
+def merge_fields(*groups):
+    """
+    合并多组字段声明（保持顺序去重）
+    
+    Args:
+        *groups: 字段元组
+    
+    Returns:
+        tuple: 合并后的字段
+    """
+    merged = {}
+    for group in groups:
+        for field in group:
+            merged[field] = None
+    return tuple(merged)
+
+
+class PayloadTooLarge(Exception):
+    """请求体超过大小上限"""
+
+
+async def read_body(request, limit=0):
+    """
+    流式读取请求体，超过上限时立即停止，不再继续缓冲
+    
+    Args:
+        request: 请求对象
+        limit: 最大字节数，0 表示不限制
+    
+    Returns:
+        bytes: 请求体
+    
+    Raises:
+        PayloadTooLarge: 请求体超过上限
+    """
+    if not limit:
+        return await request.body()
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise PayloadTooLarge(f"请求体超过 {limit} 字节")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def content_length_exceeds(headers, limit):
+    """
+    根据 Content-Length 判断请求体是否超过上限（无需读取请求体）
+    
+    Args:
+        headers: 请求头
+        limit: 最大字节数，0 表示不限制
+    
+    Returns:
+        bool: 声明的长度超过上限时为 True（缺少或无法解析时交给流式读取判断）
+    """
+    if not limit:
+        return False
+    try:
+        return int(headers.get('Content-Length', '')) > limit
+    except ValueError:
+        return False
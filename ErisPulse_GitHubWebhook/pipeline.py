@@ -0,0 +1,94 @@
+import asyncio
+
+
+class IngressQueue:
+    """Webhook 异步接收队列（先确认后处理）"""
+    
+    def __init__(self, processor, logger, max_size=1000, workers=4):
+        """
+        初始化接收队列
+        
+        Args:
+            processor: 处理单个投递任务的协程函数
+            logger: 日志记录器
+            max_size: 队列最大长度，超过后拒绝新的投递
+            workers: 工作协程数量
+        """
+        self.processor = processor
+        self.logger = logger
+        self.max_size = max(1, int(max_size))
+        self.worker_count = max(1, int(workers))
+        self.queue = None
+        self.workers = []
+        self.accepting = False
+    
+    @property
+    def depth(self):
+        """当前排队中的投递数量"""
+        return self.queue.qsize() if self.queue else 0
+    
+    def start(self):
+        """启动工作协程"""
+        if self.workers:
+            return
+        
+        self.queue = asyncio.Queue(maxsize=self.max_size)
+        self.workers = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.worker_count)
+        ]
+        self.accepting = True
+        self.logger.info(f"接收队列已启动: {self.worker_count} 个工作协程, 队列上限 {self.max_size}")
+    
+    def submit(self, job):
+        """
+        提交投递任务（不等待）
+        
+        Args:
+            job: 投递任务
+        
+        Returns:
+            bool: 是否成功入队，队列已满或已停止时返回 False
+        """
+        if not self.accepting:
+            return False
+        
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+        return True
+    
+    async def stop(self, timeout=10):
+        """
+        停止接收并排空队列
+        
+        Args:
+            timeout: 等待队列排空的最长时间（秒）
+        """
+        if not self.workers:
+            return
+        
+        self.accepting = False
+        
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"接收队列排空超时，丢弃 {self.queue.qsize()} 个未处理投递")
+        
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        self.logger.info("接收队列已停止")
+    
+    async def _worker(self, index):
+        """工作协程：循环取出投递并处理"""
+        while True:
+            job = await self.queue.get()
+            try:
+                await self.processor(job)
+            except Exception as e:
+                self.logger.error(f"工作协程 {index} 处理投递失败: {e}", exc_info=True)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,167 @@
+class ConfigRegistry:
+    """Webhook 订阅配置注册表（内存索引 + 写穿持久化，可选多进程共享）"""
+    
+    STORAGE_KEY = "github_webhook:configs"
+    
+    def __init__(self, storage, logger, shared=None):
+        """
+        初始化注册表
+        
+        Args:
+            storage: 存储对象
+            logger: 日志记录器
+            shared: 共享状态后端，为 None 时配置只保存在本进程的存储中
+        """
+        self.storage = storage
+        self.logger = logger
+        self.shared = shared
+        self.version = 0  # 加载时的共享配置版本号
+        self._by_uuid = {}
+        self._by_target = {}
+        self._by_repo = {}
+    
+    def __len__(self):
+        return len(self._by_uuid)
+    
+    async def load(self):
+        """
+        从存储加载全部配置并重建索引
+        
+        新索引建好后一次性替换，加载期间的请求仍使用旧索引
+        """
+        if self.shared is not None:
+            # 首次启用共享状态时导入本地配置
+            if not await self.shared.version() and await self.shared.seed_configs(self.storage.get(self.STORAGE_KEY, [])):
+                self.logger.info("已将本地 Webhook 配置导入共享状态")
+            
+            # 先读版本号再读配置：期间的修改会在下次 stale() 时发现
+            self.version = await self.shared.version()
+            configs = await self.shared.load_configs()
+        else:
+            configs = self.storage.get(self.STORAGE_KEY, [])
+        
+        by_uuid, by_target, by_repo = {}, {}, {}
+        for config in configs:
+            self._insert(config, by_uuid, by_target, by_repo)
+        self._by_uuid, self._by_target, self._by_repo = by_uuid, by_target, by_repo
+        
+        self.logger.info(f"已加载 {len(self._by_uuid)} 个 Webhook 配置")
+    
+    async def stale(self):
+        """共享配置是否已被其他进程（或本进程）修改，需要重新加载"""
+        return self.shared is not None and await self.shared.version() != self.version
+    
+    def all(self):
+        """返回全部配置"""
+        return list(self._by_uuid.values())
+    
+    def get(self, uuid):
+        """按 UUID 获取配置"""
+        return self._by_uuid.get(uuid)
+    
+    def exists(self, uuid):
+        """检查 UUID 是否已被占用"""
+        return uuid in self._by_uuid
+    
+    def by_target(self, target_id):
+        """获取某个群组/用户的全部配置（按添加顺序）"""
+        return list(self._by_target.get(target_id, {}).values())
+    
+    def by_repo(self, repo):
+        """获取订阅某个仓库的全部配置"""
+        return list(self._by_repo.get(repo, {}).values())
+    
+    async def add(self, config):
+        """
+        添加配置并持久化
+        
+        Args:
+            config: 配置数据，必须包含 uuid
+        """
+        self._index(config)
+        await self._persist(put=config)
+    
+    async def remove(self, uuid):
+        """
+        删除配置并持久化
+        
+        Args:
+            uuid: 配置 UUID
+        
+        Returns:
+            dict: 被删除的配置，不存在时返回 None
+        """
+        config = self._by_uuid.pop(uuid, None)
+        if config is None:
+            return None
+        
+        self._unindex(self._by_target, config.get('target_id'), uuid)
+        self._unindex(self._by_repo, config.get('repo'), uuid)
+        await self._persist(delete=uuid)
+        return config
+    
+    async def update(self, uuid, **fields):
+        """
+        更新配置字段并持久化
+        
+        Args:
+            uuid: 配置 UUID
+            **fields: 要更新的字段
+        
+        Returns:
+            dict: 更新后的配置，不存在时返回 None
+        """
+        config = self._by_uuid.get(uuid)
+        if config is None:
+            return None
+        
+        self._unindex(self._by_target, config.get('target_id'), uuid)
+        self._unindex(self._by_repo, config.get('repo'), uuid)
+        config.update(fields)
+        self._index(config)
+        await self._persist(put=config)
+        return config
+    
+    def _index(self, config):
+        """将配置加入各索引"""
+        self._insert(config, self._by_uuid, self._by_target, self._by_repo)
+    
+    @staticmethod
+    def _insert(config, by_uuid, by_target, by_repo):
+        """将配置加入指定的索引"""
+        uuid = config['uuid']
+        by_uuid[uuid] = config
+        by_target.setdefault(config.get('target_id'), {})[uuid] = config
+        by_repo.setdefault(config.get('repo'), {})[uuid] = config
+    
+    @staticmethod
+    def _unindex(index, key, uuid):
+        """从二级索引中移除配置"""
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(uuid, None)
+        if not bucket:
+            del index[key]
+    
+    async def _persist(self, put=None, delete=None):
+        """
+        写穿到存储
+        
+        共享模式下只写入变化的那一条配置，多个进程同时修改不同配置时互不覆盖。
+        版本号恰好只因本次修改而递增时同步本地版本号，本进程的修改不触发重新加载；
+        期间有其他进程的修改时保留旧版本号，由下次 stale() 发现后重新加载
+        """
+        if self.shared is None:
+            self.storage.set(self.STORAGE_KEY, list(self._by_uuid.values()))
+            return
+        
+        if put is not None:
+            version = await self.shared.put_config(put)
+        elif delete is not None:
+            version = await self.shared.delete_config(delete)
+        else:
+            return
+        
+        if version == self.version + 1:
+            self.version = version
@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+from .history import parse_history_args
+from .utils import format_timestamp
+
+
+# dry run 时回复中预览的消息条数
+PREVIEW_COUNT = 3
+
+
+def parse_replay_args(args, now=None):
+    """
+    解析 /ghw_replay 的参数
+    
+    在 /ghw_history 筛选参数的基础上支持：delivery=投递ID[,投递ID...]、dry（只渲染不发送）
+    
+    Args:
+        args: 命令参数列表
+        now: 当前时间戳，默认当前时间
+    
+    Returns:
+        dict: event_type、actor、since、until、delivery_ids、dry_run
+    
+    Raises:
+        ValueError: 参数无效或缺少时间范围/投递 ID（消息可直接回复给用户）
+    """
+    delivery_ids = None
+    dry_run = False
+    rest = []
+    for arg in args:
+        key, sep, value = arg.partition('=')
+        if key.lower() in ('dry', 'dry_run', 'dry-run') and not sep:
+            dry_run = True
+        elif key.lower() == 'delivery' and sep:
+            delivery_ids = [item.strip() for item in value.split(',') if item.strip()]
+            if not delivery_ids:
+                raise ValueError("delivery 不能为空")
+        else:
+            rest.append(arg)
+    
+    filters = parse_history_args(rest, now)
+    if filters.pop('page') != 1:
+        raise ValueError("重放不支持 page 参数")
+    if filters['since'] is None and delivery_ids is None:
+        raise ValueError("请指定时间范围（since=）或投递 ID（delivery=）")
+    
+    filters['delivery_ids'] = delivery_ids
+    filters['dry_run'] = dry_run
+    return filters
+
+
+class HistoryReplayer:
+    """从历史记录重放事件（重新渲染并发送，跳过去重）"""
+    
+    def __init__(self, history, render, send, logger, rate=1, batch_size=10, max_records=500):
+        """
+        初始化重放器
+        
+        Args:
+            history: 历史存储（需开启 history_store_payload）
+            render: render(config, event_type, event_data) -> 消息文本，未知事件返回 None
+            send: async send(platform, target_type, target_id, message) -> 是否成功
+            logger: 日志记录器
+            rate: 平均每秒发送的消息数
+            batch_size: 每批连续发送的消息数，批与批之间等待以满足 rate
+            max_records: 单次重放最多的记录数
+        """
+        self.history = history
+        self.render = render
+        self.send = send
+        self.logger = logger
+        self.rate = rate
+        self.batch_size = max(1, int(batch_size))
+        self.max_records = max(1, int(max_records))
+    
+    async def select(self, target_id, repo, event_type=None, actor=None, since=None, until=None, delivery_ids=None):
+        """
+        选出要重放的记录（按时间从早到晚）
+        
+        Args:
+            target_id: 群组/用户 ID
+            repo: 仓库名称
+            event_type: 事件类型
+            actor: 触发者
+            since: 起始时间戳
+            until: 截止时间戳
+            delivery_ids: 投递 ID 列表
+        
+        Returns:
+            list: 历史记录列表
+        
+        Raises:
+            ValueError: 匹配的记录超过 max_records
+        """
+        records = await self.history.query(
+            target_id, repo, event_type, actor, since, until, delivery_ids,
+            limit=self.max_records + 1,
+        )
+        if len(records) > self.max_records:
+            raise ValueError(f"匹配的记录超过 {self.max_records} 条，请缩小时间范围")
+        records.reverse()
+        return records
+    
+    async def replay(self, config, records, dry_run=False):
+        """
+        重放记录
+        
+        Args:
+            config: 订阅配置（发送目标和模板）
+            records: select() 选出的记录
+            dry_run: 只渲染不发送
+        
+        Returns:
+            dict: sent、failed、skipped（缺少原始数据或无法渲染）、messages（dry run 时的渲染结果）
+        """
+        target_id = config['target_id']
+        repo = config.get('repo', 'unknown')
+        result = {'sent': 0, 'failed': 0, 'skipped': 0, 'messages': []}
+        
+        for start in range(0, len(records), self.batch_size):
+            batch_started = time.monotonic()
+            batch = records[start:start + self.batch_size]
+            
+            for record in batch:
+                event_data = await self.history.get_payload(target_id, repo, record)
+                message = self.render(config, record['event_type'], event_data) if event_data is not None else None
+                if not message:
+                    result['skipped'] += 1
+                    continue
+                
+                message = f"[重放 {format_timestamp(record['timestamp'])}]\n{message}"
+                if dry_run:
+                    result['messages'].append(message)
+                    continue
+                
+                sent = await self.send(config.get('platform'), config.get('target_type'), target_id, message)
+                result['sent' if sent else 'failed'] += 1
+            
+            # 按 rate 控制整体速度，避免大量积压一次性发到平台
+            if not dry_run and self.rate and start + self.batch_size < len(records):
+                await asyncio.sleep(max(0.0, len(batch) / self.rate - (time.monotonic() - batch_started)))
+        
+        self.logger.info(
+            f"重放{'（dry run）' if dry_run else ''} {repo} -> {target_id}: "
+            f"{len(records)} 条记录，发送 {result['sent']}，失败 {result['failed']}，跳过 {result['skipped']}"
+        )
+        return result
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SharedState(ABC):
+    """
+    多进程共享状态后端接口
+    
+    多个 worker/副本同时运行时，去重标记、订阅配置和错误通知限流需要在进程间共享：
+        - mark/seen：带过期时间的一次性标记（去重、限流）
+        - load_configs/put_config/delete_config：订阅配置
+        - version：配置版本号，任何进程修改配置后递增，其他进程轮询发现变化后重新加载
+    
+    接口均为协程，后端的阻塞操作（如等待其他进程释放锁）不能占用事件循环
+    """
+    
+    @abstractmethod
+    async def mark(self, key, ttl):
+        """
+        原子地标记键（已有未过期的标记时不修改）
+        
+        Args:
+            key: 标记键
+            ttl: 有效期（秒）
+        
+        Returns:
+            bool: 本次新标记返回 True，已被标记返回 False
+        """
+    
+    @abstractmethod
+    async def seen(self, key):
+        """键是否已被标记且未过期"""
+    
+    @abstractmethod
+    async def load_configs(self):
+        """返回全部订阅配置（按添加顺序）"""
+    
+    @abstractmethod
+    async def seed_configs(self, configs):
+        """
+        共享状态中还没有配置时导入（首次启用共享状态时迁移本地配置）
+        
+        Returns:
+            bool: 是否导入
+        """
+    
+    @abstractmethod
+    async def put_config(self, config):
+        """
+        添加或更新一个订阅配置
+        
+        Returns:
+            int: 修改后的配置版本号
+        """
+    
+    @abstractmethod
+    async def delete_config(self, uuid):
+        """
+        删除一个订阅配置
+        
+        Returns:
+            int: 修改后的配置版本号
+        """
+    
+    @abstractmethod
+    async def version(self):
+        """配置版本号（从未写入时为 0）"""
+    
+    @abstractmethod
+    async def purge_expired(self):
+        """清理过期标记，返回清理的数量"""
+    
+    async def close(self):
+        """关闭后端"""
+
+
+class SQLiteState(SharedState):
+    """
+    基于 SQLite 的共享状态（同一主机上的多个进程共用一个数据库文件）
+    
+    使用 WAL 模式，读写互不阻塞；标记和配置修改都是单条语句或短事务，
+    由 SQLite 的文件锁保证跨进程原子性。
+    全部数据库操作在专用线程中执行，等待其他进程的写锁时不阻塞事件循环。
+    """
+    
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS marks (key TEXT PRIMARY KEY, expires REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS configs (uuid TEXT PRIMARY KEY, data TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS marks_expires ON marks (expires)",
+    )
+    
+    def __init__(self, path, logger, busy_timeout=5):
+        """
+        打开（必要时创建）数据库
+        
+        Args:
+            path: 数据库文件路径
+            logger: 日志记录器
+            busy_timeout: 等待其他进程释放写锁的最长时间（秒）
+        """
+        self.path = path
+        self.logger = logger
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # 自动提交模式，需要多条语句原子执行时显式 BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self._db.execute(statement)
+        
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ghw-state")
+        
+        self.logger.info(f"共享状态: SQLite ({path})")
+    
+    async def _run(self, func, *args):
+        """在数据库线程中执行并等待结果"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    def _transaction(self, statements):
+        """在一个写事务中执行多条语句，递增并返回配置版本号"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                self._db.execute(sql, params)
+            self._db.execute(
+                "INSERT INTO meta (name, value) VALUES ('configs_version', 1) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + 1"
+            )
+            version = self._version()
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return version
+    
+    # ========== 标记 ==========
+    
+    async def mark(self, key, ttl):
+        return await self._run(self._mark, key, ttl)
+    
+    def _mark(self, key, ttl):
+        now = time.time()
+        cursor = self._db.execute(
+            "INSERT INTO marks (key, expires) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET expires = excluded.expires WHERE marks.expires <= ?",
+            (key, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+    
+    async def seen(self, key):
+        return await self._run(self._seen, key)
+    
+    def _seen(self, key):
+        row = self._db.execute(
+            "SELECT 1 FROM marks WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+    
+    async def purge_expired(self):
+        return await self._run(self._purge_expired)
+    
+    def _purge_expired(self):
+        cursor = self._db.execute("DELETE FROM marks WHERE expires <= ?", (time.time(),))
+        return cursor.rowcount
+    
+    # ========== 配置 ==========
+    
+    async def load_configs(self):
+        return await self._run(self._load_configs)
+    
+    def _load_configs(self):
+        rows = self._db.execute("SELECT data FROM configs ORDER BY rowid").fetchall()
+        return [json.loads(data) for (data,) in rows]
+    
+    async def seed_configs(self, configs):
+        return await self._run(self._seed_configs, configs)
+    
+    def _seed_configs(self, configs):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            # 其他进程可能已经导入
+            if self._db.execute("SELECT 1 FROM meta WHERE name = 'configs_version'").fetchone():
+                self._db.execute("ROLLBACK")
+                return False
+            
+            self._db.executemany(
+                "INSERT OR REPLACE INTO configs (uuid, data) VALUES (?, ?)",
+                [(config['uuid'], json.dumps(config, ensure_ascii=False)) for config in configs],
+            )
+            self._db.execute("INSERT INTO meta (name, value) VALUES ('configs_version', 1)")
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return True
+    
+    async def put_config(self, config):
+        return await self._run(self._put_config, config)
+    
+    def _put_config(self, config):
+        # 保留原 rowid，更新后不改变添加顺序
+        return self._transaction([(
+            "INSERT INTO configs (uuid, data) VALUES (?, ?) "
+            "ON CONFLICT (uuid) DO UPDATE SET data = excluded.data",
+            (config['uuid'], json.dumps(config, ensure_ascii=False)),
+        )])
+    
+    async def delete_config(self, uuid):
+        return await self._run(self._delete_config, uuid)
+    
+    def _delete_config(self, uuid):
+        return self._transaction([("DELETE FROM configs WHERE uuid = ?", (uuid,))])
+    
+    async def version(self):
+        return await self._run(self._version)
+    
+    def _version(self):
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'configs_version'").fetchone()
+        return row[0] if row else 0
+    
+    async def close(self):
+        await self._run(self._db.close)
+        self._executor.shutdown(wait=True)
+
+
+# 可用的共享状态后端（local 表示单进程，不使用共享状态）
+BACKENDS = {
+    'sqlite': SQLiteState,
+}
+
+
+def create_shared_state(config, logger):
+    """
+    按配置创建共享状态后端
+    
+    Args:
+        config: 模块配置（state_backend、state_path）
+        logger: 日志记录器
+    
+    Returns:
+        SharedState: 单进程模式（local）时返回 None
+    """
+    backend = config['state_backend']
+    if backend == 'local':
+        return None
+    
+    cls = BACKENDS.get(backend)
+    if cls is None:
+        logger.error(f"未知的共享状态后端: {backend}，使用单进程模式")
+        return None
+    
+    return cls(config['state_path'], logger)
@@ -0,0 +1,73 @@
+import hashlib
+import hmac
+
+
+# 签名请求头 -> (算法, 摘要函数)，按优先级排列
+SIGNATURE_HEADERS = (
+    ('X-Hub-Signature-256', 'sha256', hashlib.sha256),
+    ('X-Hub-Signature', 'sha1', hashlib.sha1),  # 旧版 Webhook
+)
+
+
+def parse_signature_headers(headers):
+    """
+    从请求头中取出签名（无需读取请求体）
+    
+    Args:
+        headers: 请求头
+    
+    Returns:
+        tuple: (算法, 十六进制摘要)，缺少或格式错误时返回 None
+    """
+    for header, algorithm, _ in SIGNATURE_HEADERS:
+        value = headers.get(header, '')
+        if not value:
+            continue
+        
+        prefix, _, digest = value.partition('=')
+        if prefix != algorithm or not digest:
+            return None
+        return algorithm, digest
+    
+    return None
+
+
+class SignatureVerifier:
+    """Webhook 签名验证器（预先计算密钥化的 HMAC 状态）"""
+    
+    def __init__(self, secret):
+        """
+        初始化验证器
+        
+        Args:
+            secret: Webhook 密钥
+        """
+        self.secret = secret
+        key = secret.encode('utf-8')
+        self._templates = {
+            algorithm: hmac.new(key, digestmod=digestmod)
+            for _, algorithm, digestmod in SIGNATURE_HEADERS
+        }
+    
+    def verify(self, payload, algorithm, digest):
+        """
+        验证签名
+        
+        Args:
+            payload: 请求体（bytes）
+            algorithm: 签名算法（sha256 / sha1）
+            digest: 请求头中的十六进制摘要
+        
+        Returns:
+            bool: 签名是否有效
+        """
+        template = self._templates.get(algorithm)
+        if template is None:
+            return False
+        
+        # 复制已处理过密钥的状态，避免每次重新计算密钥填充
+        mac = template.copy()
+        mac.update(payload)
+        
+        # 使用恒定时间比较防止时序攻击
+        return hmac.compare_digest(mac.hexdigest(), digest)
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 待写入队列中表示删除的标记
+_DELETED = object()
+
+
+class StorageAccess:
+    """
+    存储访问层（写后缓冲）
+    
+    - 按键加锁：在 lock(key) 内读-改-写，同一个键的更新不会交错
+    - 写后缓冲：写入先进入内存，write_delay 到期或待写入键数达到 max_pending 时
+      合并为一次 set_multi/delete_multi 落盘
+    - 读己之写：尚未落盘的写入对 get/get_multi/get_all_keys 立即可见
+    - 崩溃保护（可选）：写入同时交给日志线程追加到日志文件，落盘后清空；启动时 recover() 重放未落盘的写入
+    """
+    
+    def __init__(self, storage, logger, write_delay=0.005, max_pending=1000, journal=None, journal_fsync=False):
+        """
+        初始化存储访问层
+        
+        Args:
+            storage: 底层存储对象
+            logger: 日志记录器
+            write_delay: 写入在内存中最多停留的时间（秒），0 表示直接写入
+            max_pending: 待写入键数达到该值时立即落盘
+            journal: 崩溃保护日志文件路径，为 None 时不记录
+            journal_fsync: 每批追加日志后是否 fsync（更安全但更慢，在日志线程中执行）
+        """
+        self.storage = storage
+        self.logger = logger
+        self.write_delay = write_delay
+        self.max_pending = max(1, int(max_pending))
+        self.journal = journal
+        self.journal_fsync = journal_fsync
+        self._journal_file = None  # 只在日志线程中访问
+        # 单线程按提交顺序执行日志的追加和清空，事件循环只负责编码和提交
+        self._journal_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="ghw-journal") if journal else None
+        )
+        self._pending = {}  # 键 -> 待写入的值（_DELETED 表示删除）
+        self._flush_handle = None
+        self._locks = weakref.WeakValueDictionary()
+    
+    # ========== 读取 ==========
+    
+    def get(self, key, default=None):
+        """读取键值（优先返回尚未落盘的写入）"""
+        if key in self._pending:
+            value = self._pending[key]
+            return default if value is _DELETED else value
+        return self.storage.get(key, default)
+    
+    def get_multi(self, keys):
+        """批量读取，返回存在的键值"""
+        missing = [key for key in keys if key not in self._pending]
+        result = self.storage.get_multi(missing) if missing else {}
+        for key in keys:
+            value = self._pending.get(key, _DELETED)
+            if value is not _DELETED:
+                result[key] = value
+        return result
+    
+    def get_all_keys(self):
+        """返回全部键（包含尚未落盘的写入）"""
+        keys = set(self.storage.get_all_keys())
+        for key, value in self._pending.items():
+            if value is _DELETED:
+                keys.discard(key)
+            else:
+                keys.add(key)
+        return list(keys)
+    
+    # ========== 写入 ==========
+    
+    def set(self, key, value):
+        """写入键值（缓冲后落盘）"""
+        return self.set_multi({key: value})
+    
+    def set_multi(self, items):
+        """批量写入"""
+        self._write_journal(list(items.items()))
+        self._pending.update(items)
+        self._schedule_flush()
+        return True
+    
+    def delete(self, key):
+        """删除键"""
+        return self.delete_multi([key])
+    
+    def delete_multi(self, keys):
+        """批量删除"""
+        keys = list(keys)
+        self._write_journal([(key, _DELETED) for key in keys])
+        for key in keys:
+            self._pending[key] = _DELETED
+        self._schedule_flush()
+        return True
+    
+    def _schedule_flush(self):
+        if not self.write_delay or len(self._pending) >= self.max_pending:
+            self.flush()
+            return
+        
+        if self._flush_handle is not None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # 不在事件循环中（如同步调用）时直接写入
+            self.flush()
+            return
+        
+        self._flush_handle = loop.call_later(self.write_delay, self.flush)
+    
+    def flush(self):
+        """
+        立即将待写入的数据落盘
+        
+        Returns:
+            int: 落盘的键数量
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        if not self._pending:
+            return 0
+        
+        pending, self._pending = self._pending, {}
+        updates = {key: value for key, value in pending.items() if value is not _DELETED}
+        deletes = [key for key, value in pending.items() if value is _DELETED]
+        
+        try:
+            if updates:
+                self.storage.set_multi(updates)
+            if deletes:
+                self.storage.delete_multi(deletes)
+        except Exception as e:
+            # 写入失败时放回队列（不覆盖期间的新写入），下次再试
+            self.logger.error(f"存储写入失败（{len(pending)} 个键），稍后重试: {e}")
+            for key, value in pending.items():
+                self._pending.setdefault(key, value)
+            if self.write_delay:
+                self._schedule_flush()
+            return 0
+        
+        self._truncate_journal()
+        return len(pending)
+    
+    def close(self):
+        """落盘全部待写入数据并关闭日志文件"""
+        self.flush()
+        if self._journal_executor is not None:
+            self._journal_executor.submit(self._close_journal)
+            self._journal_executor.shutdown(wait=True)
+            self._journal_executor = None
+    
+    # ========== 崩溃保护日志 ==========
+    
+    def _write_journal(self, items):
+        """
+        编码写入并交给日志线程追加到日志（不等待完成）
+        
+        每行一个 JSON：{"k": 键, "v": 值} 或 {"k": 键, "d": 1}。
+        在调用方线程中立即编码：调用方之后会原地修改值（如注册表中的配置），
+        在日志线程中编码会与修改并发而失败
+        """
+        if self._journal_executor is None:
+            return
+        
+        lines = []
+        for key, value in items:
+            entry = {'k': key, 'd': 1} if value is _DELETED else {'k': key, 'v': value}
+            lines.append(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        
+        self._journal_executor.submit(self._append_journal, lines).add_done_callback(self._on_journal_done)
+    
+    def _on_journal_done(self, future):
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"写入崩溃保护日志失败: {error}")
+    
+    def _append_journal(self, lines):
+        """在日志线程中追加已编码的行"""
+        if self._journal_file is None:
+            directory = os.path.dirname(self.journal)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._journal_file = open(self.journal, 'a', encoding='utf-8')
+        
+        self._journal_file.writelines(lines)
+        self._journal_file.flush()
+        if self.journal_fsync:
+            os.fsync(self._journal_file.fileno())
+    
+    def _truncate_journal(self):
+        """数据已落盘，清空日志（排在之前提交的追加之后执行）"""
+        if self._journal_executor is not None:
+            self._journal_executor.submit(self._truncate_journal_file).add_done_callback(self._on_journal_done)
+    
+    def _truncate_journal_file(self):
+        if self._journal_file is not None:
+            self._journal_file.seek(0)
+            self._journal_file.truncate()
+    
+    def _close_journal(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+    
+    def recover(self):
+        """
+        重放上次未落盘的写入（启动时调用）
+        
+        Returns:
+            int: 重放的写入数
+        """
+        if not self.journal or not os.path.exists(self.journal):
+            return 0
+        
+        count = 0
+        with open(self.journal, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 崩溃时写了一半的行
+                
+                self._pending[entry['k']] = _DELETED if entry.get('d') else entry.get('v')
+                count += 1
+        
+        if count:
+            self.logger.warning(f"从崩溃保护日志恢复 {count} 条未落盘的写入")
+        
+        # 落盘后清空日志
+        if self.flush() or not count:
+            with open(self.journal, 'w', encoding='utf-8'):
+                pass
+        return count
+    
+    # ========== 加锁 ==========
+    
+    def lock(self, key):
+        """
+        获取键的异步锁
+        
+        Args:
+            key: 存储键
+        
+        Returns:
+            asyncio.Lock: 同一个键返回同一把锁（无人持有时自动回收）
+        """
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
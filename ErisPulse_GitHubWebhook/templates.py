@@ -0,0 +1,147 @@
+from string import Formatter
+
+
+class CompiledTemplate:
+    """
+    预编译的消息模板
+    
+    模板按行编译，使用 str.format 风格的 {字段} 占位符（只支持简单字段名和格式说明）。
+    渲染规则：
+        - 引用了可选字段（由处理器的 OPTIONAL_FIELDS 指定）且该字段为 None 的行整行省略
+        - 其他字段原样格式化（值为 None 时显示 None，与 f-string 一致）
+        - 连续空行合并为一行，首尾空行去掉
+    
+    相邻的不含可选字段的行合并为一段，用一次 format_map 渲染；
+    模板中没有可选字段时整个模板只有一段。
+    """
+    
+    def __init__(self, source, fields=None, optional=()):
+        """
+        编译模板
+        
+        Args:
+            source: 模板文本
+            fields: 可用字段名集合，为 None 时不检查
+            optional: 可选字段名集合
+        
+        Raises:
+            ValueError: 模板语法错误、使用了不支持的占位符或未知字段
+        """
+        self.source = source
+        optional = frozenset(optional)
+        
+        # 段：(format_map, 引用的可选字段)，空行为 (None, ())
+        self.segments = []
+        chunk = []  # 待合并的必显示行
+        for line in source.strip('\n').split('\n') + ['']:
+            referenced = self._parse_fields(line)
+            if fields is not None:
+                for field in referenced:
+                    if field not in fields:
+                        raise ValueError(f"未知的模板字段: {{{field}}}")
+            
+            optional_fields = tuple(field for field in referenced if field in optional)
+            if line and not optional_fields:
+                chunk.append(line)
+                continue
+            
+            if chunk:
+                self.segments.append(('\n'.join(chunk).format_map, ()))
+                chunk = []
+            self.segments.append((line.format_map, optional_fields) if line else (None, ()))
+        self.segments.pop()  # 末尾追加的空行只用于收尾合并
+        
+        # 只有一段且没有可选字段时直接 format_map
+        if len(self.segments) == 1 and not self.segments[0][1]:
+            self.render = self.segments[0][0]
+    
+    @staticmethod
+    def _parse_fields(line):
+        """返回行中引用的字段名"""
+        fields = []
+        for _, field, _, conversion in Formatter().parse(line):
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"不支持的模板占位符: {{{field}}}")
+            if conversion:
+                raise ValueError(f"不支持的模板转换: {{{field}!{conversion}}}")
+            fields.append(field)
+        return fields
+    
+    def render(self, context):
+        """
+        渲染模板
+        
+        Args:
+            context: 字段值字典
+        
+        Returns:
+            str: 渲染结果
+        """
+        out = []
+        blank = True  # 去掉开头空行
+        for format_map, optional_fields in self.segments:
+            if format_map is None:
+                if not blank:
+                    out.append('')
+                    blank = True
+                continue
+            
+            for field in optional_fields:
+                if context[field] is None:
+                    break
+            else:
+                out.append(format_map(context))
+                blank = False
+        
+        if out and out[-1] == '':
+            out.pop()
+        return '\n'.join(out)
+
+
+class TemplateRegistry:
+    """用户自定义模板（加载时一次性编译）"""
+    
+    def __init__(self, templates, logger, handlers=None):
+        """
+        编译配置中的全部模板
+        
+        Args:
+            templates: {模板名: {事件类型: 模板文本}}
+            logger: 日志记录器
+            handlers: {事件类型: 处理器}，用于检查字段名和确定可选字段
+        """
+        self.logger = logger
+        self._templates = {}
+        handlers = handlers or {}
+        
+        for name, sources in (templates or {}).items():
+            for event_type, source in sources.items():
+                handler = handlers.get(event_type)
+                try:
+                    if not isinstance(source, str):
+                        raise ValueError("模板必须是字符串")
+                    self._templates[(name, event_type)] = CompiledTemplate(
+                        source,
+                        fields=handler.build_context({}).keys() if handler else None,
+                        optional=handler.OPTIONAL_FIELDS if handler else (),
+                    )
+                except ValueError as e:
+                    self.logger.error(f"模板编译失败 {name}.{event_type}: {e}")
+        
+        if self._templates:
+            self.logger.info(f"已编译 {len(self._templates)} 个自定义模板")
+    
+    def get(self, name, event_type):
+        """
+        获取模板
+        
+        Args:
+            name: 模板名
+            event_type: 事件类型
+        
+        Returns:
+            CompiledTemplate: 未定义时返回 None（使用处理器默认格式）
+        """
+        return self._templates.get((name, event_type))
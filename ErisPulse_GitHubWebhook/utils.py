@@ -1,5 +1,5 @@
 import hashlib
-import hmac
+import json
 import uuid
 from datetime import datetime
 
@@ -9,32 +9,9 @@ def generate_uuid_short(length=4):
     return uuid.uuid4().hex[:length]
 
 
-def verify_signature(payload, signature, secret):
-    """
-    验证 GitHub Webhook 签名
-    
-    Args:
-        payload: 请求体（bytes）
-        signature: 请求头中的签名（格式: sha256=...）
-        secret: Webhook 密钥
-    
-    Returns:
-        bool: 签名是否有效
-    """
-    if not signature or not secret:
-        return False
-    
-    if not signature.startswith('sha256='):
-        return False
-    
-    hash_algorithm, github_signature = signature.split('=', 1)
-    
-    # 计算 HMAC-SHA256
-    mac = hmac.new(secret.encode('utf-8'), msg=payload, digestmod=hashlib.sha256)
-    expected_signature = mac.hexdigest()
-    
-    # 使用恒定时间比较防止时序攻击
-    return hmac.compare_digest(expected_signature, github_signature)
+def repo_endpoint_key(repo):
+    """生成仓库共享入口的路径键"""
+    return hashlib.sha1(repo.encode('utf-8')).hexdigest()[:12]
 
 
 def format_timestamp(timestamp):
@@ -53,48 +30,52 @@ def truncate_text(text, max_length=50):
     return text[:max_length-3] + '...'
 
 
-def get_event_key(repo, event_type, event_data):
+def get_event_key(repo, event_type, event_data, delivery_id=None, extractor=None):
     """
     生成事件唯一标识
     
+    优先使用 X-GitHub-Delivery（GitHub 重新投递时保持不变）；
+    缺少该请求头时，对处理器声明的规范字段做内容哈希。
+    
     Args:
         repo: 仓库名称
         event_type: 事件类型
         event_data: 事件数据
+        delivery_id: GitHub 投递 ID
+        extractor: 规范字段提取函数（各处理器的 event_key）
     
     Returns:
-        str: 事件唯一键
+        str: 事件唯一键，无法生成时返回 None
     """
-    if event_type == 'push':
-        # 使用最新的 commit id
-        head_commit = event_data.get('head_commit', {})
-        commit_id = head_commit.get('id', event_data.get('after', ''))
-        return f"{repo}:push:{commit_id}"
-    
-    elif event_type in ['issues', 'pull_request']:
-        # 使用 issue/PR 的 number 和 action
-        number = event_data.get('number', '')
-        action = event_data.get('action', '')
-        return f"{repo}:{event_type}:{number}:{action}"
+    if delivery_id:
+        return get_delivery_key(delivery_id)
     
-    elif event_type == 'release':
-        # 使用 tag 名称
-        tag_name = event_data.get('tag_name', '')
-        action = event_data.get('action', 'published')
-        return f"{repo}:release:{tag_name}:{action}"
+    if extractor is None:
+        return None
     
-    elif event_type in ['star', 'fork']:
-        # 使用操作者和时间戳
-        sender = event_data.get('sender', {})
-        sender_id = sender.get('id', '')
-        timestamp = event_data.get('repository', {}).get('updated_at', '')
-        return f"{repo}:{event_type}:{sender_id}:{timestamp}"
+    canonical = json.dumps(extractor(event_data), separators=(',', ':'), ensure_ascii=False, default=str)
+    digest = hashlib.blake2b(canonical.encode('utf-8'), digest_size=10).hexdigest()
+    return f"{repo}:{event_type}:{digest}"
+
+
+def classify_event(event_type, events):
+    """
+    按请求头快速分类投递（无需读取请求体）
     
-    elif event_type == 'workflow_run':
-        # 使用 run_id 和 action
-        workflow_run = event_data.get('workflow_run', {})
-        run_id = workflow_run.get('id', '')
-        action = event_data.get('action', '')
-        return f"{repo}:workflow_run:{run_id}:{action}"
+    Args:
+        event_type: X-GitHub-Event
+        events: 订阅的事件类型
     
-    return None
+    Returns:
+        str: ping（创建 Webhook 时的连通性检查）、unsubscribed（未订阅，直接忽略）或 process（正常处理）
+    """
+    if event_type == 'ping':
+        return 'ping'
+    if event_type not in events:
+        return 'unsubscribed'
+    return 'process'
+
+
+def get_delivery_key(delivery_id):
+    """由 X-GitHub-Delivery 生成去重键（无需解析请求体）"""
+    return f"delivery:{delivery_id}"
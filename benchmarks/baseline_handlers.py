@@ -0,0 +1,427 @@
+"""
+bench_render.py 的对照组：重构前（模板化之前）各处理器的 format_message，原样保留
+
+只供基准测试比较耗时和检查默认格式输出是否一致，不被模块使用
+"""
+
+
+def truncate_text(text, max_length=50):
+    """截断文本"""
+    if len(text) <= max_length:
+        return text
+    return text[:max_length-3] + '...'
+
+
+class PushHandler:
+    """Push 事件处理器"""
+    
+    @staticmethod
+    def format_message(event_data):
+        """
+        格式化 Push 事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        repo = event_data.get('repository', {})
+        repo_name = repo.get('full_name', 'unknown/repo')
+        ref = event_data.get('ref', '').replace('refs/heads/', '')
+        pusher = event_data.get('pusher', {}).get('name', 'unknown')
+        commits = event_data.get('commits', [])
+        
+        msg = f"[GitHub] Push 到 {repo_name}\n"
+        msg += f"分支: {ref}\n"
+        msg += f"推送者: {pusher}\n"
+        msg += f"提交数: {len(commits)}\n\n"
+        
+        # 显示提交信息（最多5条）
+        for commit in commits[:5]:
+            commit_msg = commit.get('message', '')
+            commit_id = commit.get('id', '')[:7]
+            msg += f"- {truncate_text(commit_msg)} ({commit_id})\n"
+        
+        # 如果有更多提交
+        if len(commits) > 5:
+            msg += f"\n还有 {len(commits) - 5} 条提交未显示...\n"
+        
+        # 添加对比链接
+        compare_url = event_data.get('compare', '')
+        if compare_url:
+            msg += f"\n查看对比: {compare_url}"
+        
+        return msg
+
+
+class IssuesHandler:
+    """Issues 事件处理器"""
+    
+    @staticmethod
+    def format_message(event_data):
+        """
+        格式化 Issues 事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        action = event_data.get('action', 'unknown')
+        repo = event_data.get('repository', {})
+        repo_name = repo.get('full_name', 'unknown/repo')
+        issue = event_data.get('issue', {})
+        title = issue.get('title', 'unknown')
+        number = issue.get('number', 0)
+        url = issue.get('html_url', '')
+        sender = event_data.get('sender', {}).get('login', 'unknown')
+        
+        # 转换 action 为中文
+        action_map = {
+            'opened': '创建',
+            'closed': '关闭',
+            'reopened': '重新打开',
+            'edited': '编辑',
+            'deleted': '删除',
+            'pinned': '置顶',
+            'unpinned': '取消置顶',
+            'transferred': '转移',
+        }
+        action_cn = action_map.get(action, action)
+        
+        msg = f"[GitHub] Issue {action_cn}\n"
+        msg += f"仓库: {repo_name}\n"
+        msg += f"标题: {title}\n"
+        msg += f"操作者: {sender}\n"
+        msg += f"Issue #{number}: {url}"
+        
+        return msg
+
+
+class PRHandler:
+    """Pull Request 事件处理器"""
+    
+    @staticmethod
+    def format_message(event_data):
+        """
+        格式化 Pull Request 事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        action = event_data.get('action', 'unknown')
+        repo = event_data.get('repository', {})
+        repo_name = repo.get('full_name', 'unknown/repo')
+        pr = event_data.get('pull_request', {})
+        title = pr.get('title', 'unknown')
+        number = pr.get('number', 0)
+        url = pr.get('html_url', '')
+        sender = event_data.get('sender', {}).get('login', 'unknown')
+        
+        # 获取分支信息
+        head = pr.get('head', {})
+        base = pr.get('base', {})
+        head_ref = head.get('ref', 'unknown')
+        base_ref = base.get('ref', 'unknown')
+        head_repo = head.get('repo', {}).get('full_name', '')
+        
+        # 转换 action 为中文
+        action_map = {
+            'opened': '打开',
+            'closed': '关闭',
+            'reopened': '重新打开',
+            'edited': '编辑',
+            'review_requested': '请求审查',
+            'review_request_removed': '取消审查请求',
+            'ready_for_review': '准备好审查',
+            'converted_to_draft': '转为草稿',
+            'locked': '锁定',
+            'unlocked': '解锁',
+        }
+        action_cn = action_map.get(action, action)
+        
+        msg = f"[GitHub] Pull request {action_cn}\n"
+        msg += f"仓库: {repo_name}\n"
+        msg += f"标题: {title}\n"
+        msg += f"发起者: {sender}\n"
+        
+        # 显示分支信息
+        if head_repo and head_repo != repo_name:
+            msg += f"分支: {head_repo}:{head_ref} -> {base_ref}\n"
+        else:
+            msg += f"分支: {head_ref} -> {base_ref}\n"
+        
+        msg += f"PR #{number}: {url}"
+        
+        return msg
+
+
+class ReleaseHandler:
+    """Release 事件处理器"""
+    
+    @staticmethod
+    def format_message(event_data):
+        """
+        格式化 Release 事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        action = event_data.get('action', 'published')
+        repo = event_data.get('repository', {})
+        repo_name = repo.get('full_name', 'unknown/repo')
+        release = event_data.get('release', {})
+        tag_name = release.get('tag_name', 'unknown')
+        name = release.get('name', '')
+        url = release.get('html_url', '')
+        sender = event_data.get('sender', {}).get('login', 'unknown')
+        body = release.get('body', '')
+        assets = release.get('assets', [])
+        
+        msg = f"[GitHub] Release 发布\n"
+        msg += f"仓库: {repo_name}\n"
+        msg += f"版本: {tag_name}\n"
+        
+        if name and name != tag_name:
+            msg += f"名称: {name}\n"
+        
+        msg += f"发布者: {sender}\n"
+        
+        # 显示版本描述（最多200字符）
+        if body:
+            msg += f"\n描述: {truncate_text(body, 200)}\n"
+        
+        # 显示下载链接
+        if assets:
+            msg += f"\n下载文件 ({len(assets)} 个):\n"
+            for asset in assets[:3]:
+                asset_name = asset.get('name', 'unknown')
+                download_url = asset.get('browser_download_url', '')
+                size = asset.get('size', 0)
+                size_mb = size / (1024 * 1024)
+                msg += f"- {asset_name} ({size_mb:.2f} MB)\n"
+            
+            if len(assets) > 3:
+                msg += f"- 还有 {len(assets) - 3} 个文件...\n"
+        
+        msg += f"\n查看详情: {url}"
+        
+        return msg
+
+
+class StarHandler:
+    """Star 事件处理器"""
+    
+    @staticmethod
+    def format_message(event_data):
+        """
+        格式化 Star 事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        action = event_data.get('action', 'created')
+        repo = event_data.get('repository', {})
+        repo_name = repo.get('full_name', 'unknown/repo')
+        sender = event_data.get('sender', {}).get('login', 'unknown')
+        stargazers_count = repo.get('stargazers_count', 0)
+        
+        msg = f"[GitHub] 仓库被收藏\n"
+        msg += f"仓库: {repo_name}\n"
+        msg += f"收藏者: {sender}\n"
+        msg += f"当前 Star 数: {stargazers_count}"
+        
+        return msg
+
+
+class ForkHandler:
+    """Fork 事件处理器"""
+    
+    @staticmethod
+    def format_message(event_data):
+        """
+        格式化 Fork 事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        repo = event_data.get('repository', {})
+        repo_name = repo.get('full_name', 'unknown/repo')
+        sender = event_data.get('sender', {}).get('login', 'unknown')
+        
+        # 获取 fork 的仓库信息
+        forkee = event_data.get('forkee', {})
+        fork_name = forkee.get('full_name', 'unknown/repo')
+        fork_url = forkee.get('html_url', '')
+        
+        msg = f"[GitHub] 仓库被复刻\n"
+        msg += f"原仓库: {repo_name}\n"
+        msg += f"复刻者: {sender}\n"
+        msg += f"复刻仓库: {fork_name}"
+        
+        if fork_url:
+            msg += f"\n查看: {fork_url}"
+        
+        return msg
+
+
+class WorkflowHandler:
+    """GitHub Actions Workflow 事件处理器"""
+    
+    @staticmethod
+    def format_message(event_data):
+        """
+        格式化 Workflow 构建事件消息
+        
+        Args:
+            event_data: GitHub Webhook 事件数据
+        
+        Returns:
+            str: 格式化后的消息
+        """
+        action = event_data.get('action', 'completed')
+        repo = event_data.get('repository', {})
+        repo_name = repo.get('full_name', 'unknown/repo')
+        workflow_run = event_data.get('workflow_run', {})
+        sender = event_data.get('sender', {}).get('login', 'unknown')
+        
+        # 获取工作流信息
+        workflow_name = workflow_run.get('name', 'unknown')
+        workflow_id = workflow_run.get('id', 0)
+        status = workflow_run.get('status', 'unknown')
+        conclusion = workflow_run.get('conclusion', '')
+        run_number = workflow_run.get('run_number', 0)
+        
+        # 获取分支信息
+        head_branch = workflow_run.get('head_branch', 'unknown')
+        head_sha = workflow_run.get('head_sha', '')
+        head_sha_short = head_sha[:7] if head_sha else 'unknown'
+        
+        # 获取提交信息
+        head_commit = workflow_run.get('head_commit', {})
+        commit_message = head_commit.get('message', 'unknown')
+        commit_author = head_commit.get('author', {}).get('name', 'unknown')
+        
+        # 获取时间信息
+        created_at = workflow_run.get('created_at', '')
+        updated_at = workflow_run.get('updated_at', '')
+        
+        # 计算耗时
+        duration = ''
+        if created_at and updated_at:
+            try:
+                from datetime import datetime
+                start_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                end_time = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+                duration_seconds = (end_time - start_time).total_seconds()
+                
+                if duration_seconds < 60:
+                    duration = f"{int(duration_seconds)}秒"
+                elif duration_seconds < 3600:
+                    minutes = int(duration_seconds // 60)
+                    seconds = int(duration_seconds % 60)
+                    duration = f"{minutes}分{seconds}秒"
+                else:
+                    hours = int(duration_seconds // 3600)
+                    minutes = int((duration_seconds % 3600) // 60)
+                    duration = f"{hours}小时{minutes}分"
+            except:
+                pass
+        
+        # 获取构建日志和产物链接
+        html_url = workflow_run.get('html_url', '')
+        logs_url = workflow_run.get('logs_url', '')
+        
+        # 获取构建产物
+        artifacts = workflow_run.get('artifacts', [])
+        
+        # 转换 action 为中文
+        action_map = {
+            'requested': '请求',
+            'in_progress': '进行中',
+            'completed': '完成',
+            'queued': '排队中',
+        }
+        action_cn = action_map.get(action, action)
+        
+        # 转换 conclusion 为中文
+        conclusion_map = {
+            'success': '成功',
+            'failure': '失败',
+            'cancelled': '已取消',
+            'timed_out': '超时',
+            'action_required': '需要操作',
+            'neutral': '中性',
+            'skipped': '跳过',
+            'stale': '过时',
+        }
+        conclusion_cn = conclusion_map.get(conclusion, conclusion) if conclusion else status
+        
+        # 构建消息
+        msg = f"[GitHub] Workflow 构建{action_cn}\n"
+        msg += f"仓库: {repo_name}\n"
+        msg += f"工作流: {workflow_name} (#{run_number})\n"
+        
+        if conclusion and action == 'completed':
+            msg += f"状态: {conclusion_cn}\n"
+        else:
+            msg += f"状态: {status}\n"
+        
+        msg += f"分支: {head_branch}\n"
+        msg += f"提交: {head_sha_short} - {truncate_text(commit_message)}\n"
+        msg += f"提交者: {commit_author}\n"
+        
+        if duration:
+            msg += f"耗时: {duration}\n"
+        
+        # 添加查看链接
+        if html_url:
+            msg += f"\n查看详情: {html_url}"
+        
+        # 添加日志链接（仅当构建失败或完成时）
+        if logs_url and action in ['completed', 'failed']:
+            msg += f"\n查看日志: {logs_url}"
+        
+        # 显示构建产物（仅在构建成功时）
+        if artifacts and conclusion == 'success' and action == 'completed':
+            msg += f"\n\n下载产物 ({len(artifacts)} 个):\n"
+            for artifact in artifacts[:3]:
+                artifact_name = artifact.get('name', 'unknown')
+                artifact_size = artifact.get('size_in_bytes', 0)
+                
+                # 格式化文件大小
+                if artifact_size < 1024:
+                    size_str = f"{artifact_size} B"
+                elif artifact_size < 1024 * 1024:
+                    size_str = f"{artifact_size / 1024:.2f} KB"
+                elif artifact_size < 1024 * 1024 * 1024:
+                    size_str = f"{artifact_size / (1024 * 1024):.2f} MB"
+                else:
+                    size_str = f"{artifact_size / (1024 * 1024 * 1024):.2f} GB"
+                
+                # 构建产物下载链接
+                archive_url = artifact.get('archive_download_url', '')
+                if archive_url:
+                    msg += f"- {artifact_name} ({size_str})\n"
+                    msg += f"  下载链接: {archive_url}\n"
+                else:
+                    msg += f"- {artifact_name} ({size_str})\n"
+            
+            if len(artifacts) > 3:
+                msg += f"- 还有 {len(artifacts) - 3} 个产物...\n"
+        
+        return msg
@@ -0,0 +1,83 @@
+"""
+Webhook 请求体解码微基准
+
+用法:
+    python benchmarks/bench_payload.py [-n 次数]
+
+对 benchmarks/payloads 下的录制数据分别测量：
+    - 原实现：json.loads(body.decode('utf-8'))
+    - 标准库直接解析 bytes
+    - payload.loads（已安装 orjson 时使用 orjson）
+    - payload.decode_payload 选择性解码
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ErisPulse_GitHubWebhook.payload import loads, decode_payload, merge_fields, PARSER_NAME
+from ErisPulse_GitHubWebhook.history import SUMMARY_FIELDS
+from ErisPulse_GitHubWebhook.handlers import PushHandler, WorkflowHandler
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'payloads')
+
+HANDLERS = {
+    'push': PushHandler,
+    'workflow_run': WorkflowHandler,
+}
+
+
+def event_type_of(filename):
+    """根据文件名推断事件类型（push_large.json -> push）"""
+    name = os.path.splitext(filename)[0]
+    for event_type in HANDLERS:
+        if name.startswith(event_type):
+            return event_type
+    return None
+
+
+def measure(func, body, number):
+    """返回单次调用的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(number):
+        func(body)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=200, help='每个用例的循环次数')
+    args = parser.parse_args()
+    
+    print(f"解析器: {PARSER_NAME}")
+    print(f"{'payload':<26}{'size':>10}{'decode+json':>14}{'json(bytes)':>14}{'loads':>14}{'selective':>14}")
+    
+    for filename in sorted(os.listdir(PAYLOAD_DIR)):
+        event_type = event_type_of(filename)
+        if event_type is None:
+            continue
+        
+        with open(os.path.join(PAYLOAD_DIR, filename), 'rb') as f:
+            body = f.read()
+        
+        fields = merge_fields(
+            HANDLERS[event_type].FIELDS,
+            HANDLERS[event_type].KEY_FIELDS,
+            SUMMARY_FIELDS,
+        )
+        
+        results = [
+            measure(lambda b: json.loads(b.decode('utf-8')), body, args.number),
+            measure(json.loads, body, args.number),
+            measure(loads, body, args.number),
+            measure(lambda b: decode_payload(b, fields), body, args.number),
+        ]
+        print(f"{filename:<26}{len(body):>10}" + ''.join(f"{r:>12.1f}us" for r in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+"""
+Webhook 处理流程压测
+
+用法:
+    python benchmarks/bench_pipeline.py [-n 次数] [--burst 并发数] [--targets 订阅数]
+                                        [--shared] [--async-pipeline] [--duplicates 比例]
+                                        [--send-latency 毫秒] [--storage-latency 毫秒]
+
+用伪造的 Request、桩适配器和桩存储驱动 Main._webhook_request_handler
+（--shared 时驱动仓库共享入口），语料为 benchmarks/payloads 下的录制数据。
+    
+    - 顺序模式：每个 payload 依次投递 n 次，输出吞吐量和各阶段 p50/p99
+    - 突发模式（--burst）：混合全部 payload 同时发起大量并发投递，
+      可按比例混入重复投递以覆盖去重路径
+
+需要安装 ErisPulse 与 fastapi（与模块运行环境相同）。
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ErisPulse_GitHubWebhook import Core
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'payloads')
+
+REPO = 'myorg/myproject'
+SECRET = 'bench-secret'
+
+# 文件名前缀 -> 事件类型（长前缀优先）
+EVENT_PREFIXES = (
+    ('pull_request', 'pull_request'),
+    ('workflow_run', 'workflow_run'),
+    ('issues', 'issues'),
+    ('release', 'release'),
+    ('push', 'push'),
+    ('star', 'star'),
+    ('fork', 'fork'),
+)
+
+STAGES = ('queue_wait', 'dedup', 'body_read', 'signature', 'decode', 'history', 'format', 'send')
+
+
+# ========== 桩对象 ==========
+
+class StubLogger:
+    def get_child(self, name):
+        return self
+    
+    def __getattr__(self, level):
+        def log(msg, *args, **kwargs):
+            if level in ('error', 'critical'):
+                print(f"[{level}] {msg}", file=sys.stderr)
+        return log
+
+
+class StubStorage:
+    """内存存储（经 JSON 往返以模拟序列化开销，可附加固定延迟）"""
+    
+    def __init__(self, latency=0.0):
+        self.data = {}
+        self.latency = latency
+    
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def get(self, key, default=None):
+        self._wait()
+        value = self.data.get(key)
+        return default if value is None else json.loads(value)
+    
+    def set(self, key, value):
+        self._wait()
+        self.data[key] = json.dumps(value, ensure_ascii=False)
+        return True
+    
+    def delete(self, key):
+        self._wait()
+        self.data.pop(key, None)
+        return True
+    
+    def get_all_keys(self):
+        return list(self.data)
+    
+    def get_multi(self, keys):
+        self._wait()
+        return {key: json.loads(self.data[key]) for key in keys if key in self.data}
+    
+    def set_multi(self, items):
+        self._wait()
+        for key, value in items.items():
+            self.data[key] = json.dumps(value, ensure_ascii=False)
+        return True
+    
+    def delete_multi(self, keys):
+        self._wait()
+        for key in keys:
+            self.data.pop(key, None)
+        return True
+
+
+class StubAdapter:
+    """记录发送次数的适配器（可附加固定延迟）"""
+    
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = 0
+        adapter = self
+        
+        class _Target:
+            async def Text(self, message):
+                if adapter.latency:
+                    await asyncio.sleep(adapter.latency)
+                adapter.sent += 1
+        
+        class _Send:
+            @staticmethod
+            def To(target_type, target_id):
+                return _Target()
+        
+        self.Send = _Send
+
+
+class StubAdapters:
+    def __init__(self, adapter):
+        self.adapter = adapter
+    
+    def get(self, platform):
+        return self.adapter
+
+
+class StubRouter:
+    def register_http_route(self, module_name, path, handler, methods=None):
+        pass
+    
+    def unregister_http_route(self, module_name, path):
+        return True
+
+
+class StubConfig:
+    def __init__(self, config):
+        self.config = config
+    
+    def getConfig(self, name, default=None):
+        return dict(self.config)
+
+
+class StubSDK:
+    def __init__(self, config, storage, adapter):
+        self.logger = StubLogger()
+        self.storage = storage
+        self.adapter = StubAdapters(adapter)
+        self.router = StubRouter()
+        self.config = StubConfig(config)
+
+
+class FakeRequest:
+    """只实现 Core 用到的部分"""
+    
+    def __init__(self, headers, body):
+        self.headers = headers
+        self.path_params = {}
+        self._body = body
+    
+    async def body(self):
+        return self._body
+    
+    async def stream(self):
+        for start in range(0, len(self._body), 65536):
+            yield self._body[start:start + 65536]
+
+
+# ========== 工具函数 ==========
+
+def event_type_of(filename):
+    """根据文件名推断事件类型（pull_request_merged.json -> pull_request）"""
+    for prefix, event_type in EVENT_PREFIXES:
+        if filename.startswith(prefix):
+            return event_type
+    return None
+
+
+def load_corpus():
+    """读取录制数据：[(文件名, 事件类型, 请求体)]"""
+    corpus = []
+    for filename in sorted(os.listdir(PAYLOAD_DIR)):
+        event_type = event_type_of(filename)
+        if event_type is None:
+            continue
+        with open(os.path.join(PAYLOAD_DIR, filename), 'rb') as f:
+            corpus.append((filename, event_type, f.read()))
+    return corpus
+
+
+def make_headers(event_type, body, delivery_id):
+    signature = hmac.new(SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return {
+        'X-GitHub-Event': event_type,
+        'X-GitHub-Delivery': delivery_id,
+        'X-Hub-Signature-256': f"sha256={signature}",
+        'Content-Type': 'application/json',
+        'Content-Length': str(len(body)),
+    }
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+async def create_module(args):
+    """创建使用桩对象的模块实例并添加订阅"""
+    config = {
+        'base_url': 'http://localhost:8080',
+        'async_pipeline': args.async_pipeline,
+        'queue_max_size': max(1000, args.burst),
+        'shared_endpoints': args.shared,
+        'metrics_enabled': False,
+        'slow_delivery_threshold': 0,
+        'dedup_snapshot_interval': 3600,
+    }
+    storage = StubStorage(args.storage_latency / 1000)
+    adapter = StubAdapter(args.send_latency / 1000)
+    Core.sdk = StubSDK(config, storage, adapter)
+    Core.command = lambda *a, **k: (lambda func: func)
+    
+    module = Core.Main()
+    await module.on_load(None)
+    
+    events = [event_type for _, event_type in EVENT_PREFIXES]
+    for index in range(args.targets):
+        subscription = {
+            'uuid': f"b{index:03d}",
+            'target_id': f"G{index}",
+            'target_type': 'group',
+            'platform': 'stub',
+            'repo': REPO,
+            'events': events,
+            'webhook_secret': SECRET,
+            'enabled': True,
+            'created_at': int(time.time()),
+        }
+        await module.registry.add(subscription)
+        await module._register_route(subscription)
+    
+    # 收集每次投递的分阶段计时：(各阶段耗时, 总耗时)
+    timers = []
+    log_slow_delivery = module._log_slow_delivery
+    
+    def collect(timer, repo, event_type):
+        timers.append((dict(timer.stages), timer.elapsed))
+        log_slow_delivery(timer, repo, event_type)
+    
+    module._log_slow_delivery = collect
+    return module, adapter, timers
+
+
+def deliver(module, event_type, body, delivery_id, shared):
+    """发起一次投递（普通入口投给第一个订阅）"""
+    request = FakeRequest(make_headers(event_type, body, delivery_id), body)
+    if shared:
+        return module._repo_request_handler(request, REPO)
+    return module._webhook_request_handler(request, module.registry.get('b000'))
+
+
+def report(title, timers, elapsed, count):
+    print(f"\n{title}: {count} 次投递，用时 {elapsed:.3f}s，吞吐 {count / elapsed:.0f} 次/秒")
+    print(f"  {'stage':<12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'max (ms)':>12}")
+    
+    for stage in STAGES + ('total',):
+        if stage == 'total':
+            values = [total for _, total in timers]
+        else:
+            values = [stages[stage] for stages, _ in timers if stage in stages]
+        if not values:
+            continue
+        print(f"  {stage:<12}{percentile(values, 50) * 1000:>12.3f}"
+              f"{percentile(values, 99) * 1000:>12.3f}{max(values) * 1000:>12.3f}")
+
+
+# ========== 压测 ==========
+
+async def run_sequential(args, corpus):
+    print(f"顺序模式: 每个 payload {args.number} 次，订阅数 {args.targets}，"
+          f"{'共享入口' if args.shared else '普通入口'}，{'异步' if args.async_pipeline else '同步'}处理")
+    
+    for filename, event_type, body in corpus:
+        module, adapter, timers = await create_module(args)
+        
+        start = time.perf_counter()
+        for index in range(args.number):
+            await deliver(module, event_type, body, f"{filename}-{index}", args.shared)
+        await module.on_unload(None)  # 异步模式下等待队列排空
+        elapsed = time.perf_counter() - start
+        
+        report(f"{filename} ({len(body) // 1024} KB)", timers, elapsed, args.number)
+        print(f"  已发送 {adapter.sent} 条，去重统计 {module.dedup.stats()}")
+
+
+async def run_burst(args, corpus):
+    print(f"突发模式: {args.burst} 个并发投递，重复比例 {args.duplicates:.0%}，订阅数 {args.targets}，"
+          f"{'共享入口' if args.shared else '普通入口'}，{'异步' if args.async_pipeline else '同步'}处理")
+    
+    module, adapter, timers = await create_module(args)
+    rng = random.Random(42)
+    
+    deliveries = []
+    for index in range(args.burst):
+        filename, event_type, body = corpus[index % len(corpus)]
+        if deliveries and rng.random() < args.duplicates:
+            deliveries.append(rng.choice(deliveries))  # GitHub 重新投递：投递 ID 相同
+        else:
+            deliveries.append((event_type, body, f"burst-{index}"))
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        deliver(module, event_type, body, delivery_id, args.shared)
+        for event_type, body, delivery_id in deliveries
+    ))
+    await module.on_unload(None)
+    elapsed = time.perf_counter() - start
+    
+    errors = sum(1 for r in results if isinstance(r, dict) and r.get('status') == 'error')
+    report("突发", timers, elapsed, len(deliveries))
+    print(f"  已发送 {adapter.sent} 条，错误响应 {errors} 个")
+    print(f"  去重统计 {module.dedup.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=200, help='顺序模式下每个 payload 的投递次数')
+    parser.add_argument('--burst', type=int, default=0, help='突发模式的并发投递数（0 表示顺序模式）')
+    parser.add_argument('--targets', type=int, default=1, help='同一仓库的订阅数')
+    parser.add_argument('--shared', action='store_true', help='通过仓库共享入口投递（分发给全部订阅）')
+    parser.add_argument('--async-pipeline', action='store_true', help='开启异步接收队列')
+    parser.add_argument('--duplicates', type=float, default=0.1, help='突发模式下重复投递的比例')
+    parser.add_argument('--send-latency', type=float, default=0, help='适配器发送延迟（毫秒）')
+    parser.add_argument('--storage-latency', type=float, default=0, help='存储读写延迟（毫秒）')
+    args = parser.parse_args()
+    
+    corpus = load_corpus()
+    if args.burst:
+        asyncio.run(run_burst(args, corpus))
+    else:
+        asyncio.run(run_sequential(args, corpus))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+消息渲染微基准
+
+用法:
+    python benchmarks/bench_render.py [-n 次数]
+
+对 benchmarks/payloads 下的录制数据分别测量：
+    - baseline：benchmarks/baseline_handlers.py 中模板化之前的 handler.format_message（对照组）
+    - default：当前的 handler.format_message（默认格式）
+    - custom：当前的 handler.format_message 使用 TemplateRegistry 预编译的自定义模板
+    - str.format：build_context 后每次重新解析同一模板文本（对照组）
+并检查默认格式的输出与 baseline 一致，slower 列为 default 相对 baseline 的耗时比。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import baseline_handlers
+from ErisPulse_GitHubWebhook.templates import TemplateRegistry
+from ErisPulse_GitHubWebhook.handlers import (
+    PushHandler, IssuesHandler, PRHandler, ReleaseHandler, StarHandler, ForkHandler, WorkflowHandler,
+)
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'payloads')
+
+HANDLERS = {
+    'push': PushHandler,
+    'issues': IssuesHandler,
+    'pull_request': PRHandler,
+    'release': ReleaseHandler,
+    'star': StarHandler,
+    'fork': ForkHandler,
+    'workflow_run': WorkflowHandler,
+}
+
+# 自定义模板示例（只用必有字段，可与 str.format 对照）
+CUSTOM_TEMPLATES = {
+    'push': "[{repo_name}] {pusher} 推送 {commit_count} 个提交到 {ref}",
+    'issues': "[{repo_name}] Issue #{number} {action_cn}: {title}\n{url}",
+    'pull_request': "[{repo_name}] PR #{number} {action_cn}: {title}\n{head_label} -> {base_ref}",
+    'release': "[{repo_name}] {tag_name} 已发布\n{url}",
+    'star': "[{repo_name}] {sender} 收藏了仓库，共 {stargazers_count} 个 Star",
+    'fork': "[{repo_name}] {sender} 复刻为 {fork_name}",
+    'workflow_run': "[{repo_name}] {workflow_name} #{run_number}: {state}\n{head_branch} @ {head_sha_short}",
+}
+
+
+class _NullLogger:
+    def info(self, msg):
+        pass
+    
+    def error(self, msg):
+        print(msg, file=sys.stderr)
+
+
+def event_type_of(filename):
+    """根据文件名推断事件类型（push_large.json -> push，pull_request_merged.json -> pull_request）"""
+    name = os.path.splitext(filename)[0]
+    matches = [event_type for event_type in HANDLERS if name.startswith(event_type)]
+    return max(matches, key=len) if matches else None
+
+
+def measure(func, number):
+    """返回单次调用的平均耗时（微秒），取 3 轮中最快的一轮"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=5000, help='每个用例的循环次数')
+    args = parser.parse_args()
+    
+    registry = TemplateRegistry({'bench': CUSTOM_TEMPLATES}, _NullLogger(), HANDLERS)
+    baseline = {event_type: getattr(baseline_handlers, handler.__name__) for event_type, handler in HANDLERS.items()}
+    
+    print(f"{'payload':<26}{'baseline':>12}{'default':>12}{'slower':>8}{'custom':>12}{'str.format':>12}")
+    
+    mismatched = []
+    for filename in sorted(os.listdir(PAYLOAD_DIR)):
+        event_type = event_type_of(filename)
+        if event_type is None:
+            continue
+        
+        with open(os.path.join(PAYLOAD_DIR, filename), 'rb') as f:
+            event_data = json.loads(f.read())
+        
+        handler = HANDLERS[event_type]
+        old_handler = baseline[event_type]
+        template = registry.get('bench', event_type)
+        source = CUSTOM_TEMPLATES[event_type]
+        
+        if handler.format_message(event_data) != old_handler.format_message(event_data):
+            mismatched.append(filename)
+        
+        old = measure(lambda: old_handler.format_message(event_data), args.number)
+        new = measure(lambda: handler.format_message(event_data), args.number)
+        custom = measure(lambda: handler.format_message(event_data, template), args.number)
+        control = measure(lambda: source.format_map(handler.build_context(event_data)), args.number)
+        
+        print(
+            f"{filename:<26}{old:>10.2f}us{new:>10.2f}us{new / old:>7.2f}x"
+            f"{custom:>10.2f}us{control:>10.2f}us"
+        )
+    
+    if mismatched:
+        print(f"\n默认格式输出与 baseline 不一致: {', '.join(mismatched)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+
+from ErisPulse_GitHubWebhook.registry import ConfigRegistry
+from ErisPulse_GitHubWebhook.shared_state import SQLiteState
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStorage(dict):
+    def get(self, key, default=None):
+        return super().get(key, default)
+    
+    def set(self, key, value):
+        self[key] = value
+        return True
+
+
+def make_config(uuid, repo='octo/demo', target_id='G1'):
+    return {'uuid': uuid, 'repo': repo, 'target_id': target_id, 'events': ['push'], 'enabled': True}
+
+
+class SlowState(SQLiteState):
+    """每次读取前让出事件循环，模拟等待其他进程的写锁"""
+    
+    async def version(self):
+        await asyncio.sleep(0.01)
+        return await super().version()
+    
+    async def load_configs(self):
+        await asyncio.sleep(0.01)
+        return await super().load_configs()
+
+
+def test_local_load():
+    storage = MemoryStorage()
+    registry = ConfigRegistry(storage, logger)
+    
+    async def run():
+        await registry.add(make_config('a1'))
+        await registry.add(make_config('b2', repo='octo/other', target_id='G2'))
+        
+        reloaded = ConfigRegistry(storage, logger)
+        await reloaded.load()
+        return reloaded
+    
+    reloaded = asyncio.run(run())
+    assert [c['uuid'] for c in reloaded.all()] == ['a1', 'b2']
+    assert [c['uuid'] for c in reloaded.by_repo('octo/other')] == ['b2']
+    assert [c['uuid'] for c in reloaded.by_target('G1')] == ['a1']
+
+
+def test_update_and_remove_reindex():
+    registry = ConfigRegistry(MemoryStorage(), logger)
+    
+    async def run():
+        await registry.add(make_config('a1'))
+        await registry.update('a1', repo='octo/renamed')
+        assert registry.by_repo('octo/demo') == []
+        assert [c['uuid'] for c in registry.by_repo('octo/renamed')] == ['a1']
+        
+        assert (await registry.remove('a1'))['uuid'] == 'a1'
+        assert await registry.remove('a1') is None
+        assert len(registry) == 0 and registry.by_target('G1') == []
+    
+    asyncio.run(run())
+
+
+def test_reload_keeps_serving_old_index(tmp_path):
+    # 重新加载期间（等待共享状态时）按仓库查询不能返回空
+    state = SlowState(str(tmp_path / 'state.db'), logger)
+    registry = ConfigRegistry(MemoryStorage(), logger, shared=state)
+    
+    async def run():
+        await registry.load()
+        await registry.add(make_config('a1'))
+        
+        observed = []
+        polling = True
+        
+        async def poll():
+            while polling:
+                observed.append(len(registry.by_repo('octo/demo')))
+                await asyncio.sleep(0)
+        
+        poller = asyncio.create_task(poll())
+        for _ in range(5):
+            await registry.load()
+        polling = False
+        await poller
+        await state.close()
+        return observed
+    
+    observed = asyncio.run(run())
+    assert observed and all(count == 1 for count in observed)
+
+
+def test_local_write_does_not_mark_stale(tmp_path):
+    state = SQLiteState(str(tmp_path / 'state.db'), logger)
+    registry = ConfigRegistry(MemoryStorage(), logger, shared=state)
+    
+    async def run():
+        await registry.load()
+        await registry.add(make_config('a1'))
+        await registry.update('a1', verified=True)
+        await registry.remove('a1')
+        stale = await registry.stale()
+        await state.close()
+        return stale
+    
+    assert asyncio.run(run()) is False
+
+
+def test_other_process_write_marks_stale(tmp_path):
+    path = str(tmp_path / 'state.db')
+    state = SQLiteState(path, logger)
+    other_state = SQLiteState(path, logger)
+    registry = ConfigRegistry(MemoryStorage(), logger, shared=state)
+    other = ConfigRegistry(MemoryStorage(), logger, shared=other_state)
+    
+    async def run():
+        await registry.load()
+        await other.load()
+        await other.add(make_config('b2'))
+        # 本进程随后的修改不能掩盖其他进程的修改
+        await registry.add(make_config('a1'))
+        assert await registry.stale()
+        
+        await registry.load()
+        assert not await registry.stale()
+        assert sorted(c['uuid'] for c in registry.all()) == ['a1', 'b2']
+        
+        await state.close()
+        await other_state.close()
+    
+    asyncio.run(run())
@@ -0,0 +1,100 @@
+import hashlib
+import hmac
+
+import pytest
+
+from ErisPulse_GitHubWebhook.signature import SignatureVerifier, parse_signature_headers
+
+
+SECRET = 'It\'s a Secret to Everybody'
+PAYLOAD = b'Hello, World!'
+
+# GitHub 文档中的示例签名
+SHA256_DIGEST = '757107ea0eb2509fc211221cce984b8a37570b6d7586c22c46f4379c8b043e17'
+
+
+def sign(payload, algorithm, secret=SECRET):
+    return hmac.new(secret.encode('utf-8'), payload, getattr(hashlib, algorithm)).hexdigest()
+
+
+# ========== parse_signature_headers ==========
+
+def test_parse_sha256():
+    headers = {'X-Hub-Signature-256': f'sha256={SHA256_DIGEST}'}
+    assert parse_signature_headers(headers) == ('sha256', SHA256_DIGEST)
+
+
+def test_parse_prefers_sha256():
+    headers = {
+        'X-Hub-Signature-256': f'sha256={SHA256_DIGEST}',
+        'X-Hub-Signature': f"sha1={sign(PAYLOAD, 'sha1')}",
+    }
+    assert parse_signature_headers(headers) == ('sha256', SHA256_DIGEST)
+
+
+def test_parse_sha1_fallback():
+    digest = sign(PAYLOAD, 'sha1')
+    assert parse_signature_headers({'X-Hub-Signature': f'sha1={digest}'}) == ('sha1', digest)
+
+
+def test_parse_empty_sha256_falls_back_to_sha1():
+    digest = sign(PAYLOAD, 'sha1')
+    headers = {'X-Hub-Signature-256': '', 'X-Hub-Signature': f'sha1={digest}'}
+    assert parse_signature_headers(headers) == ('sha1', digest)
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    {'X-Hub-Signature-256': SHA256_DIGEST},
+    {'X-Hub-Signature-256': 'sha256='},
+    {'X-Hub-Signature-256': f'sha1={SHA256_DIGEST}'},
+    {'X-Hub-Signature': f'sha256={SHA256_DIGEST}'},
+    {'X-Hub-Signature-256': f'md5={SHA256_DIGEST}', 'X-Hub-Signature': f"sha1={sign(PAYLOAD, 'sha1')}"},
+])
+def test_parse_missing_or_malformed(headers):
+    assert parse_signature_headers(headers) is None
+
+
+# ========== SignatureVerifier ==========
+
+def test_verify_github_example():
+    assert SignatureVerifier(SECRET).verify(PAYLOAD, 'sha256', SHA256_DIGEST)
+
+
+@pytest.mark.parametrize('algorithm', ['sha256', 'sha1'])
+def test_verify_valid(algorithm):
+    assert SignatureVerifier(SECRET).verify(PAYLOAD, algorithm, sign(PAYLOAD, algorithm))
+
+
+@pytest.mark.parametrize('algorithm', ['sha256', 'sha1'])
+def test_verify_payload_mismatch(algorithm):
+    assert not SignatureVerifier(SECRET).verify(PAYLOAD + b'!', algorithm, sign(PAYLOAD, algorithm))
+
+
+@pytest.mark.parametrize('algorithm', ['sha256', 'sha1'])
+def test_verify_secret_mismatch(algorithm):
+    assert not SignatureVerifier('other').verify(PAYLOAD, algorithm, sign(PAYLOAD, algorithm))
+
+
+def test_verify_algorithm_mismatch():
+    verifier = SignatureVerifier(SECRET)
+    assert not verifier.verify(PAYLOAD, 'sha1', sign(PAYLOAD, 'sha256'))
+    assert not verifier.verify(PAYLOAD, 'sha256', sign(PAYLOAD, 'sha1'))
+
+
+def test_verify_unknown_algorithm():
+    assert not SignatureVerifier(SECRET).verify(PAYLOAD, 'md5', hashlib.md5(PAYLOAD).hexdigest())
+
+
+def test_verify_reuses_keyed_state():
+    # 多次验证互不影响（每次复制预先计算的 HMAC 状态）
+    verifier = SignatureVerifier(SECRET)
+    for payload in (PAYLOAD, b'', b'{"zen": "Keep it logically awesome."}', PAYLOAD):
+        assert verifier.verify(payload, 'sha256', sign(payload, 'sha256'))
+        assert verifier.verify(payload, 'sha1', sign(payload, 'sha1'))
+
+
+def test_verify_from_headers():
+    body = b'{"action": "opened"}'
+    headers = {'X-Hub-Signature-256': f"sha256={sign(body, 'sha256')}"}
+    assert SignatureVerifier(SECRET).verify(body, *parse_signature_headers(headers))
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import logging
+
+from ErisPulse_GitHubWebhook.storage import StorageAccess
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStorage(dict):
+    """记录每次批量写入的底层存储"""
+    
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+    
+    def get(self, key, default=None):
+        return super().get(key, default)
+    
+    def get_multi(self, keys):
+        return {key: self[key] for key in keys if key in self}
+    
+    def get_all_keys(self):
+        return list(self.keys())
+    
+    def set_multi(self, items):
+        self.batches.append(dict(items))
+        self.update(items)
+        return True
+    
+    def delete_multi(self, keys):
+        for key in keys:
+            self.pop(key, None)
+        return True
+
+
+class FailingStorage(MemoryStorage):
+    def set_multi(self, items):
+        raise OSError("disk full")
+
+
+def read_journal(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_writes_are_coalesced_and_visible_before_flush():
+    backend = MemoryStorage()
+    
+    async def run():
+        storage = StorageAccess(backend, logger, write_delay=0.01)
+        storage.set('a', 1)
+        storage.set('b', 2)
+        storage.delete('a')
+        storage.set('b', 3)
+        
+        assert storage.get('a') is None and storage.get('b') == 3
+        assert storage.get_multi(['a', 'b']) == {'b': 3}
+        assert backend == {}
+        
+        await asyncio.sleep(0.05)
+        storage.close()
+    
+    asyncio.run(run())
+    assert backend == {'b': 3}
+    assert backend.batches == [{'b': 3}]
+
+
+def test_max_pending_flushes_immediately():
+    backend = MemoryStorage()
+    
+    async def run():
+        storage = StorageAccess(backend, logger, write_delay=10, max_pending=3)
+        for i in range(3):
+            storage.set(f'k{i}', i)
+        assert backend == {'k0': 0, 'k1': 1, 'k2': 2}
+        storage.close()
+    
+    asyncio.run(run())
+
+
+def test_journal_records_value_at_write_time(tmp_path):
+    # 提交后原地修改的值不影响已记录的日志，日志线程也不会与修改并发编码
+    path = str(tmp_path / 'journal.log')
+    backend = MemoryStorage()
+    
+    async def run():
+        storage = StorageAccess(backend, logger, write_delay=10, journal=path)
+        configs = [{'uuid': 'a1'}]
+        for i in range(200):
+            storage.set('configs', configs)
+            configs[0][f'field{i}'] = i
+        storage._journal_executor.submit(lambda: None).result()
+        entries = read_journal(path)
+        storage.flush()
+        storage.close()
+        return entries
+    
+    entries = asyncio.run(run())
+    assert len(entries) == 200
+    assert entries[0] == {'k': 'configs', 'v': [{'uuid': 'a1'}]}
+    assert len(entries[-1]['v'][0]) == 200
+
+
+def test_recover_replays_unflushed_writes(tmp_path):
+    path = str(tmp_path / 'journal.log')
+    
+    async def crash():
+        storage = StorageAccess(MemoryStorage(), logger, write_delay=10, journal=path)
+        storage.set('a', {'n': 1})
+        storage.set_multi({'b': [1, 2], 'c': 'x'})
+        storage.delete('c')
+        # 模拟崩溃：不落盘，只等日志写完
+        storage._journal_executor.shutdown(wait=True)
+    
+    asyncio.run(crash())
+    
+    backend = MemoryStorage()
+    backend['c'] = 'stale'
+    storage = StorageAccess(backend, logger, write_delay=0, journal=path)
+    assert storage.recover() == 4
+    storage.close()
+    
+    assert backend == {'a': {'n': 1}, 'b': [1, 2]}
+    assert read_journal(path) == []
+
+
+def test_failed_flush_keeps_pending_writes():
+    backend = FailingStorage()
+    storage = StorageAccess(backend, logger, write_delay=0)
+    storage.set('a', 1)
+    assert storage.get('a') == 1
+    
+    backend.__class__ = MemoryStorage
+    assert storage.flush() == 1
+    assert backend == {'a': 1}